@@ -22,11 +22,17 @@ from typing import List, Tuple
 
 import numpy as np
 import psycopg2
+from scipy.spatial import cKDTree
 
-from spdb import config, hcci, hilbert
-from benchmarks.framework import compute_stats, time_query, wilcoxon_ranksum
+from spdb import config, hcci, hilbert, schema
+from benchmarks.framework import (
+    compute_stats, fetch_structured, prefetch_dims, time_query, wilcoxon_ranksum,
+)
 
 TABLE = config.TABLE_SLIDE_ONLY
+
+# (ctid, centroid_x, centroid_y) rows as fetched for relabelling
+CTID_XY_DTYPE = np.dtype([("ctid", object), ("x", np.float64), ("y", np.float64)])
 CLASSES = ['Epithelial', 'Stromal', 'Tumor', 'Lymphocyte']
 
 # ---------------------------------------------------------------------------
@@ -38,6 +44,17 @@ def assign_random(xs, ys, rng):
     return rng.choice(CLASSES, size=len(xs))
 
 
+def _seed_tree(seed_x, seed_y):
+    """KD-tree over the Voronoi seed points.
+
+    Seeds are i.i.d. uniform, so the sliding-midpoint split is already well
+    balanced; skipping the median partition and node compaction trims the
+    build without slowing the nearest-seed queries.
+    """
+    return cKDTree(np.column_stack([seed_x, seed_y]),
+                   balanced_tree=False, compact_nodes=False)
+
+
 def assign_voronoi(xs, ys, rng, n_seeds=10):
     """Assign class by nearest Voronoi seed (realistic spatial correlation)."""
     # Random seed points
@@ -47,24 +64,10 @@ def assign_voronoi(xs, ys, rng, n_seeds=10):
     seed_y = rng.uniform(ymin, ymax, n_seeds)
     seed_class = [CLASSES[i % len(CLASSES)] for i in range(n_seeds)]
 
-    # Assign each point to nearest seed
-    labels = []
-    # Vectorized: compute distances to all seeds
-    # For large arrays, process in chunks
-    chunk = 50000
-    result = np.empty(len(xs), dtype=object)
-    for start in range(0, len(xs), chunk):
-        end = min(start + chunk, len(xs))
-        x_chunk = xs[start:end, np.newaxis]  # (chunk, 1)
-        y_chunk = ys[start:end, np.newaxis]
-        # Distance to each seed
-        dx = x_chunk - seed_x[np.newaxis, :]  # (chunk, n_seeds)
-        dy = y_chunk - seed_y[np.newaxis, :]
-        dist = dx ** 2 + dy ** 2
-        nearest = np.argmin(dist, axis=1)
-        for i, idx in enumerate(nearest):
-            result[start + i] = seed_class[idx]
-    return result
+    # Assign each point to nearest seed: one KD-tree query over all points
+    tree = _seed_tree(seed_x, seed_y)
+    _, nearest = tree.query(np.column_stack([xs, ys]), workers=-1)
+    return np.asarray(seed_class, dtype=object)[nearest]
 
 
 def assign_quadrant(xs, ys):
@@ -150,33 +153,24 @@ def relabel_voronoi(conn, slide_id: str, rng, slide_width, slide_height, n_seeds
     seed_class = [CLASSES[i % len(CLASSES)] for i in range(n_seeds)]
     seed_enum = [hcci.CLASS_ENUM[c] for c in seed_class]
 
-    with conn.cursor() as cur:
-        cur.execute(
-            f"SELECT ctid, centroid_x, centroid_y FROM {TABLE} WHERE slide_id = %s",
-            (slide_id,)
-        )
-        rows = cur.fetchall()
+    recs = fetch_structured(
+        conn,
+        f"SELECT ctid, centroid_x, centroid_y FROM {TABLE} WHERE slide_id = %s",
+        (slide_id,), CTID_XY_DTYPE,
+    )
 
-    if not rows:
+    if len(recs) == 0:
         return 0
 
-    ctids = [r[0] for r in rows]
-    xs = np.array([float(r[1]) for r in rows], dtype=np.float64)
-    ys = np.array([float(r[2]) for r in rows], dtype=np.float64)
-
-    # Vectorized nearest-seed computation
-    chunk = 50000
-    new_enums = np.empty(len(xs), dtype=np.int64)
-    new_labels = np.empty(len(xs), dtype=object)
-    for start in range(0, len(xs), chunk):
-        end = min(start + chunk, len(xs))
-        dx = xs[start:end, np.newaxis] - seed_x[np.newaxis, :]
-        dy = ys[start:end, np.newaxis] - seed_y[np.newaxis, :]
-        dist = dx ** 2 + dy ** 2
-        nearest = np.argmin(dist, axis=1)
-        for i, idx in enumerate(nearest):
-            new_labels[start + i] = seed_class[idx]
-            new_enums[start + i] = seed_enum[idx]
+    ctids = recs["ctid"]
+    xs = recs["x"]
+    ys = recs["y"]
+
+    # Nearest seed for every row in one KD-tree query across all cores
+    tree = _seed_tree(seed_x, seed_y)
+    _, nearest = tree.query(np.column_stack([xs, ys]), workers=-1)
+    new_labels = np.asarray(seed_class, dtype=object)[nearest]
+    new_enums = np.asarray(seed_enum, dtype=np.int64)[nearest]
 
     # Compute new composite keys: replace class bits, keep hilbert bits
     from psycopg2.extras import execute_values
@@ -308,14 +302,11 @@ def main():
             metadata = json.load(f)
 
     # Get slides
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        slides = [r[0] for r in cur.fetchall()]
+    slides = schema.list_slide_ids(conn, TABLE)
     print(f"  Found {len(slides)} slides")
 
     # Pre-cache dims
-    for sid in slides:
-        get_dims(conn, sid, metadata)
+    prefetch_dims(conn, TABLE, slides, _dims_cache, metadata)
 
     level_names = ['random', 'voronoi', 'quadrant']
     if args.level:
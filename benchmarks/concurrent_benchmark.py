@@ -11,6 +11,7 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import os
 import time
@@ -19,9 +20,10 @@ from typing import List, Tuple
 
 import numpy as np
 import psycopg2
+import psycopg2.pool
 
-from spdb import config, hcci
-from benchmarks.framework import compute_stats
+from spdb import config, hcci, schema
+from benchmarks.framework import compute_stats, prefetch_dims
 
 TABLE = config.TABLE_SLIDE_ONLY
 
@@ -50,12 +52,64 @@ def get_dims(conn, slide_id: str, metadata: dict = None) -> Tuple[float, float]:
     return _dims_cache[slide_id]
 
 
+def _worker_rng(worker_id: int, seed: int = 42) -> np.random.Generator:
+    """Independent PCG64DXSM stream for one client.
+
+    Equivalent to ``SeedSequence(seed).spawn(n)[worker_id]`` but derived
+    from the worker id alone, so clients seed themselves without sharing
+    state and the streams do not depend on how many clients run.
+    """
+    ss = np.random.SeedSequence(seed, spawn_key=(worker_id,))
+    return np.random.Generator(np.random.PCG64DXSM(ss))
+
+
+def _viewport_stream(conn, rng, slides, metadata, viewport_frac, batch=1024):
+    """Yield (slide_id, w, h, x0, y0, x1, y1) viewports drawn in vectorised batches.
+
+    Keeps per-query RNG calls out of the client loop.
+    """
+    dims = np.array([get_dims(conn, sid, metadata) for sid in slides])
+    side = float(np.sqrt(viewport_frac))
+    while True:
+        idx = rng.integers(len(slides), size=batch)
+        w, h = dims[idx, 0], dims[idx, 1]
+        vw, vh = w * side, h * side
+        x0 = rng.uniform(0, np.maximum(1, w - vw))
+        y0 = rng.uniform(0, np.maximum(1, h - vh))
+        x1, y1 = x0 + vw, y0 + vh
+        for i in range(batch):
+            yield (slides[idx[i]], float(w[i]), float(h[i]),
+                   float(x0[i]), float(y0[i]), float(x1[i]), float(y1[i]))
+
+
+def _build_query(mode, class_label, sid, w, h, x0, y0, x1, y1):
+    """HCCI or GiST query for one viewport."""
+    if mode == "hcci":
+        return hcci.build_hcci_query(
+            TABLE, sid, [class_label],
+            x0, y0, x1, y1,
+            w, h, config.HILBERT_ORDER, use_direct=True,
+        )
+    return hcci.build_baseline_bbox_query(
+        TABLE, sid, [class_label],
+        x0, y0, x1, y1,
+    )
+
+
+def _to_asyncpg(sql: str, params) -> Tuple[str, list]:
+    """Rewrite a psycopg2 (%s) query for asyncpg ($n, plain Python args)."""
+    parts = sql.split("%s")
+    sql = parts[0] + "".join(f"${i}{part}" for i, part in enumerate(parts[1:], 1))
+    return sql, [p.item() if isinstance(p, np.generic) else p for p in params]
+
+
 # ---------------------------------------------------------------------------
 # Worker thread
 # ---------------------------------------------------------------------------
 
 def worker(
     worker_id: int,
+    pool: psycopg2.pool.ThreadedConnectionPool,
     slides: List[str],
     metadata: dict,
     mode: str,  # "hcci" or "gist"
@@ -64,55 +118,70 @@ def worker(
     duration_sec: float,
     results_out: dict,
 ):
-    """Run queries in a loop for `duration_sec` seconds, recording latencies."""
-    conn = psycopg2.connect(config.dsn())
-    conn.autocommit = True  # no transaction overhead
+    """Run queries in a loop for `duration_sec` seconds, recording latencies.
 
-    rng = np.random.RandomState(42 + worker_id * 1000)
-    p = config.HILBERT_ORDER
-    latencies = []
+    Samples are kept as integer nanoseconds and converted to ms once.
+    """
+    conn = pool.getconn()
 
-    # Pre-cache dims
-    for sid in slides:
-        get_dims(conn, sid, metadata)
+    rng = _worker_rng(worker_id)
+    viewports = _viewport_stream(conn, rng, slides, metadata, viewport_frac)
+    latencies = []
 
     deadline = time.monotonic() + duration_sec
 
     while time.monotonic() < deadline:
-        sid = rng.choice(slides)
-        w, h = get_dims(conn, sid, metadata)
-
-        vw = w * float(np.sqrt(viewport_frac))
-        vh = h * float(np.sqrt(viewport_frac))
-        x0 = float(rng.uniform(0, max(1, w - vw)))
-        y0 = float(rng.uniform(0, max(1, h - vh)))
-        x1 = float(x0 + vw)
-        y1 = float(y0 + vh)
-
-        if mode == "hcci":
-            sql, params = hcci.build_hcci_query(
-                TABLE, sid, [class_label],
-                x0, y0, x1, y1,
-                w, h, p, use_direct=True,
-            )
-        else:
-            sql, params = hcci.build_baseline_bbox_query(
-                TABLE, sid, [class_label],
-                x0, y0, x1, y1,
-            )
+        sql, params = _build_query(mode, class_label, *next(viewports))
 
-        t0 = time.perf_counter()
+        t0 = time.perf_counter_ns()
         with conn.cursor() as cur:
             cur.execute(sql, params)
             cur.fetchall()
-        t1 = time.perf_counter()
-        latencies.append((t1 - t0) * 1000)
+        t1 = time.perf_counter_ns()
+        latencies.append(t1 - t0)
 
-    conn.close()
+    pool.putconn(conn)
 
     results_out[worker_id] = {
         "n_queries": len(latencies),
-        "latencies": latencies,
+        "latencies": np.asarray(latencies, dtype=np.int64) / 1e6,
+    }
+
+
+async def async_worker(
+    worker_id: int,
+    pool,
+    slides: List[str],
+    metadata: dict,
+    mode: str,
+    viewport_frac: float,
+    class_label: str,
+    duration_sec: float,
+    results_out: dict,
+):
+    """asyncpg counterpart of worker(): one coroutine per simulated client.
+
+    Slide dims must already be cached (main() calls prefetch_dims).
+    """
+    rng = _worker_rng(worker_id)
+    viewports = _viewport_stream(None, rng, slides, metadata, viewport_frac)
+    latencies = []
+
+    deadline = time.monotonic() + duration_sec
+
+    while time.monotonic() < deadline:
+        sql, params = _build_query(mode, class_label, *next(viewports))
+        sql, args = _to_asyncpg(sql, params)
+
+        async with pool.acquire() as conn:
+            t0 = time.perf_counter_ns()
+            await conn.fetch(sql, *args)
+            t1 = time.perf_counter_ns()
+        latencies.append(t1 - t0)
+
+    results_out[worker_id] = {
+        "n_queries": len(latencies),
+        "latencies": np.asarray(latencies, dtype=np.int64) / 1e6,
     }
 
 
@@ -120,6 +189,40 @@ def worker(
 # Benchmark driver
 # ---------------------------------------------------------------------------
 
+def open_pool(n_clients: int) -> psycopg2.pool.ThreadedConnectionPool:
+    """Open one warm autocommit connection per client so checkout never blocks."""
+    pool = psycopg2.pool.ThreadedConnectionPool(n_clients, n_clients, config.dsn())
+    conns = [pool.getconn() for _ in range(n_clients)]
+    for conn in conns:
+        conn.autocommit = True  # no transaction overhead
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+            cur.fetchall()
+    for conn in conns:
+        pool.putconn(conn)
+    return pool
+
+
+async def _run_async_clients(n_clients: int, worker_args: tuple) -> float:
+    """Run async_worker x n_clients over a warm asyncpg pool; return wall time."""
+    import asyncpg
+
+    pool = await asyncpg.create_pool(
+        config.asyncpg_dsn(), min_size=n_clients, max_size=n_clients,
+    )
+    try:
+        async with pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+
+        t0 = time.time()
+        await asyncio.gather(*[
+            async_worker(i, pool, *worker_args) for i in range(n_clients)
+        ])
+        return time.time() - t0
+    finally:
+        await pool.close()
+
+
 def run_concurrent(
     slides: List[str],
     metadata: dict,
@@ -128,37 +231,49 @@ def run_concurrent(
     mode: str,
     viewport_frac: float = 0.05,
     class_label: str = "Tumor",
+    driver: str = "threads",
 ) -> dict:
-    """Run n_clients concurrent workers for duration_sec."""
+    """Run n_clients concurrent workers for duration_sec.
+
+    driver="threads" uses one OS thread per client over a psycopg2 pool;
+    driver="asyncpg" drives all clients from one event loop, keeping GIL
+    and thread-switch cost out of the client side of the measurement.
+    Connections are opened and warmed before the clock starts, so wall time
+    (and hence throughput) covers query execution only.
+    """
     results = {}
-    threads = []
-
-    for i in range(n_clients):
-        t = threading.Thread(
-            target=worker,
-            args=(i, slides, metadata, mode, viewport_frac, class_label, duration_sec, results),
-        )
-        threads.append(t)
-
-    t0 = time.time()
-    for t in threads:
-        t.start()
-    for t in threads:
-        t.join()
-    wall_time = time.time() - t0
+    args = (slides, metadata, mode, viewport_frac, class_label, duration_sec, results)
+
+    if driver == "asyncpg":
+        wall_time = asyncio.run(_run_async_clients(n_clients, args))
+    else:
+        threads = []
+        pool = open_pool(n_clients)
+
+        for i in range(n_clients):
+            t = threading.Thread(target=worker, args=(i, pool) + args)
+            threads.append(t)
+
+        t0 = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall_time = time.time() - t0
+        pool.closeall()
 
     # Aggregate
-    all_lats = []
-    total_queries = 0
-    for wid, res in sorted(results.items()):
-        all_lats.extend(res["latencies"])
-        total_queries += res["n_queries"]
+    # Per-client latencies stay as float64 arrays; concatenate once
+    all_lats = np.concatenate(
+        [res["latencies"] for _, res in sorted(results.items())])
+    total_queries = sum(res["n_queries"] for res in results.values())
 
     throughput = total_queries / wall_time
     stats = compute_stats(all_lats)
 
     return {
         "mode": mode,
+        "driver": driver,
         "n_clients": n_clients,
         "duration_sec": round(wall_time, 1),
         "total_queries": total_queries,
@@ -176,6 +291,8 @@ def main():
     parser.add_argument("--clients", type=str, default="1,4,8,16", help="Comma-separated client counts")
     parser.add_argument("--viewport-frac", type=float, default=0.05)
     parser.add_argument("--class-label", type=str, default="Tumor")
+    parser.add_argument("--driver", choices=["threads", "asyncpg"], default="threads",
+                        help="Client concurrency model")
     args = parser.parse_args()
 
     client_counts = [int(c) for c in args.clients.split(",")]
@@ -195,14 +312,11 @@ def main():
 
     # Get slides
     conn = psycopg2.connect(config.dsn())
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        slides = [r[0] for r in cur.fetchall()]
+    slides = schema.list_slide_ids(conn, TABLE)
     print(f"  Found {len(slides)} slides in {TABLE}")
 
-    # Pre-cache dims
-    for sid in slides:
-        get_dims(conn, sid, metadata)
+    with _dims_lock:
+        prefetch_dims(conn, TABLE, slides, _dims_cache, metadata)
     conn.close()
 
     all_results = []
@@ -214,6 +328,7 @@ def main():
                 slides, metadata, n, args.duration, mode,
                 viewport_frac=args.viewport_frac,
                 class_label=args.class_label,
+                driver=args.driver,
             )
             all_results.append(result)
             print(f"    {mode.upper()} @ {n} clients: "
@@ -236,6 +351,7 @@ def main():
         "duration_sec": args.duration,
         "viewport_frac": args.viewport_frac,
         "class_label": args.class_label,
+        "driver": args.driver,
         "n_slides": len(slides),
         "results": all_results,
     }
@@ -3,7 +3,6 @@ storage overhead, density analysis, Hilbert sensitivity, Hilbert vs Z-order,
 cold cache, pruning analysis.
 """
 
-import io
 import os
 import time
 import json
@@ -12,6 +11,7 @@ import pandas as pd
 import psycopg2
 
 from spdb import config, hilbert, zorder, schema
+from spdb.ingest import _copy_chunk_binary
 from benchmarks.framework import (
     compute_stats, save_raw_latencies, save_results, load_metadata,
     get_slide_dimensions, random_viewport, random_point, time_query,
@@ -267,29 +267,70 @@ def density_analysis():
     conn = psycopg2.connect(config.dsn())
     results = {}
 
+    # One pass over the table into long-format (slide, tile, class) counts;
+    # tile statistics and per-class totals are both reduced from that, so
+    # the query does not grow a filtered column per class label.
+    with conn.cursor() as cur:
+        cur.execute(schema.PARTITIONWISE_AGGREGATE)
+        cur.execute(f"""
+            WITH lc AS MATERIALIZED (
+                SELECT slide_id, tile_id, class_label, COUNT(*) AS cnt
+                FROM {config.TABLE_SPDB}
+                WHERE slide_id = ANY(%s)
+                GROUP BY slide_id, tile_id, class_label
+            ), tiles AS (
+                SELECT slide_id, SUM(cnt) AS cnt
+                FROM lc
+                GROUP BY slide_id, tile_id
+            ), classes AS (
+                SELECT slide_id, jsonb_object_agg(class_label, n) AS class_counts
+                FROM (
+                    SELECT slide_id, class_label, SUM(cnt)::bigint AS n
+                    FROM lc
+                    GROUP BY slide_id, class_label
+                ) c
+                GROUP BY slide_id
+            )
+            SELECT slide_id, t.n_tiles, t.mean, t.std, t.max, t.min,
+                   c.class_counts
+            FROM (
+                SELECT slide_id, COUNT(*) AS n_tiles, AVG(cnt) AS mean,
+                       STDDEV_POP(cnt) AS std, MAX(cnt) AS max, MIN(cnt) AS min
+                FROM tiles
+                GROUP BY slide_id
+            ) t
+            JOIN classes c USING (slide_id)
+        """, (list(metadata["slide_ids"]),))
+        tile_stats = {r[0]: r[1:] for r in cur.fetchall()}
+
     for sid in metadata["slide_ids"]:
         w, h = get_slide_dimensions(metadata, sid)
         n_objects = metadata["object_counts"][sid]
         area_px = w * h
         density = n_objects / area_px * 1e6
 
-        with conn.cursor() as cur:
-            cur.execute(f"""
-                SELECT tile_id, COUNT(*) FROM {config.TABLE_SPDB}
-                WHERE slide_id = %s GROUP BY tile_id
-            """, (sid,))
-            tile_counts = [r[1] for r in cur.fetchall()]
+        n_tiles, t_mean, t_std, t_max, t_min, class_counts = tile_stats.get(
+            sid, (0, 0, 0, 0, 0, {})
+        )
+        counts = np.array(list(class_counts.values()), dtype=np.float64)
+        if counts.size:
+            ratios = counts / counts.sum()
+            entropy = float(-(ratios * np.log2(ratios)).sum())
+        else:
+            entropy = 0.0
 
         results[sid] = {
             "n_objects": n_objects,
             "image_width": w,
             "image_height": h,
             "density_per_mpx": round(density, 2),
-            "n_tiles": len(tile_counts),
-            "tile_count_mean": float(np.mean(tile_counts)) if tile_counts else 0,
-            "tile_count_std": float(np.std(tile_counts)) if tile_counts else 0,
-            "tile_count_max": int(np.max(tile_counts)) if tile_counts else 0,
-            "tile_count_min": int(np.min(tile_counts)) if tile_counts else 0,
+            "n_tiles": n_tiles,
+            "tile_count_mean": float(t_mean or 0),
+            "tile_count_std": float(t_std or 0),
+            "tile_count_max": int(t_max or 0),
+            "tile_count_min": int(t_min or 0),
+            "class_counts": {k: int(v) for k, v in class_counts.items()},
+            "class_entropy": round(entropy, 4),
         }
 
     save_results(results, "density_analysis")
@@ -499,30 +540,8 @@ def pruning_analysis(n_trials=100, seed=42):
 # ---------- Hilbert Order Sensitivity ----------
 
 def _copy_rows_to_table(conn, table_name, rows_df, chunk_size=200_000):
-    """COPY a DataFrame into table using the COPY protocol."""
-    cols = [
-        "object_id", "slide_id", "geom", "centroid_x", "centroid_y",
-        "class_label", "tile_id", "hilbert_key", "zorder_key",
-        "area", "perimeter", "confidence", "pipeline_id",
-    ]
-    n = len(rows_df)
-    for start in range(0, n, chunk_size):
-        end = min(start + chunk_size, n)
-        chunk = rows_df.iloc[start:end]
-        lines = []
-        for _, r in chunk.iterrows():
-            wkt = f"POINT({r['centroid_x']:.2f} {r['centroid_y']:.2f})"
-            lines.append(
-                f"\\N\t{r['slide_id']}\t{wkt}\t{r['centroid_x']:.2f}\t"
-                f"{r['centroid_y']:.2f}\t{r['class_label']}\t{r['tile_id']}\t"
-                f"{int(r['hilbert_key'])}\t{int(r['zorder_key'])}\t"
-                f"{r['area']:.2f}\t{r['perimeter']:.2f}\t"
-                f"{r['confidence']:.1f}\t{r['pipeline_id']}"
-            )
-        buf = io.StringIO("\n".join(lines) + "\n")
-        with conn.cursor() as cur:
-            cur.copy_from(buf, table_name, columns=cols)
-        conn.commit()
+    """COPY a DataFrame into table using binary COPY (WKB geometry)."""
+    _copy_chunk_binary(conn, table_name, rows_df, chunk_size=chunk_size)
 
 
 def hilbert_order_sensitivity(orders=None, n_trials=200, seed=42):
@@ -76,8 +76,18 @@ def build_exact_query(class_label, viewport):
     )
 
 
+def class_counts_by_frequency(conn) -> dict:
+    """Row count per class_label, most frequent first."""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT class_label, COUNT(*) FROM {TABLE}
+            GROUP BY class_label ORDER BY COUNT(*) DESC
+        """)
+        return dict(cur.fetchall())
+
+
 def run_benchmark(conn, meta, n_trials=200, viewport_frac=0.05,
-                  seed=config.RANDOM_SEED + 11000):
+                  seed=config.RANDOM_SEED + 11000, class_counts=None):
     bounds = meta["bounds"]
     class_enum = meta["class_enum"]
     hilbert_order = meta["hilbert_order"]
@@ -87,12 +97,8 @@ def run_benchmark(conn, meta, n_trials=200, viewport_frac=0.05,
     vw = x_span * np.sqrt(viewport_frac)
     vh = y_span * np.sqrt(viewport_frac)
 
-    with conn.cursor() as cur:
-        cur.execute(f"""
-            SELECT class_label, COUNT(*) FROM {TABLE}
-            GROUP BY class_label ORDER BY COUNT(*) DESC
-        """)
-        class_counts = dict(cur.fetchall())
+    if class_counts is None:
+        class_counts = class_counts_by_frequency(conn)
 
     class_labels = list(class_counts.keys())
     print(f"\n  Classes: {class_labels}")
@@ -196,9 +202,9 @@ def main():
     conn = psycopg2.connect(config.dsn())
     meta = load_gaia_metadata()
 
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT COUNT(*) FROM {TABLE}")
-        count = cur.fetchone()[0]
+    # Class counts double as the row count and are reused by run_benchmark
+    class_counts = class_counts_by_frequency(conn)
+    count = sum(class_counts.values())
     print(f"\n  Table {TABLE}: {count:,} rows")
 
     # Warmup
@@ -210,7 +216,8 @@ def main():
 
     t_start = time.time()
     bench_results = run_benchmark(conn, meta, n_trials=args.trials,
-                                  viewport_frac=args.viewport_frac)
+                                  viewport_frac=args.viewport_frac,
+                                  class_counts=class_counts)
     total = time.time() - t_start
 
     all_results = {
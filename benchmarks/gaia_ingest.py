@@ -22,7 +22,9 @@ import io
 import json
 import math
 import os
+import queue
 import sys
+import threading
 import time
 import urllib.parse
 import urllib.request
@@ -33,6 +35,7 @@ import numpy as np
 import psycopg2
 
 from spdb import config, hilbert, hcci
+from benchmarks.framework import COPY_READ_SIZE, CopyLineStream
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -59,6 +62,12 @@ COLOR_CLASSES = {
     "Very_Red":  (3.0, 10.0),    # Very cool / reddened
 }
 
+# The bins are contiguous, so classification is one searchsorted over the
+# edges; index len(COLOR_CLASSES) is the out-of-range "Unknown" label.
+_COLOR_EDGES = np.array([lo for lo, _ in COLOR_CLASSES.values()]
+                        + [max(hi for _, hi in COLOR_CLASSES.values())])
+_COLOR_LABELS = np.array(list(COLOR_CLASSES) + ["Unknown"], dtype=object)
+
 # Sky patches: (dec_min, dec_max, ra_min, ra_max, magnitude_limit)
 # Split sky into dec strips × RA slices for reliable TAP queries.
 # Each patch covers a smaller sky area → more likely to succeed.
@@ -228,36 +237,43 @@ def _query_gaia_sync_patch(dec_min: float, dec_max: float,
     return _parse_csv_string(csv_data)
 
 
+def _classify_colors(bp_rp: np.ndarray) -> np.ndarray:
+    """Color class label for each BP-RP value (``lo <= bp_rp < hi``)."""
+    idx = np.searchsorted(_COLOR_EDGES, bp_rp, side="right") - 1
+    idx[(idx < 0) | (idx >= len(COLOR_CLASSES))] = len(COLOR_CLASSES)
+    return _COLOR_LABELS[idx]
+
+
 def _parse_csv_string(csv_data: str) -> list[dict]:
     """Parse Gaia CSV response into records."""
-    records = []
+    parsed = []
     reader = csv.DictReader(io.StringIO(csv_data))
     for row in reader:
         try:
-            ra = float(row["ra"])
-            dec = float(row["dec"])
-            bp_rp = float(row["bp_rp"])
-            mag = float(row["phot_g_mean_mag"])
-
-            # Classify by color
-            class_label = "Unknown"
-            for name, (lo, hi) in COLOR_CLASSES.items():
-                if lo <= bp_rp < hi:
-                    class_label = name
-                    break
-
-            records.append({
-                "source_id": int(row["source_id"]),
-                "ra": ra,
-                "dec": dec,
-                "mag": mag,
-                "bp_rp": bp_rp,
-                "class_label": class_label,
-            })
+            parsed.append((
+                float(row["ra"]),
+                float(row["dec"]),
+                float(row["bp_rp"]),
+                float(row["phot_g_mean_mag"]),
+                int(row["source_id"]),
+            ))
         except (ValueError, KeyError):
             continue
 
-    return records
+    # Classify by color for the whole response at once
+    labels = _classify_colors(np.array([r[2] for r in parsed], dtype=np.float64))
+
+    return [
+        {
+            "source_id": source_id,
+            "ra": ra,
+            "dec": dec,
+            "mag": mag,
+            "bp_rp": bp_rp,
+            "class_label": label,
+        }
+        for (ra, dec, bp_rp, mag, source_id), label in zip(parsed, labels)
+    ]
 
 
 def _parse_csv_cache(path: str) -> list[dict]:
@@ -329,20 +345,18 @@ def load_data(conn, records: list[dict]):
     print(f"\n[Load] Inserting {len(records):,} records via COPY...")
     t0 = time.time()
 
-    buf = io.StringIO()
-    for r in records:
-        buf.write(
-            f"{r['source_id']}\t{DATASET_ID}\t{r['ra']}\t{r['dec']}\t"
-            f"{r['class_label']}\t{r['mag']}\t{r['bp_rp']}\n"
-        )
-
-    buf.seek(0)
+    buf = CopyLineStream(
+        f"{r['source_id']}\t{DATASET_ID}\t{r['ra']}\t{r['dec']}\t"
+        f"{r['class_label']}\t{r['mag']}\t{r['bp_rp']}\n"
+        for r in records
+    )
     with conn.cursor() as cur:
         cur.copy_from(
             buf, TABLE,
             columns=("source_id", "dataset_id", "centroid_x", "centroid_y",
                      "class_label", "mag", "bp_rp"),
             sep="\t",
+            size=COPY_READ_SIZE,
         )
     conn.commit()
     elapsed = time.time() - t0
@@ -363,8 +377,35 @@ def build_geometry(conn):
     print(f"  Done in {time.time() - t0:.1f}s")
 
 
-def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
-    """Compute Hilbert keys from normalized ra/dec coordinates."""
+def _read_chunks(chunk_ranges, results: queue.Queue) -> None:
+    """Reader thread: fetch id ranges on a private connection into `results`."""
+    try:
+        conn = psycopg2.connect(config.dsn())
+        try:
+            for lo, hi in chunk_ranges:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        f"SELECT id, centroid_x, centroid_y FROM {TABLE} "
+                        f"WHERE id >= %s AND id <= %s ORDER BY id",
+                        (lo, hi),
+                    )
+                    rows = cur.fetchall()
+                results.put((lo, hi, rows))
+        finally:
+            conn.close()
+    except Exception as e:
+        results.put(e)
+    results.put(None)
+
+
+def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER,
+                         n_readers: int = 4):
+    """Compute Hilbert keys from normalized ra/dec coordinates.
+
+    Id-range chunks are fetched by `n_readers` threads, each on its own
+    connection, so the scan runs on several backends while this thread
+    encodes keys and COPYs them into the staging table.
+    """
     print(f"\n[Hilbert] Computing Hilbert keys (order={hilbert_order})...")
     t0 = time.time()
 
@@ -372,10 +413,10 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
         cur.execute(f"""
             SELECT MIN(centroid_x), MAX(centroid_x),
                    MIN(centroid_y), MAX(centroid_y),
-                   COUNT(*)
+                   COUNT(*), MIN(id), MAX(id)
             FROM {TABLE}
         """)
-        x_min, x_max, y_min, y_max, count = cur.fetchone()
+        x_min, x_max, y_min, y_max, count, id_min, id_max = cur.fetchone()
 
     print(f"  Bounds: ra=[{x_min:.2f}, {x_max:.2f}], dec=[{y_min:.2f}, {y_max:.2f}]")
     print(f"  Rows: {count:,}")
@@ -392,26 +433,38 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
     CHUNK_SIZE = 2_000_000
     n_grid = 1 << hilbert_order
 
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT MIN(id), MAX(id) FROM {TABLE}")
-        id_min, id_max = cur.fetchone()
+    chunk_ranges = [
+        (lo, min(lo + CHUNK_SIZE - 1, id_max))
+        for lo in range(id_min, id_max + 1, CHUNK_SIZE)
+    ]
+    n_readers = max(1, min(n_readers, len(chunk_ranges)))
 
-    print(f"  Processing in chunks of {CHUNK_SIZE:,}...")
+    print(f"  Processing in chunks of {CHUNK_SIZE:,} with {n_readers} readers...")
     total_updated = 0
 
     with conn.cursor() as cur:
         cur.execute("CREATE TEMP TABLE _hk (id BIGINT, hk BIGINT)")
 
-    for chunk_start in range(id_min, id_max + 1, CHUNK_SIZE):
-        chunk_end = min(chunk_start + CHUNK_SIZE - 1, id_max)
-
-        with conn.cursor() as cur:
-            cur.execute(
-                f"SELECT id, centroid_x, centroid_y FROM {TABLE} "
-                f"WHERE id >= %s AND id <= %s ORDER BY id",
-                (chunk_start, chunk_end),
-            )
-            rows = cur.fetchall()
+    # Bounded queue: at most two fetched chunks per reader wait in memory
+    results: queue.Queue = queue.Queue(maxsize=2 * n_readers)
+    readers = [
+        threading.Thread(
+            target=_read_chunks, args=(chunk_ranges[k::n_readers], results), daemon=True,
+        )
+        for k in range(n_readers)
+    ]
+    for t in readers:
+        t.start()
+
+    n_done = 0
+    while n_done < n_readers:
+        item = results.get()
+        if item is None:
+            n_done += 1
+            continue
+        if isinstance(item, Exception):
+            raise item
+        chunk_start, chunk_end, rows = item
 
         if not rows:
             continue
@@ -424,13 +477,8 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
         gy = np.clip(((ys - y_min) * n_grid / height).astype(np.int64), 0, n_grid - 1)
         h_keys = hilbert.encode_batch(gx, gy, hilbert_order)
 
-        buf = io.StringIO()
-        for i in range(len(ids)):
-            buf.write(f"{ids[i]}\t{int(h_keys[i])}\n")
-        buf.seek(0)
-
         with conn.cursor() as cur:
-            cur.copy_from(buf, "_hk", columns=("id", "hk"), sep="\t")
+            hcci.copy_key_pairs(cur, "_hk", h_keys, ids, columns=("hk", "id"))
 
         total_updated += len(ids)
         pct = total_updated / count * 100 if count else 0
@@ -543,10 +591,7 @@ def verify(conn, class_enum: dict[str, int]):
     """Verify setup."""
     print(f"\n[Verify] Checking setup...")
     with conn.cursor() as cur:
-        cur.execute(f"SELECT COUNT(*) FROM {TABLE}")
-        total = cur.fetchone()[0]
-        print(f"  Total rows: {total:,}")
-
+        # One scan: the total is the sum of the class distribution
         cur.execute(f"""
             SELECT class_label, COUNT(*) as cnt,
                    ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER(), 1) as pct
@@ -554,8 +599,12 @@ def verify(conn, class_enum: dict[str, int]):
             GROUP BY class_label
             ORDER BY cnt DESC
         """)
+        dist = cur.fetchall()
+        total = sum(cnt for _, cnt, _ in dist)
+        print(f"  Total rows: {total:,}")
+
         print("\n  Stellar color class distribution:")
-        for cat, cnt, pct in cur.fetchall():
+        for cat, cnt, pct in dist:
             print(f"    {cat:<12} {cnt:>12,}  ({pct}%)")
 
         cur.execute(f"""
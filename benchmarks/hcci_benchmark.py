@@ -21,9 +21,9 @@ from typing import Any
 import numpy as np
 import psycopg2
 
-from spdb import config, hcci
+from spdb import config, hcci, schema
 from benchmarks.framework import (
-    compute_stats, save_raw_latencies, save_results,
+    compute_stats, prefetch_dims, save_raw_latencies, save_results,
     time_query, time_query_buffers, parse_buffers,
     wilcoxon_ranksum, print_comparison,
 )
@@ -37,9 +37,7 @@ TABLE = config.TABLE_SLIDE_ONLY
 
 def _get_all_slides(conn) -> list[str]:
     """Get all distinct slide_ids from the SO table."""
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        return [r[0] for r in cur.fetchall()]
+    return schema.list_slide_ids(conn, TABLE)
 
 
 def _get_slide_dims(conn, slide_id: str) -> tuple[float, float]:
@@ -162,12 +160,13 @@ def run_query_type(
     lats_hcci: list[float] = []
     lats_gist: list[float] = []
 
+    side = float(np.sqrt(viewport_frac))
     for trial in range(n_trials):
         sid = rng.choice(slides)
         w, h = get_dims(conn, sid)
 
-        vw = w * float(np.sqrt(viewport_frac))
-        vh = h * float(np.sqrt(viewport_frac))
+        vw = w * side
+        vh = h * side
         x0 = float(rng.uniform(0, max(1, w - vw)))
         y0 = float(rng.uniform(0, max(1, h - vh)))
         x1 = float(x0 + vw)
@@ -255,13 +254,13 @@ def run_io_decomposition(
         hcci_buffers = []
         gist_buffers = []
 
+        side = float(np.sqrt(qt["viewport_frac"]))
         for _ in range(n_trials):
             sid = rng.choice(slides)
             w, h = get_dims(conn, sid)
 
-            vf = qt["viewport_frac"]
-            vw = w * float(np.sqrt(vf))
-            vh = h * float(np.sqrt(vf))
+            vw = w * side
+            vh = h * side
             x0 = float(rng.uniform(0, max(1, w - vw)))
             y0 = float(rng.uniform(0, max(1, h - vh)))
             x1 = float(x0 + vw)
@@ -348,12 +347,13 @@ def run_fp_measurement(
     fp_rates = []
     theoretical = hcci.false_positive_rate(0.05, config.HILBERT_ORDER)
 
+    side = float(np.sqrt(0.05))
     for i in range(n_trials):
         sid = rng.choice(slides)
         w, h = get_dims(conn, sid)
 
-        vw = w * float(np.sqrt(0.05))
-        vh = h * float(np.sqrt(0.05))
+        vw = w * side
+        vh = h * side
         x0 = float(rng.uniform(0, max(1, w - vw)))
         y0 = float(rng.uniform(0, max(1, h - vh)))
 
@@ -405,12 +405,13 @@ def run_bbox_comparison(
     lats_gist: list[float] = []
     lats_bbox: list[float] = []
 
+    side = float(np.sqrt(viewport_frac))
     for trial in range(n_trials):
         sid = rng.choice(slides)
         w, h = get_dims(conn, sid)
 
-        vw = w * float(np.sqrt(viewport_frac))
-        vh = h * float(np.sqrt(viewport_frac))
+        vw = w * side
+        vh = h * side
         x0 = float(rng.uniform(0, max(1, w - vw)))
         y0 = float(rng.uniform(0, max(1, h - vh)))
         x1 = float(x0 + vw)
@@ -523,8 +524,8 @@ def main():
 
     # Pre-cache dimensions for a sample of slides
     print("  Pre-caching slide dimensions...")
+    prefetch_dims(conn, TABLE, slides[:20], _slide_dims_cache)
     for sid in slides[:20]:
-        get_dims(conn, sid)
         get_count(conn, sid)
 
     t_start = time.time()
@@ -24,8 +24,10 @@ import time
 import numpy as np
 import psycopg2
 
-from spdb import config, hcci
-from benchmarks.framework import compute_stats, save_results, wilcoxon_ranksum
+from spdb import config, hcci, schema
+from benchmarks.framework import (
+    compute_stats, prefetch_dims, save_results, wilcoxon_ranksum,
+)
 
 TABLE = config.TABLE_SLIDE_ONLY
 
@@ -125,29 +127,12 @@ def _parse_plan_buffers(plan: list) -> dict:
 # ---------------------------------------------------------------------------
 
 def _get_all_slides(conn) -> list[str]:
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        return [r[0] for r in cur.fetchall()]
-
-
-def _get_slide_dims(conn, slide_id: str) -> tuple[float, float]:
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT MAX(centroid_x), MAX(centroid_y) FROM {TABLE} WHERE slide_id = %s", (slide_id,))
-        row = cur.fetchone()
-    if row and row[0] and row[1]:
-        return float(row[0]) * 1.05, float(row[1]) * 1.05
-    return 100000.0, 100000.0
+    return schema.list_slide_ids(conn, TABLE)
 
 
 _dims_cache: dict[str, tuple[float, float]] = {}
 
 
-def get_dims(conn, sid):
-    if sid not in _dims_cache:
-        _dims_cache[sid] = _get_slide_dims(conn, sid)
-    return _dims_cache[sid]
-
-
 # ---------------------------------------------------------------------------
 # Cold cache benchmark
 # ---------------------------------------------------------------------------
@@ -188,8 +173,7 @@ def run_cold_cache_trials(
     # We need a persistent connection to look up slide dims
     # but we'll use it only for metadata, not for benchmark queries
     meta_conn = connect_with_retry()
-    for sid in slides[:20]:
-        get_dims(meta_conn, sid)
+    prefetch_dims(meta_conn, TABLE, slides[:20], _dims_cache)
     meta_conn.close()
 
     for trial in range(n_trials):
@@ -335,8 +319,7 @@ def main():
     conn = connect_with_retry()
     slides = _get_all_slides(conn)
     print(f"  Found {len(slides)} slides")
-    for sid in slides[:20]:
-        get_dims(conn, sid)
+    prefetch_dims(conn, TABLE, slides[:20], _dims_cache)
     conn.close()
 
     t_start = time.time()
@@ -25,9 +25,9 @@ import time
 import numpy as np
 import psycopg2
 
-from spdb import config, hcci, hilbert
+from spdb import config, hcci, hilbert, schema
 from benchmarks.framework import (
-    compute_stats, save_results, time_query, wilcoxon_ranksum,
+    compute_stats, prefetch_dims, save_results, time_query, wilcoxon_ranksum,
 )
 
 TABLE = config.TABLE_SLIDE_ONLY
@@ -39,9 +39,7 @@ INDEX_ORDER = config.HILBERT_ORDER  # 8 — the order stored in the index
 # ---------------------------------------------------------------------------
 
 def _get_all_slides(conn) -> list[str]:
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        return [r[0] for r in cur.fetchall()]
+    return schema.list_slide_ids(conn, TABLE)
 
 
 def _get_slide_dims(conn, slide_id: str) -> tuple[float, float]:
@@ -157,30 +155,29 @@ def run_order_sweep(
     print(f"  {n_trials} trials per order")
     print(f"{'='*60}")
 
-    # Pre-generate viewports (same for all orders — paired design)
-    viewports = []
-    for trial in range(n_trials):
-        sid = rng.choice(slides)
-        w, h = get_dims(conn, sid)
-        vw = w * float(np.sqrt(viewport_frac))
-        vh = h * float(np.sqrt(viewport_frac))
-        x0 = float(rng.uniform(0, max(1, w - vw)))
-        y0 = float(rng.uniform(0, max(1, h - vh)))
-        x1 = float(x0 + vw)
-        y1 = float(y0 + vh)
-        viewports.append((sid, w, h, x0, y0, x1, y1))
+    # Pre-generate viewports (same for all orders — paired design).  Slides
+    # and origins are drawn as whole arrays rather than three RNG calls
+    # per trial.
+    side = float(np.sqrt(viewport_frac))
+    prefetch_dims(conn, TABLE, slides, _dims_cache)
+    dims = np.array([get_dims(conn, sid) for sid in slides], dtype=np.float64)
+    idx = rng.randint(len(slides), size=n_trials)
+    w, h = dims[idx, 0], dims[idx, 1]
+    vw, vh = w * side, h * side
+    x0 = rng.uniform(0, np.maximum(1, w - vw))
+    y0 = rng.uniform(0, np.maximum(1, h - vh))
+    viewports = list(zip(
+        [slides[i] for i in idx.tolist()], w.tolist(), h.tolist(),
+        x0.tolist(), y0.tolist(), (x0 + vw).tolist(), (y0 + vh).tolist(),
+    ))
 
     # Get exact row counts via GiST for FP measurement
     print(f"\n  Computing exact counts via GiST ({n_trials} viewports)...")
-    exact_counts = []
-    for trial, (sid, w, h, x0, y0, x1, y1) in enumerate(viewports):
-        gist_sql, gist_params = hcci.build_baseline_gist_query(
-            TABLE, sid, class_labels, x0, y0, x1, y1,
-        )
-        rows, _ = time_query(conn, gist_sql, gist_params)
-        exact_counts.append(len(rows))
-        if (trial + 1) % 50 == 0:
-            print(f"    {trial + 1}/{n_trials} exact counts computed")
+    exact_counts = hcci.count_query_rows_many(conn, [
+        hcci.build_baseline_gist_query(TABLE, sid, class_labels, x0, y0, x1, y1)
+        for sid, w, h, x0, y0, x1, y1 in viewports
+    ])
+    print(f"    {len(exact_counts)}/{n_trials} exact counts computed")
 
     results_by_order = {}
 
@@ -281,10 +278,6 @@ def main():
     slides = _get_all_slides(conn)
     print(f"  Found {len(slides)} slides")
 
-    # Cache dimensions
-    for sid in slides[:20]:
-        get_dims(conn, sid)
-
     t_start = time.time()
 
     # Run sweep for Tumor (16.4% selectivity — primary benchmark class)
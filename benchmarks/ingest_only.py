@@ -14,8 +14,10 @@ from __future__ import annotations
 
 import math
 import os
+import queue
 import subprocess
 import sys
+import threading
 from io import StringIO
 
 # ---------------------------------------------------------------------------
@@ -62,22 +64,25 @@ TARGET_NUCLEI = 200_000_000
 # Hilbert & Z-order
 # ---------------------------------------------------------------------------
 def xy2d(n, x, y):
-    d = 0
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
     s = n // 2
     while s > 0:
-        rx = 1 if (x & s) > 0 else 0
-        ry = 1 if (y & s) > 0 else 0
+        rx = (x & s) > 0
+        ry = (y & s) > 0
         d += s * s * ((3 * rx) ^ ry)
-        if ry == 0:
-            if rx == 1:
-                x = s - 1 - x
-                y = s - 1 - y
-            x, y = y, x
+        flip = rx & ~ry
+        x = np.where(flip, s - 1 - x, x)
+        y = np.where(flip, s - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
         s //= 2
     return d
 
 def z_order(gx, gy):
-    z = 0
+    gx = np.asarray(gx, dtype=np.int64)
+    gy = np.asarray(gy, dtype=np.int64)
+    z = np.zeros(len(gx), dtype=np.int64)
     for i in range(8):
         z |= ((gx >> i) & 1) << (2 * i)
         z |= ((gy >> i) & 1) << (2 * i + 1)
@@ -90,8 +95,8 @@ def compute_keys(cx, cy):
     span_y = max(ymax - ymin, 1.0)
     gx = ((cx - xmin) / span_x * (HILBERT_N - 1)).astype(int).clip(0, HILBERT_N - 1)
     gy = ((cy - ymin) / span_y * (HILBERT_N - 1)).astype(int).clip(0, HILBERT_N - 1)
-    h_keys = [xy2d(HILBERT_N, int(x), int(y)) for x, y in zip(gx, gy)]
-    z_keys = [z_order(int(x), int(y)) for x, y in zip(gx, gy)]
+    h_keys = xy2d(HILBERT_N, np.asarray(gx), np.asarray(gy))
+    z_keys = z_order(np.asarray(gx), np.asarray(gy))
     return pd.Series(h_keys, dtype="int64"), pd.Series(z_keys, dtype="int64")
 
 # ---------------------------------------------------------------------------
@@ -102,7 +107,19 @@ def get_conn():
 
 def get_loaded_slides(conn):
     with conn.cursor() as cur:
-        cur.execute("SELECT DISTINCT slide_id FROM objects_mono;")
+        # Loose index scan over the slide_id btree: one index probe per
+        # distinct slide instead of a DISTINCT over every row
+        cur.execute("""
+            WITH RECURSIVE s AS (
+                (SELECT slide_id FROM objects_mono ORDER BY slide_id LIMIT 1)
+                UNION ALL
+                SELECT (SELECT m.slide_id FROM objects_mono m
+                         WHERE m.slide_id > s.slide_id
+                         ORDER BY m.slide_id LIMIT 1)
+                FROM s WHERE s.slide_id IS NOT NULL
+            )
+            SELECT slide_id FROM s WHERE slide_id IS NOT NULL;
+        """)
         loaded = set()
         for (sid,) in cur.fetchall():
             parts = sid.split("-")
@@ -124,6 +141,16 @@ def count_rows_exact(conn, table):
         cur.execute(f"SELECT count(*) FROM {table};")
         return cur.fetchone()[0]
 
+def refresh_tile_rollup(conn):
+    """Refresh the Q3 tile/class count rollup over objects_slide_only, if built."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('objects_slide_only_tile_counts');")
+        if cur.fetchone()[0] is None:
+            return
+        cur.execute("SET LOCAL enable_partitionwise_aggregate = on;")
+        cur.execute("REFRESH MATERIALIZED VIEW objects_slide_only_tile_counts;")
+    conn.commit()
+
 def create_so_partition(conn, slide_id, safe_name):
     safe_val = slide_id.replace("'", "''")
     part_name = f"objects_slide_only_{safe_name}"
@@ -260,6 +287,54 @@ def normalise_parquet(df, slide_id):
 def barcode_to_patient_id(patient_dir):
     return patient_dir.split("=", 1)[-1] if "=" in patient_dir else patient_dir
 
+def prefetch_slides(patient_dirs, depth=2):
+    """Download + normalise slides on a background thread, `depth` ahead.
+
+    Yields (idx, patient_dir, n_raw, df) in order; df is None when the
+    download was empty.  The loader's COPY time then hides the next
+    slide's download/normalise time.  Stops producing when the consumer
+    closes the generator; an error on the producer thread is re-raised
+    here.
+    """
+    q = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def _put(item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        try:
+            for idx, patient_dir in enumerate(patient_dirs):
+                raw = download_parquet(patient_dir)
+                df = None if raw.empty else normalise_parquet(raw, barcode_to_patient_id(patient_dir))
+                if not _put((idx, patient_dir, len(raw), df)):
+                    return
+                del raw, df
+        except BaseException as e:
+            # Hand the failure to the consumer rather than dying silently
+            _put(e)
+        finally:
+            _put(None)
+
+    producer = threading.Thread(target=_produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
 # ---------------------------------------------------------------------------
 # Main: ingest only, NO ANALYZE
 # ---------------------------------------------------------------------------
@@ -335,20 +410,19 @@ def main():
 
     # Step 4: Ingest slide by slide — NO ANALYZE
     slides_added = 0
-    for idx, patient_dir in enumerate(new_patients):
+    slides = prefetch_slides(new_patients)
+    for idx, patient_dir, n_raw, df in slides:
         if total >= args.target:
+            slides.close()
             break
 
-        patient_id = barcode_to_patient_id(patient_dir)
-        print(f"\n  [{idx+1}/{len(new_patients)}] Downloading {patient_dir} ...", end=" ", flush=True)
+        print(f"\n  [{idx+1}/{len(new_patients)}] {patient_dir} ...", end=" ", flush=True)
 
-        raw = download_parquet(patient_dir)
-        if raw.empty:
+        if df is None:
             print("EMPTY, skipping.")
             continue
 
-        print(f"{len(raw):,} rows.", end=" ", flush=True)
-        df = normalise_parquet(raw, patient_id)
+        print(f"{n_raw:,} rows.", end=" ", flush=True)
         if df.empty:
             print("NORM FAILED, skipping.")
             continue
@@ -356,7 +430,7 @@ def main():
         slide_id = df["slide_id"].iloc[0]
         if slide_id == "nan" or pd.isna(slide_id):
             print("BAD slide_id (nan), skipping.")
-            del raw, df
+            del df
             continue
 
         safe_slide = slide_id.replace("-", "_").lower()
@@ -403,7 +477,7 @@ def main():
         loaded.add(slide_id)
         print(f"OK. Total: {total:,}")
 
-        del raw, df
+        del df
 
     print(f"\n[ingest] Done. Slides added: {slides_added}. Total rows: {total:,}")
 
@@ -427,6 +501,11 @@ def main():
     conn.commit()
     print(f"[cleanup] Autovacuum re-enabled on {len(leaves)} leaves.")
 
+    # The Q3 rollup is a snapshot; bring it up to date with the new slides
+    if slides_added:
+        print("[cleanup] Refreshing tile rollup ...")
+        refresh_tile_rollup(conn)
+
     print(f"\n[NEXT STEPS]")
     print(f"  1. Run: sudo -u postgres psql -d spdb -c 'ANALYZE objects_mono; ANALYZE objects_slide_only; ANALYZE objects_spdb;'")
     print(f"  2. Run: python3 benchmarks/scale_benchmark.py --bench")
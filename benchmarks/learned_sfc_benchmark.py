@@ -20,16 +20,24 @@ import argparse
 import json
 import os
 import time
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 
 import numpy as np
 import psycopg2
 
-from spdb import config, hcci, hilbert
-from benchmarks.framework import compute_stats, time_query, wilcoxon_ranksum
+from spdb import config, hcci, hilbert, schema
+from benchmarks.framework import (
+    compute_stats, fetch_structured, prefetch_dims, time_query, wilcoxon_ranksum,
+)
 
 TABLE = config.TABLE_SLIDE_ONLY
 
+# (id, centroid_x, centroid_y, class_label) rows as fetched for key rebuilds
+OBJECT_ROW_DTYPE = np.dtype([
+    ("id", np.int64), ("x", np.float64), ("y", np.float64), ("class_label", object),
+])
+XY_DTYPE = np.dtype([("x", np.float64), ("y", np.float64)])
+
 # ---------------------------------------------------------------------------
 # CDF computation and learned key encoding
 # ---------------------------------------------------------------------------
@@ -46,23 +54,32 @@ class LearnedSFC:
     def train(self, conn, slide_id: str, table: str = TABLE):
         """Learn CDFs from data. Returns training time in seconds."""
         t0 = time.time()
-        with conn.cursor() as cur:
-            cur.execute(
-                f"SELECT centroid_x, centroid_y FROM {table} WHERE slide_id = %s",
-                (slide_id,)
-            )
-            rows = cur.fetchall()
+        pts = fetch_structured(
+            conn,
+            f"SELECT centroid_x, centroid_y FROM {table} WHERE slide_id = %s",
+            (slide_id,), XY_DTYPE,
+        )
+        return self.fit(slide_id, pts["x"], pts["y"], t0)
 
-        xs = np.array([float(r[0]) for r in rows], dtype=np.float64)
-        ys = np.array([float(r[1]) for r in rows], dtype=np.float64)
+    def fit(self, slide_id: str, xs: np.ndarray, ys: np.ndarray,
+            t0: Optional[float] = None) -> float:
+        """Learn CDFs from coordinates already in memory.
 
-        # Compute empirical CDF using sorted values + interpolation points
+        Returns seconds elapsed since `t0` (default: the start of the fit),
+        so callers that fetched the coordinates can charge that to training.
+        """
+        if t0 is None:
+            t0 = time.time()
+
+        # Compute empirical CDF using sorted values + interpolation points.
+        # Selecting ~1k quantiles from presorted data is far cheaper than
+        # partitioning the raw coordinates around each of them.
         x_sorted = np.sort(xs)
         y_sorted = np.sort(ys)
 
-        # Subsample for CDF (use n_bins quantile points)
-        x_quantiles = np.percentile(xs, np.linspace(0, 100, self.n_bins + 1))
-        y_quantiles = np.percentile(ys, np.linspace(0, 100, self.n_bins + 1))
+        levels = np.linspace(0, 100, self.n_bins + 1)
+        x_quantiles = np.percentile(x_sorted, levels)
+        y_quantiles = np.percentile(y_sorted, levels)
         x_cdf_vals = np.linspace(0, 1, self.n_bins + 1)
         y_cdf_vals = np.linspace(0, 1, self.n_bins + 1)
 
@@ -89,10 +106,7 @@ class LearnedSFC:
         gy = np.clip((cy * n).astype(np.int64), 0, n - 1)
         h_keys = hilbert.encode_batch(gx, gy, self.p)
 
-        class_enums = np.array(
-            [hcci.CLASS_ENUM.get(c, 0) for c in class_labels],
-            dtype=np.int64
-        )
+        class_enums = hcci.class_enums(class_labels)
         composite = (class_enums << hcci.COMPOSITE_SHIFT) | h_keys
         return composite
 
@@ -122,52 +136,47 @@ class LearnedSFC:
 
 def setup_learned_column(conn, learned: LearnedSFC, metadata=None):
     """Create learned_composite_key column, train CDFs, populate keys, build index."""
-    from psycopg2.extras import execute_values
-
     # Add column
     with conn.cursor() as cur:
         cur.execute(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS learned_composite_key BIGINT")
     conn.commit()
 
     # Get slides
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        slides = [r[0] for r in cur.fetchall()]
+    slides = schema.list_slide_ids(conn, TABLE)
 
     print(f"  Training CDFs and populating learned keys for {len(slides)} slides...")
     total_train_time = 0
     total_updated = 0
 
     for i, sid in enumerate(slides):
-        # Train CDF
-        train_t = learned.train(conn, sid)
-        total_train_time += train_t
-
-        # Read data
-        with conn.cursor() as cur:
-            cur.execute(
-                f"SELECT id, centroid_x, centroid_y, class_label FROM {TABLE} WHERE slide_id = %s",
-                (sid,)
-            )
-            rows = cur.fetchall()
+        # Read the slide once; the same arrays train the CDF and feed
+        # the key computation instead of a second fetch per slide
+        t0 = time.time()
+        recs = fetch_structured(
+            conn,
+            f"SELECT id, centroid_x, centroid_y, class_label FROM {TABLE} WHERE slide_id = %s",
+            (sid,), OBJECT_ROW_DTYPE,
+        )
 
-        if not rows:
+        if len(recs) == 0:
             continue
 
-        ids = np.array([r[0] for r in rows], dtype=np.int64)
-        xs = np.array([float(r[1]) for r in rows], dtype=np.float64)
-        ys = np.array([float(r[2]) for r in rows], dtype=np.float64)
-        classes = [r[3] for r in rows]
+        ids = recs["id"]
+        xs = recs["x"]
+        ys = recs["y"]
+        classes = recs["class_label"]
+
+        # Train CDF (fetch time is counted as training, as in train())
+        total_train_time += learned.fit(sid, xs, ys, t0)
 
         # Compute learned composite keys
         composite = learned.encode(sid, xs, ys, classes)
 
         # Batch update
-        values = [(int(ck), int(oid)) for ck, oid in zip(composite, ids)]
         with conn.cursor() as cur:
             cur.execute("CREATE TEMP TABLE IF NOT EXISTS _learned_tmp (ck BIGINT, oid BIGINT)")
             cur.execute("TRUNCATE _learned_tmp")
-            execute_values(cur, "INSERT INTO _learned_tmp (ck, oid) VALUES %s", values, page_size=10000)
+            hcci.copy_key_pairs(cur, "_learned_tmp", composite, ids)
             cur.execute(f"""
                 UPDATE {TABLE} t
                 SET learned_composite_key = z.ck
@@ -427,14 +436,11 @@ def main():
             metadata = json.load(f)
 
     # Get slides
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        slides = [r[0] for r in cur.fetchall()]
+    slides = schema.list_slide_ids(conn, TABLE)
     print(f"  Found {len(slides)} slides")
 
     # Pre-cache dims
-    for sid in slides:
-        get_dims(conn, sid, metadata)
+    prefetch_dims(conn, TABLE, slides, _dims_cache, metadata)
 
     learned = LearnedSFC(p=config.HILBERT_ORDER, n_bins=1024)
 
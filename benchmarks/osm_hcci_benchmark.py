@@ -145,6 +145,22 @@ def select_query_types(categories: list[dict]) -> dict[str, dict]:
 # Benchmark runner
 # ---------------------------------------------------------------------------
 
+def _viewport_origins(rng, n: int, bounds: dict, side: float) -> np.ndarray:
+    """Lower-left corners of n square-fraction viewports, shape (n, 2).
+
+    One random_sample draw is mapped affinely onto the box of feasible
+    origins, instead of two rng.uniform calls per trial; the values match
+    the per-trial x-then-y draws exactly.
+    """
+    width, height = bounds["width"], bounds["height"]
+    span = np.array([
+        max(0.0001, width - width * side),
+        max(0.0001, height - height * side),
+    ])
+    origin = np.array([bounds["x_min"], bounds["y_min"]])
+    return origin + rng.random_sample((n, 2)) * span
+
+
 def run_query_type(
     conn,
     query_id: str,
@@ -174,11 +190,11 @@ def run_query_type(
     lats_gist = []
     lats_bbox = []
 
-    for trial in range(n_trials):
-        vw = width * float(np.sqrt(viewport_frac))
-        vh = height * float(np.sqrt(viewport_frac))
-        x0 = float(x_min + rng.uniform(0, max(0.0001, width - vw)))
-        y0 = float(y_min + rng.uniform(0, max(0.0001, height - vh)))
+    side = float(np.sqrt(viewport_frac))
+    vw = width * side
+    vh = height * side
+    origins = _viewport_origins(rng, n_trials, bounds, side)
+    for trial, (x0, y0) in enumerate(origins.tolist()):
         x1 = float(x0 + vw)
         y1 = float(y0 + vh)
 
@@ -289,11 +305,10 @@ def run_fp_measurement(conn, meta: dict, n_trials: int = 50) -> dict:
     fp_rates = []
     theoretical = hcci.false_positive_rate(0.05, config.HILBERT_ORDER)
 
-    for _ in range(n_trials):
-        vw = width * float(np.sqrt(0.05))
-        vh = height * float(np.sqrt(0.05))
-        x0 = float(x_min + rng.uniform(0, max(0.0001, width - vw)))
-        y0 = float(y_min + rng.uniform(0, max(0.0001, height - vh)))
+    side = float(np.sqrt(0.05))
+    vw = width * side
+    vh = height * side
+    for x0, y0 in _viewport_origins(rng, n_trials, bounds, side).tolist():
 
         result = hcci.measure_false_positive_rate(
             conn, TABLE, DATASET_ID, [test_cat],
@@ -340,11 +355,10 @@ def run_io_decomposition(conn, query_id: str, qt: dict, meta: dict,
     hcci_buffers = []
     gist_buffers = []
 
-    for _ in range(n_trials):
-        vw = width * float(np.sqrt(viewport_frac))
-        vh = height * float(np.sqrt(viewport_frac))
-        x0 = float(x_min + rng.uniform(0, max(0.0001, width - vw)))
-        y0 = float(y_min + rng.uniform(0, max(0.0001, height - vh)))
+    side = float(np.sqrt(viewport_frac))
+    vw = width * side
+    vh = height * side
+    for x0, y0 in _viewport_origins(rng, n_trials, bounds, side).tolist():
         x1 = float(x0 + vw)
         y1 = float(y0 + vh)
 
@@ -15,7 +15,6 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import io
 import json
 import math
 import os
@@ -28,6 +27,37 @@ import numpy as np
 import psycopg2
 
 from spdb import config, hilbert, hcci
+from benchmarks.framework import COPY_READ_SIZE, CopyLineStream
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _json_loads(raw: bytes):
+    """Decode a JSON document from raw bytes, via orjson when installed."""
+    return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+
+
+def _json_dumps(obj) -> bytes:
+    """Encode obj as compact JSON bytes, via orjson when installed."""
+    return orjson.dumps(obj) if HAS_ORJSON else json.dumps(obj).encode()
+
+
+def _write_json_array(f, records, batch: int = 50_000):
+    """Write records to binary file f as one JSON array, a batch at a time.
+
+    Only one encoded batch is held at once rather than the whole document.
+    """
+    f.write(b"[")
+    for start in range(0, len(records), batch):
+        if start:
+            f.write(b",")
+        f.write(_json_dumps(records[start:start + batch])[1:-1])
+    f.write(b"]")
+
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -36,6 +66,7 @@ from spdb import config, hilbert, hcci
 TABLE = "osm_pois"
 INDEX_NAME = "idx_osm_hcci_covering"
 DATASET_ID = "nyc"
+FETCH_SIZE = 50_000  # rows per server-side cursor round trip
 
 # NYC bounding box (WGS84)
 NYC_BBOX = {
@@ -81,7 +112,7 @@ def _overpass_query(tag_key: str, element_type: str) -> list[dict]:
     for attempt in range(3):
         try:
             with urllib.request.urlopen(req, timeout=600) as resp:
-                result = json.loads(resp.read().decode())
+                result = _json_loads(resp.read())
             elements = result.get("elements", [])
             print(f"      -> {len(elements):,} elements")
             return elements
@@ -92,6 +123,22 @@ def _overpass_query(tag_key: str, element_type: str) -> list[dict]:
     return []
 
 
+def _element_lonlat(elem_type: str):
+    """(lon, lat) getter for Overpass elements of *elem_type*.
+
+    Ways carry their position in a "center" object, nodes inline.  Resolving
+    this once per tag query keeps the type branch out of the element loop.
+    """
+    if elem_type == "way":
+        def get(el):
+            center = el.get("center")
+            return (center.get("lon"), center.get("lat")) if center else (None, None)
+    else:
+        def get(el):
+            return el.get("lon"), el.get("lat")
+    return get
+
+
 def download_osm_pois() -> list[dict]:
     """Download all POIs from Overpass API and normalize to records."""
     print("\n[Download] Fetching NYC POIs from Overpass API...")
@@ -103,6 +150,7 @@ def download_osm_pois() -> list[dict]:
     for tag_key, elem_type in TAG_QUERIES:
         elements = _overpass_query(tag_key, elem_type)
         time.sleep(2)  # Rate limit courtesy
+        lonlat = _element_lonlat(elem_type)
 
         for el in elements:
             osm_id = el.get("id")
@@ -111,15 +159,7 @@ def download_osm_pois() -> list[dict]:
             seen_ids.add(osm_id)
 
             tags = el.get("tags", {})
-
-            # Get coordinates
-            if elem_type == "way":
-                center = el.get("center", {})
-                lat = center.get("lat")
-                lon = center.get("lon")
-            else:
-                lat = el.get("lat")
-                lon = el.get("lon")
+            lon, lat = lonlat(el)
 
             if lat is None or lon is None:
                 continue
@@ -143,18 +183,31 @@ def download_osm_pois() -> list[dict]:
     return all_records
 
 
+# Cache paths with these extensions hold one JSON record per line
+_JSONL_EXTS = (".jsonl", ".ndjson", ".geojsonl")
+
+
 def save_pois_json(records: list[dict], path: str):
-    """Save POIs to JSON for caching."""
+    """Save POIs to JSON (or JSON Lines, by extension) for caching."""
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(records, f)
+    with open(path, "wb") as f:
+        if path.endswith(_JSONL_EXTS):
+            f.writelines(_json_dumps(r) + b"\n" for r in records)
+        else:
+            _write_json_array(f, records)
     print(f"  Saved to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
 
 
 def load_pois_json(path: str) -> list[dict]:
-    """Load cached POIs from JSON."""
-    with open(path) as f:
-        return json.load(f)
+    """Load cached POIs from JSON or JSON Lines.
+
+    JSON Lines is decoded one record at a time, so there is never a second
+    copy of the whole file in memory alongside the parsed records.
+    """
+    with open(path, "rb") as f:
+        if path.endswith(_JSONL_EXTS):
+            return [_json_loads(line) for line in f if line.strip()]
+        return _json_loads(f.read())
 
 
 # ---------------------------------------------------------------------------
@@ -190,18 +243,18 @@ def load_data(conn, records: list[dict]):
     print(f"\n[Load] Inserting {len(records):,} records...")
     t0 = time.time()
 
-    buf = io.StringIO()
-    for r in records:
-        # Escape name for COPY (tab-separated)
-        name = r["name"].replace("\t", " ").replace("\n", " ").replace("\\", "\\\\")
-        buf.write(f"{r['osm_id']}\t{DATASET_ID}\t{r['lon']}\t{r['lat']}\t{r['category']}\t{name}\n")
+    def _lines():
+        for r in records:
+            # Escape name for COPY (tab-separated)
+            name = r["name"].replace("\t", " ").replace("\n", " ").replace("\\", "\\\\")
+            yield f"{r['osm_id']}\t{DATASET_ID}\t{r['lon']}\t{r['lat']}\t{r['category']}\t{name}\n"
 
-    buf.seek(0)
+    buf = CopyLineStream(_lines())
     with conn.cursor() as cur:
         cur.copy_from(buf, TABLE,
                        columns=("osm_id", "dataset_id", "centroid_x", "centroid_y",
                                 "class_label", "name"),
-                       sep="\t")
+                       sep="\t", size=COPY_READ_SIZE)
     conn.commit()
     elapsed = time.time() - t0
     print(f"  Loaded in {elapsed:.1f}s ({len(records) / elapsed:,.0f} rows/s)")
@@ -225,15 +278,29 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
     print(f"\n[Hilbert] Computing Hilbert keys (order={hilbert_order})...")
     t0 = time.time()
 
-    # Get coordinate bounds
-    with conn.cursor() as cur:
-        cur.execute(f"""
-            SELECT MIN(centroid_x), MAX(centroid_x),
-                   MIN(centroid_y), MAX(centroid_y),
-                   COUNT(*)
-            FROM {TABLE}
-        """)
-        x_min, x_max, y_min, y_max, count = cur.fetchone()
+    # Fetch all coordinates through a server-side cursor, decoding each
+    # batch straight into a typed array instead of materializing every row
+    coord_dtype = np.dtype([("id", np.int64), ("x", np.float64), ("y", np.float64)])
+    parts = []
+    with conn.cursor(name="osm_hilbert_coords") as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(f"SELECT id, centroid_x, centroid_y FROM {TABLE} ORDER BY id")
+        while True:
+            rows = cur.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            parts.append(np.array(rows, dtype=coord_dtype))
+    coords = np.concatenate(parts) if parts else np.empty(0, dtype=coord_dtype)
+
+    ids = coords["id"]
+    xs = coords["x"]
+    ys = coords["y"]
+
+    # Bounds come from the fetched arrays rather than a separate
+    # MIN/MAX/COUNT scan of the table
+    count = len(coords)
+    x_min, x_max = float(xs.min()), float(xs.max())
+    y_min, y_max = float(ys.min()), float(ys.max())
 
     print(f"  Bounds: x=[{x_min:.4f}, {x_max:.4f}], y=[{y_min:.4f}, {y_max:.4f}]")
     print(f"  Rows: {count:,}")
@@ -248,15 +315,6 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
     width = x_max - x_min
     height = y_max - y_min
 
-    # Fetch all coordinates
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT id, centroid_x, centroid_y FROM {TABLE} ORDER BY id")
-        rows = cur.fetchall()
-
-    ids = np.array([r[0] for r in rows], dtype=np.int64)
-    xs = np.array([r[1] for r in rows], dtype=np.float64)
-    ys = np.array([r[2] for r in rows], dtype=np.float64)
-
     # Normalize to grid
     n = 1 << hilbert_order
     gx = np.clip(((xs - x_min) * n / width).astype(np.int64), 0, n - 1)
@@ -267,14 +325,9 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
 
     # Batch update
     print("  Updating hilbert_key column...")
-    buf = io.StringIO()
-    for i in range(len(ids)):
-        buf.write(f"{ids[i]}\t{int(h_keys[i])}\n")
-    buf.seek(0)
-
     with conn.cursor() as cur:
         cur.execute(f"CREATE TEMP TABLE _hk (id BIGINT, hk BIGINT)")
-        cur.copy_from(buf, "_hk", columns=("id", "hk"), sep="\t")
+        hcci.copy_key_pairs(cur, "_hk", h_keys, ids, columns=("hk", "id"))
         cur.execute(f"UPDATE {TABLE} t SET hilbert_key = h.hk FROM _hk h WHERE t.id = h.id")
         cur.execute("DROP TABLE _hk")
     conn.commit()
@@ -463,7 +516,7 @@ def main():
     parser.add_argument("--stats-only", action="store_true",
                         help="Just print category stats")
     parser.add_argument("--cache", type=str, default="results/raw/osm_pois_cache.json",
-                        help="Path to cache downloaded POIs")
+                        help="Path to cache downloaded POIs (.jsonl for one record per line)")
     args = parser.parse_args()
 
     print("=" * 60)
@@ -23,7 +23,6 @@ def _ensure_packages():
     required = {
         "psycopg2": "psycopg2-binary",
         "requests": "requests",
-        "shapely":  "shapely",
     }
     for import_name, pip_name in required.items():
         try:
@@ -49,14 +48,31 @@ import statistics
 import struct
 import time
 import traceback
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import psycopg2
 import psycopg2.extras
 import requests
-from shapely.geometry import Point
+import urllib3
+
+# Optional: incremental JSON parsing of large Overpass responses
+try:
+    import ijson
+    HAS_IJSON = True
+    _JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:
+    HAS_IJSON = False
+    _JSON_ERRORS = (json.JSONDecodeError,)
+
+# Optional: JIT for the per-row Hilbert loop
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # ---------------------------------------------------------------------------
 # 2.  Constants & configuration
@@ -131,18 +147,12 @@ CITIES: List[Dict[str, Any]] = [
 # 4.  Hilbert curve helpers  (xy2d, d2xy for order-N curve)
 # ---------------------------------------------------------------------------
 
-def _rot(n: int, x: int, y: int, rx: int, ry: int) -> Tuple[int, int]:
-    """Rotate/flip a quadrant."""
-    if ry == 0:
-        if rx == 1:
-            x = n - 1 - x
-            y = n - 1 - y
-        x, y = y, x
-    return x, y
-
-
 def xy2d(order: int, x: int, y: int) -> int:
-    """Convert (x, y) in [0, 2^order) to Hilbert distance d."""
+    """Convert (x, y) in [0, 2^order) to Hilbert distance d.
+
+    Called once per building with only a few integer ops per level, so with
+    numba installed it is compiled and the interpreter overhead goes away.
+    """
     n = 1 << order
     d = 0
     s = n >> 1
@@ -150,11 +160,20 @@ def xy2d(order: int, x: int, y: int) -> int:
         rx = 1 if (x & s) > 0 else 0
         ry = 1 if (y & s) > 0 else 0
         d += s * s * ((3 * rx) ^ ry)
-        x, y = _rot(s, x, y, rx, ry)
+        # Rotate/flip the quadrant
+        if ry == 0:
+            if rx == 1:
+                x = s - 1 - x
+                y = s - 1 - y
+            x, y = y, x
         s >>= 1
     return d
 
 
+if HAS_NUMBA:
+    xy2d = njit(cache=True)(xy2d)
+
+
 def lonlat_to_hilbert(lon: float, lat: float, order: int = HILBERT_ORDER) -> int:
     """Map WGS-84 (lon, lat) → Hilbert key in [0, 4^order)."""
     n = 1 << order
@@ -230,8 +249,13 @@ out center;
 """
 
 
-def _fetch_overpass(query: str, max_retries: int = 5) -> dict:
-    """Send query to Overpass with round-robin servers and exponential backoff."""
+def _fetch_overpass(query: str, max_retries: int = 5) -> List[Tuple[float, float]]:
+    """Send query to Overpass with round-robin servers and exponential backoff.
+
+    Returns the building centroids.  With ijson installed the response is
+    parsed element by element as it streams in, so a tile's full JSON tree
+    is never held in memory; a failure mid-stream is retried like any other.
+    """
     servers = list(OVERPASS_SERVERS)
     random.shuffle(servers)
 
@@ -245,23 +269,32 @@ def _fetch_overpass(query: str, max_retries: int = 5) -> dict:
                 data={"data": query},
                 timeout=960,
                 headers={"User-Agent": "SpatialPathDB-Benchmark/1.0"},
+                stream=True,
             )
-            if resp.status_code == 429 or resp.status_code == 504:
-                print(f"    [overpass] HTTP {resp.status_code} – backing off {wait}s")
-                time.sleep(wait)
-                continue
-            resp.raise_for_status()
-            return resp.json()
-        except (requests.RequestException, json.JSONDecodeError) as exc:
+            with resp:
+                if resp.status_code == 429 or resp.status_code == 504:
+                    print(f"    [overpass] HTTP {resp.status_code} – backing off {wait}s")
+                    time.sleep(wait)
+                    continue
+                resp.raise_for_status()
+                if HAS_IJSON:
+                    resp.raw.decode_content = True
+                    elements = ijson.items(resp.raw, "elements.item", use_float=True)
+                else:
+                    elements = resp.json().get("elements", [])
+                return _extract_centroids(elements)
+        # ijson reads resp.raw directly, so a reset or read timeout mid-stream
+        # surfaces as a urllib3 error rather than a requests one.
+        except (requests.RequestException, urllib3.exceptions.HTTPError) + _JSON_ERRORS as exc:
             print(f"    [overpass] error: {exc} – backing off {wait}s")
             time.sleep(wait)
     raise RuntimeError(f"Overpass query failed after {max_retries} retries")
 
 
-def _extract_centroids(data: dict) -> List[Tuple[float, float]]:
-    """Extract (lon, lat) centroids from Overpass JSON response."""
+def _extract_centroids(elements) -> List[Tuple[float, float]]:
+    """Extract (lon, lat) centroids from Overpass JSON elements."""
     centroids = []
-    for el in data.get("elements", []):
+    for el in elements:
         if "center" in el:
             centroids.append((el["center"]["lon"], el["center"]["lat"]))
         elif "lat" in el and "lon" in el:
@@ -291,8 +324,7 @@ def download_city(city: Dict[str, Any]) -> List[Tuple[float, float]]:
 
         try:
             query = _overpass_query_buildings(ts, tw, tn, te)
-            data = _fetch_overpass(query)
-            centroids = _extract_centroids(data)
+            centroids = _fetch_overpass(query)
 
             # Cache
             with open(cp, "w") as f:
@@ -494,53 +526,124 @@ def index_spdb_partitioned(conn):
 # 8.  Data loading
 # ---------------------------------------------------------------------------
 
-BATCH_SIZE = 50_000  # rows per COPY batch
 
+# Little-endian EWKB point header: byte order, type (Point | SRID flag), SRID.
+# It is identical for every row, so it is hex-encoded once and only the
+# coordinate pair is packed per point.
+_EWKB_POINT_4326_HEADER_HEX = struct.pack("<BII", 1, 0x20000001, 4326).hex()
+_EWKB_XY = struct.Struct("<dd")
 
-def _generate_rows(city_buildings: Dict[int, List[Tuple[float, float]]]):
-    """Yield (city_id, lon, lat, hilbert_key, wkt) tuples."""
-    for city_id, centroids in city_buildings.items():
-        for lon, lat in centroids:
-            hk = lonlat_to_hilbert(lon, lat)
-            wkt = f"SRID=4326;POINT({lon} {lat})"
-            yield (city_id, lon, lat, hk, wkt)
 
+def _ewkb_point_hex(lon: float, lat: float) -> str:
+    """Hex EWKB for an SRID 4326 point; PostGIS accepts it as geometry input
+    without the WKT parse and keeps full double precision."""
+    return _EWKB_POINT_4326_HEADER_HEX + _EWKB_XY.pack(lon, lat).hex()
 
-def load_table(conn, table_name: str, city_buildings: Dict[int, List[Tuple[float, float]]]):
-    """Bulk-load rows into *table_name* using COPY."""
-    from io import StringIO
 
+# Bytes per read() the streamed COPY pulls (psycopg2 defaults to 8 KiB).
+COPY_READ_SIZE = 1 << 16
+
+# Below this many rows the process pool's start-up and pickling cost more
+# than encoding the rows in-process.
+PARALLEL_ENCODE_MIN_ROWS = 200_000
+
+
+def _encode_city(item: Tuple[int, List[Tuple[float, float]]]) -> List[str]:
+    """COPY text lines (city_id, lon, lat, hilbert_key, ewkb_hex) for one city.
+
+    Module-level so it can run in a worker process.
+    """
+    city_id, centroids = item
+    return [
+        f"{city_id}\t{lon}\t{lat}\t{lonlat_to_hilbert(lon, lat)}\t"
+        f"{_ewkb_point_hex(lon, lat)}\n"
+        for lon, lat in centroids
+    ]
+
+
+class _LineReader:
+    """Minimal read()/readline() file object over an iterator of text lines,
+    so one COPY can consume rows as they are generated."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._pending = ""
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            out, self._pending = self._pending + "".join(self._lines), ""
+            return out
+        parts, have = [self._pending], len(self._pending)
+        for line in self._lines:
+            parts.append(line)
+            have += len(line)
+            if have >= size:
+                break
+        data = "".join(parts)
+        self._pending = data[size:]
+        return data[:size]
+
+    def readline(self, size=-1):
+        if self._pending:
+            cut = self._pending.find("\n") + 1 or len(self._pending)
+            line, self._pending = self._pending[:cut], self._pending[cut:]
+            return line
+        return next(self._lines, "")
+
+
+def _bounded_map(pool, fn, items, depth: int):
+    """Ordered pool.map that keeps at most *depth* results in flight.
+
+    Executor.map submits every item at once, so finished results would pile
+    up in the parent while the consumer drains them in order.
+    """
+    it = iter(items)
+    pending = deque(pool.submit(fn, x) for _, x in zip(range(depth), it))
+    while pending:
+        result = pending.popleft().result()
+        for x in it:
+            pending.append(pool.submit(fn, x))
+            break
+        yield result
+
+
+def load_table(conn, table_name: str, city_buildings: Dict[int, List[Tuple[float, float]]]):
+    """Bulk-load rows into *table_name* with a single streamed COPY."""
     total = sum(len(v) for v in city_buildings.values())
     print(f"[load] inserting {total:,} rows into {table_name} …")
 
     loaded = 0
-    buf = StringIO()
-    for city_id, lon, lat, hk, wkt in _generate_rows(city_buildings):
-        buf.write(f"{city_id}\t{lon}\t{lat}\t{hk}\t{wkt}\n")
-        loaded += 1
-        if loaded % BATCH_SIZE == 0:
-            buf.seek(0)
-            with conn.cursor() as cur:
-                cur.copy_from(
-                    buf, table_name,
-                    columns=("city_id", "lon", "lat", "hilbert_key", "geom"),
-                    sep="\t",
-                )
-            conn.commit()
-            buf = StringIO()
-            if loaded % 500_000 == 0:
-                print(f"    {loaded:,} / {total:,} ({100*loaded/total:.1f}%)")
-
-    # Flush remainder
-    if buf.tell() > 0:
-        buf.seek(0)
+    items = list(city_buildings.items())
+
+    # Hilbert keys and EWKB are pure-Python per row, so cities are encoded in
+    # worker processes while the COPY streams the ones already finished;
+    # only about one city per worker is held encoded at a time.
+    pool = None
+    if total >= PARALLEL_ENCODE_MIN_ROWS and len(items) > 1:
+        workers = os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers)
+        batches = _bounded_map(pool, _encode_city, items, workers)
+    else:
+        batches = map(_encode_city, items)
+
+    def _lines():
+        nonlocal loaded
+        for lines in batches:
+            yield from lines
+            loaded += len(lines)
+            print(f"    {loaded:,} / {total:,} ({100*loaded/total:.1f}%)")
+
+    try:
         with conn.cursor() as cur:
             cur.copy_from(
-                buf, table_name,
+                _LineReader(_lines()), table_name,
                 columns=("city_id", "lon", "lat", "hilbert_key", "geom"),
-                sep="\t",
+                sep="\t", size=COPY_READ_SIZE,
             )
         conn.commit()
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
     print(f"[load] {loaded:,} rows loaded into {table_name}")
 
@@ -640,6 +743,22 @@ def _knn_sql(table: str, lon: float, lat: float, k: int, city_id: int,
             f"WHERE {where} ORDER BY {order} LIMIT {k};")
 
 
+def _latency_summary(times: List[float]) -> Dict[str, float]:
+    """Median/mean/p95/p99/min/max (ms) from a single sort of the samples."""
+    s = sorted(times)
+    n = len(s)
+    mid = n // 2
+    median = s[mid] if n % 2 else (s[mid - 1] + s[mid]) / 2
+    return {
+        "median_ms": round(median, 2),
+        "mean_ms": round(statistics.fmean(s), 2),
+        "p95_ms": round(s[int(0.95 * n)], 2),
+        "p99_ms": round(s[int(0.99 * n)], 2),
+        "min_ms": round(s[0], 2),
+        "max_ms": round(s[-1], 2),
+    }
+
+
 def run_viewport_benchmark(
     conn,
     table: str,
@@ -665,12 +784,7 @@ def run_viewport_benchmark(
         "label": label,
         "table": table,
         "query_count": len(queries),
-        "median_ms": round(statistics.median(times), 2),
-        "mean_ms": round(statistics.mean(times), 2),
-        "p95_ms": round(sorted(times)[int(0.95 * len(times))], 2),
-        "p99_ms": round(sorted(times)[int(0.99 * len(times))], 2),
-        "min_ms": round(min(times), 2),
-        "max_ms": round(max(times), 2),
+        **_latency_summary(times),
         "total_rows": sum(rows_returned),
         "avg_rows": round(statistics.mean(rows_returned), 1),
     }
@@ -700,12 +814,7 @@ def run_knn_benchmark(
         "table": table,
         "query_count": len(queries),
         "k": queries[0]["k"],
-        "median_ms": round(statistics.median(times), 2),
-        "mean_ms": round(statistics.mean(times), 2),
-        "p95_ms": round(sorted(times)[int(0.95 * len(times))], 2),
-        "p99_ms": round(sorted(times)[int(0.99 * len(times))], 2),
-        "min_ms": round(min(times), 2),
-        "max_ms": round(max(times), 2),
+        **_latency_summary(times),
     }
 
 
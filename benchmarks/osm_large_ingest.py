@@ -17,7 +17,6 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import io
 import json
 import math
 import os
@@ -31,6 +30,37 @@ import numpy as np
 import psycopg2
 
 from spdb import config, hilbert, hcci
+from benchmarks.framework import COPY_READ_SIZE, CopyLineStream
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _json_loads(raw: bytes):
+    """Decode a JSON document from raw bytes, via orjson when installed."""
+    return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+
+
+def _json_dumps(obj) -> bytes:
+    """Encode obj as compact JSON bytes, via orjson when installed."""
+    return orjson.dumps(obj) if HAS_ORJSON else json.dumps(obj).encode()
+
+
+def _write_json_array(f, records, batch: int = 50_000):
+    """Write records to binary file f as one JSON array, a batch at a time.
+
+    Only one encoded batch is held at once rather than the whole document.
+    """
+    f.write(b"[")
+    for start in range(0, len(records), batch):
+        if start:
+            f.write(b",")
+        f.write(_json_dumps(records[start:start + batch])[1:-1])
+    f.write(b"]")
+
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -115,7 +145,7 @@ def _query_overpass(tag_key: str, elem_type: str, bbox: tuple,
             req = urllib.request.Request(server, data=data)
             req.add_header("User-Agent", "SpatialPathDB-HCCI-Research/1.0")
             with urllib.request.urlopen(req, timeout=600) as resp:
-                result = json.loads(resp.read().decode())
+                result = _json_loads(resp.read())
             return result.get("elements", [])
         except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, Exception) as exc:
             if attempt < len(OVERPASS_SERVERS) - 1:
@@ -126,14 +156,46 @@ def _query_overpass(tag_key: str, elem_type: str, bbox: tuple,
     return []
 
 
-def download_metro(metro_name: str, bbox: tuple, server_idx: int = 0) -> list[dict]:
-    """Download all POI types for a single metro area."""
+def _element_lonlat(elem_type: str):
+    """(lon, lat) getter for Overpass elements of *elem_type*.
+
+    Ways carry their position in a "center" object, nodes inline.  Resolving
+    this once per tag query keeps the type branch out of the element loop.
+    """
+    if elem_type == "way":
+        def get(el):
+            center = el.get("center")
+            return (center.get("lon"), center.get("lat")) if center else (None, None)
+    else:
+        def get(el):
+            return el.get("lon"), el.get("lat")
+    return get
+
+
+# Field order of a POI record.  Records are plain tuples rather than dicts:
+# at 10M+ POIs the per-record dict (hash table plus six key slots) costs
+# several GB that a tuple does not.
+RECORD_FIELDS = ("osm_id", "lon", "lat", "category", "name", "metro")
+
+
+def _record_from_dict(r: dict) -> tuple:
+    """Convert a dict record from an older metro cache to a tuple."""
+    return (r["osm_id"], r["lon"], r["lat"], r.get("category", "unknown"),
+            r.get("name", ""), r.get("metro", "unknown"))
+
+
+def download_metro(metro_name: str, bbox: tuple, server_idx: int = 0) -> list[tuple]:
+    """Download all POI types for a single metro area.
+
+    Returns records as tuples in RECORD_FIELDS order; the metro cache stores
+    them as JSON arrays.
+    """
     cache_path = os.path.join(CACHE_DIR, f"{metro_name}.json")
     if os.path.exists(cache_path):
-        with open(cache_path) as f:
-            records = json.load(f)
+        with open(cache_path, "rb") as f:
+            records = _json_loads(f.read())
         print(f"  {metro_name}: {len(records):,} (cached)")
-        return [tuple(r) if isinstance(r, list) else r for r in records]
+        return [tuple(r) if isinstance(r, list) else _record_from_dict(r) for r in records]
 
     print(f"  {metro_name}: downloading...")
     all_records = []
@@ -142,6 +204,7 @@ def download_metro(metro_name: str, bbox: tuple, server_idx: int = 0) -> list[di
     for tag_key, elem_type in TAG_QUERIES:
         elements = _query_overpass(tag_key, elem_type, bbox, metro_name, server_idx)
         time.sleep(3)  # Rate limit courtesy
+        lonlat = _element_lonlat(elem_type)
 
         for el in elements:
             osm_id = el.get("id")
@@ -150,13 +213,7 @@ def download_metro(metro_name: str, bbox: tuple, server_idx: int = 0) -> list[di
             seen_ids.add(osm_id)
 
             tags = el.get("tags", {})
-            if elem_type == "way":
-                center = el.get("center", {})
-                lat = center.get("lat")
-                lon = center.get("lon")
-            else:
-                lat = el.get("lat")
-                lon = el.get("lon")
+            lon, lat = lonlat(el)
 
             if lat is None or lon is None:
                 continue
@@ -165,28 +222,23 @@ def download_metro(metro_name: str, bbox: tuple, server_idx: int = 0) -> list[di
             category = f"{tag_key}:{tag_val}"
             name = tags.get("name", "")
 
-            all_records.append({
-                "osm_id": osm_id,
-                "lon": float(lon),
-                "lat": float(lat),
-                "category": category,
-                "name": name,
-                "metro": metro_name,
-            })
+            all_records.append(
+                (osm_id, float(lon), float(lat), category, name, metro_name)
+            )
 
         count = sum(1 for _ in elements)
         print(f"    {tag_key}: {count:,}")
 
     # Cache to disk
     os.makedirs(CACHE_DIR, exist_ok=True)
-    with open(cache_path, "w") as f:
-        json.dump(all_records, f)
+    with open(cache_path, "wb") as f:
+        _write_json_array(f, all_records)
 
     print(f"    Total: {len(all_records):,}")
     return all_records
 
 
-def download_all_metros(metro_list: dict) -> list[dict]:
+def download_all_metros(metro_list: dict) -> list[tuple]:
     """Download POIs from all metro areas."""
     print(f"\n[Download] Fetching POIs from {len(metro_list)} metro areas...")
     t0 = time.time()
@@ -235,8 +287,8 @@ def create_table(conn):
     print("  Table created")
 
 
-def load_data(conn, records: list[dict]):
-    """Bulk load records into PostgreSQL using COPY."""
+def load_data(conn, records: list[tuple]):
+    """Bulk load RECORD_FIELDS tuples into PostgreSQL using COPY."""
     print(f"\n[Load] Inserting {len(records):,} records via COPY...")
     t0 = time.time()
 
@@ -246,23 +298,21 @@ def load_data(conn, records: list[dict]):
             return ""
         return s.replace("\\", "").replace("\t", " ").replace("\n", " ").replace("\r", " ")
 
-    buf = io.StringIO()
-    for r in records:
-        name = _sanitize(r.get("name", ""))
-        metro = _sanitize(r.get("metro", "unknown"))
-        category = _sanitize(r.get("category", "unknown"))
-        buf.write(
-            f"{r['osm_id']}\t{DATASET_ID}\t{metro}\t"
-            f"{r['lon']}\t{r['lat']}\t{category}\t{name}\n"
-        )
+    def _lines():
+        for osm_id, lon, lat, category, name, metro in records:
+            yield (
+                f"{osm_id}\t{DATASET_ID}\t{_sanitize(metro)}\t"
+                f"{lon}\t{lat}\t{_sanitize(category)}\t{_sanitize(name)}\n"
+            )
 
-    buf.seek(0)
+    buf = CopyLineStream(_lines())
     with conn.cursor() as cur:
         cur.copy_from(
             buf, TABLE,
             columns=("osm_id", "dataset_id", "metro", "centroid_x", "centroid_y",
                      "class_label", "name"),
             sep="\t",
+            size=COPY_READ_SIZE,
         )
     conn.commit()
     elapsed = time.time() - t0
@@ -292,10 +342,10 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
         cur.execute(f"""
             SELECT MIN(centroid_x), MAX(centroid_x),
                    MIN(centroid_y), MAX(centroid_y),
-                   COUNT(*)
+                   COUNT(*), MIN(id), MAX(id)
             FROM {TABLE}
         """)
-        x_min, x_max, y_min, y_max, count = cur.fetchone()
+        x_min, x_max, y_min, y_max, count, id_min, id_max = cur.fetchone()
 
     print(f"  Bounds: lon=[{x_min:.4f}, {x_max:.4f}], lat=[{y_min:.4f}, {y_max:.4f}]")
     print(f"  Rows: {count:,}")
@@ -312,10 +362,6 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
     CHUNK_SIZE = 2_000_000
     n_grid = 1 << hilbert_order
 
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT MIN(id), MAX(id) FROM {TABLE}")
-        id_min, id_max = cur.fetchone()
-
     print(f"  Processing in chunks of {CHUNK_SIZE:,}...")
     total_updated = 0
 
@@ -344,13 +390,8 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
         gy = np.clip(((ys - y_min) * n_grid / height).astype(np.int64), 0, n_grid - 1)
         h_keys = hilbert.encode_batch(gx, gy, hilbert_order)
 
-        buf = io.StringIO()
-        for i in range(len(ids)):
-            buf.write(f"{ids[i]}\t{int(h_keys[i])}\n")
-        buf.seek(0)
-
         with conn.cursor() as cur:
-            cur.copy_from(buf, "_hk", columns=("id", "hk"), sep="\t")
+            hcci.copy_key_pairs(cur, "_hk", h_keys, ids, columns=("hk", "id"))
 
         total_updated += len(ids)
         pct = total_updated / count * 100 if count else 0
@@ -466,20 +507,19 @@ def verify(conn, class_enum: dict[str, int]):
     """Verify setup."""
     print(f"\n[Verify] Checking setup...")
     with conn.cursor() as cur:
-        # Total count
-        cur.execute(f"SELECT COUNT(*) FROM {TABLE}")
-        total = cur.fetchone()[0]
-        print(f"  Total rows: {total:,}")
-
-        # Per-metro counts
+        # Per-metro counts; their sum is the total, so no separate COUNT(*)
         cur.execute(f"""
             SELECT metro, COUNT(*) as cnt
             FROM {TABLE}
             GROUP BY metro
             ORDER BY cnt DESC
         """)
+        metro_counts = cur.fetchall()
+        total = sum(cnt for _, cnt in metro_counts)
+        print(f"  Total rows: {total:,}")
+
         print("\n  Per-metro counts:")
-        for metro, cnt in cur.fetchall():
+        for metro, cnt in metro_counts:
             print(f"    {metro:<20} {cnt:>10,}")
 
         # Top 15 categories
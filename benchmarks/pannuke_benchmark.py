@@ -35,6 +35,7 @@ import statistics
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import StringIO
 from pathlib import Path
 from typing import Any
@@ -108,6 +109,20 @@ def xy2d(n: int, x: int, y: int) -> int:
     return d
 
 
+# Every order-8 cell's key, indexed by gx * HILBERT_N + gy.  Filled once so
+# per-row key computation is a list lookup instead of the bit loop above.
+_HILBERT_LUT: list[int] = []
+
+
+def _hilbert_lut() -> list[int]:
+    if not _HILBERT_LUT:
+        _HILBERT_LUT.extend(
+            xy2d(HILBERT_N, gx, gy)
+            for gx in range(HILBERT_N) for gy in range(HILBERT_N)
+        )
+    return _HILBERT_LUT
+
+
 def compute_hilbert_key(cx: float, cy: float,
                         xmin: float, xmax: float,
                         ymin: float, ymax: float) -> int:
@@ -118,7 +133,7 @@ def compute_hilbert_key(cx: float, cy: float,
     gy = int((cy - ymin) / span_y * (HILBERT_N - 1))
     gx = max(0, min(HILBERT_N - 1, gx))
     gy = max(0, min(HILBERT_N - 1, gy))
-    return xy2d(HILBERT_N, gx, gy)
+    return _hilbert_lut()[gx * HILBERT_N + gy]
 
 
 def hilbert_range_for_bbox(x0: float, y0: float, x1: float, y1: float,
@@ -155,12 +170,18 @@ def get_conn():
 # ---------------------------------------------------------------------------
 
 def load_csv(path: str) -> list[dict]:
-    """Load the PanNuke CSV into a list of dicts."""
+    """Load the PanNuke CSV into a list of dicts.
+
+    Centroids are parsed to float here, once, so the extent pass and the
+    COPY builder read them directly instead of each re-parsing the text.
+    """
     print(f"[data] Reading {path} ...")
     rows = []
     with open(path, newline="") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            row["centroid_x"] = float(row["centroid_x"])
+            row["centroid_y"] = float(row["centroid_y"])
             rows.append(row)
     print(f"[data] Loaded {len(rows):,} nuclei")
     return rows
@@ -175,8 +196,8 @@ def compute_extents(rows: list[dict]) -> dict[str, tuple]:
     tissue_coords: dict[str, list] = {}
     for r in rows:
         tt = r["tissue_type"]
-        cx = float(r["centroid_x"])
-        cy = float(r["centroid_y"])
+        cx = r["centroid_x"]
+        cy = r["centroid_y"]
         if tt not in tissue_coords:
             tissue_coords[tt] = [cx, cx, cy, cy]
         else:
@@ -321,8 +342,8 @@ def ingest_data(conn, rows: list[dict], extents: dict):
         ext = extents.get(tt, extents["global"])
         xmin, xmax, ymin, ymax = ext
         for r in tt_rows:
-            cx = float(r["centroid_x"])
-            cy = float(r["centroid_y"])
+            cx = r["centroid_x"]
+            cy = r["centroid_y"]
             hk = compute_hilbert_key(cx, cy, xmin, xmax, ymin, ymax)
             tsv_lines.append(
                 f"{r['image_id']}\t{tt}\t{r['nucleus_id']}\t{r['category']}\t"
@@ -377,40 +398,59 @@ def ingest_data(conn, rows: list[dict], extents: dict):
     return len(tsv_lines)
 
 
+def _build_index_phase(statements: list[str]) -> None:
+    """Run one table family's CREATE INDEX statements on a fresh connection."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            for stmt in statements:
+                cur.execute(stmt)
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def create_indexes(conn, tissue_types: list[str]):
-    """Create GiST indexes on all tables."""
+    """Create GiST indexes on all tables.
+
+    The mono, SO and SPDB builds touch disjoint tables, so the three
+    phases run concurrently, each on its own connection (and backend).
+    The builds compete for CPU and I/O, so only the total wall time is
+    reported; per-family times would not be comparable.
+    """
     cur = conn.cursor()
     print("[index] Creating GiST indexes ...")
 
-    # Mono
-    t0 = time.perf_counter()
-    cur.execute(f"CREATE INDEX idx_{TABLE_MONO}_geom ON {TABLE_MONO} USING gist(geom)")
-    conn.commit()
-    print(f"  {TABLE_MONO}: {time.perf_counter()-t0:.1f}s")
-
-    # SO: per-partition
-    t0 = time.perf_counter()
-    for tt in tissue_types:
-        sn = safe_name(tt)
-        cur.execute(
-            f"CREATE INDEX idx_{TABLE_SO}_{sn}_geom "
-            f"ON {TABLE_SO}_{sn} USING gist(geom)"
-        )
-    conn.commit()
-    print(f"  {TABLE_SO}: {time.perf_counter()-t0:.1f}s ({len(tissue_types)} partitions)")
-
-    # SPDB: per-leaf-partition
-    t0 = time.perf_counter()
-    for tt in tissue_types:
-        sn = safe_name(tt)
-        for i in range(N_HILBERT_SUB):
-            cur.execute(
-                f"CREATE INDEX idx_{TABLE_SPDB}_{sn}_h{i}_geom "
-                f"ON {TABLE_SPDB}_{sn}_h{i} USING gist(geom)"
-            )
-    conn.commit()
+    names = [safe_name(tt) for tt in tissue_types]
     total_idx = len(tissue_types) * N_HILBERT_SUB
-    print(f"  {TABLE_SPDB}: {time.perf_counter()-t0:.1f}s ({total_idx} leaf partitions)")
+    phases = {
+        TABLE_MONO: (
+            [f"CREATE INDEX idx_{TABLE_MONO}_geom ON {TABLE_MONO} USING gist(geom)"],
+            "",
+        ),
+        # SO: per-partition
+        TABLE_SO: (
+            [f"CREATE INDEX idx_{TABLE_SO}_{sn}_geom "
+             f"ON {TABLE_SO}_{sn} USING gist(geom)" for sn in names],
+            f" ({len(tissue_types)} partitions)",
+        ),
+        # SPDB: per-leaf-partition
+        TABLE_SPDB: (
+            [f"CREATE INDEX idx_{TABLE_SPDB}_{sn}_h{i}_geom "
+             f"ON {TABLE_SPDB}_{sn}_h{i} USING gist(geom)"
+             for sn in names for i in range(N_HILBERT_SUB)],
+            f" ({total_idx} leaf partitions)",
+        ),
+    }
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(phases)) as ex:
+        futures = {ex.submit(_build_index_phase, stmts): table
+                   for table, (stmts, _) in phases.items()}
+        for fut in as_completed(futures):
+            table = futures[fut]
+            fut.result()
+            print(f"  {table}: done{phases[table][1]}")
+    print(f"  all families (concurrent build): {time.perf_counter() - t0:.1f}s wall")
 
     # ANALYZE all
     print("[index] Running ANALYZE ...")
@@ -424,19 +464,18 @@ def create_indexes(conn, tissue_types: list[str]):
 # Benchmark queries
 # ---------------------------------------------------------------------------
 
-def _get_tissue_extent(conn, table: str, tissue_type: str) -> tuple:
-    """Get the (xmin, xmax, ymin, ymax) extent for a tissue type."""
+def _tissue_summary(conn, table: str = TABLE_MONO) -> dict[str, tuple]:
+    """Per tissue type: (count, (xmin, xmax, ymin, ymax)) from one scan.
+
+    Replaces a count(*) plus one extent query per tissue type.
+    """
     with conn.cursor() as cur:
         cur.execute(
-            f"SELECT min(centroid_x), max(centroid_x), "
+            f"SELECT tissue_type, count(*), min(centroid_x), max(centroid_x), "
             f"min(centroid_y), max(centroid_y) "
-            f"FROM {TABLE_MONO} WHERE tissue_type = %s",
-            (tissue_type,),
+            f"FROM {table} GROUP BY tissue_type ORDER BY count(*) DESC"
         )
-        row = cur.fetchone()
-    if row is None or row[0] is None:
-        return (0, 1, 0, 1)
-    return row
+        return {tt: (cnt, tuple(ext)) for tt, cnt, *ext in cur.fetchall()}
 
 
 def _random_viewport(ext: tuple, frac: float) -> tuple:
@@ -578,20 +617,13 @@ def run_benchmarks(conn, tissue_types: list[str], extents: dict) -> dict[str, An
         results[f"{label}_rows"] = cnt
         print(f"  {label} ({table}): {cnt:,}")
 
-    # Pre-compute tissue extents from DB
-    tissue_extents: dict[str, tuple] = {}
-    for tt in tissue_types:
-        tissue_extents[tt] = _get_tissue_extent(conn, TABLE_MONO, tt)
-
-    # Tissue-type counts for reporting
-    tissue_counts: dict[str, int] = {}
-    with conn.cursor() as cur:
-        cur.execute(
-            f"SELECT tissue_type, count(*) FROM {TABLE_MONO} "
-            f"GROUP BY tissue_type ORDER BY count(*) DESC"
-        )
-        for tt, cnt in cur.fetchall():
-            tissue_counts[tt] = cnt
+    # Tissue extents (from DB) and counts for reporting, in one pass
+    summary = _tissue_summary(conn)
+    tissue_extents: dict[str, tuple] = {
+        tt: summary[tt][1] if tt in summary else (0, 1, 0, 1)
+        for tt in tissue_types
+    }
+    tissue_counts: dict[str, int] = {tt: cnt for tt, (cnt, _) in summary.items()}
     results["tissue_counts"] = tissue_counts
     print(f"\n[bench] Tissue types ({len(tissue_counts)}):")
     for tt, cnt in tissue_counts.items():
@@ -804,19 +836,13 @@ def main():
 
     else:
         print("\n[bench] Skipping ingestion (--bench flag).")
-        # Discover tissue types from existing data
-        with conn.cursor() as cur:
-            cur.execute(
-                f"SELECT DISTINCT tissue_type FROM {TABLE_MONO} ORDER BY tissue_type"
-            )
-            tissue_types = [r[0] for r in cur.fetchall()]
-            cur.execute(f"SELECT count(*) FROM {TABLE_MONO}")
-            n_rows = cur.fetchone()[0]
+        # Discover tissue types, row count and extents from existing data
+        summary = _tissue_summary(conn)
+        tissue_types = sorted(summary)
+        n_rows = sum(cnt for cnt, _ in summary.values())
         print(f"[bench] Found {len(tissue_types)} tissue types, {n_rows:,} rows")
 
-        extents = {}
-        for tt in tissue_types:
-            extents[tt] = _get_tissue_extent(conn, TABLE_MONO, tt)
+        extents = {tt: summary[tt][1] for tt in tissue_types}
         gx0 = min(e[0] for e in extents.values())
         gx1 = max(e[1] for e in extents.values())
         gy0 = min(e[2] for e in extents.values())
@@ -21,17 +21,15 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import json
-import os
 import time
 from typing import Any, Dict, List, Tuple
 
 import numpy as np
 import psycopg2
 
-from spdb import config, hcci
+from spdb import config, hcci, schema
 from benchmarks.framework import (
-    compute_stats, save_raw_latencies, save_results,
+    compute_stats, load_metadata, prefetch_dims, save_raw_latencies, save_results,
     time_query, time_query_buffers, parse_buffers,
     wilcoxon_ranksum, print_comparison,
 )
@@ -45,13 +43,6 @@ ALL_CLASSES = config.CLASS_LABELS  # ["Epithelial", "Stromal", "Tumor", "Lymphoc
 # Metadata helpers
 # ---------------------------------------------------------------------------
 
-def load_metadata() -> dict:
-    """Load ingestion metadata (slide_ids, object_counts, metas)."""
-    path = os.path.join(config.RESULTS_DIR, "ingest_metadata.json")
-    with open(path) as f:
-        return json.load(f)
-
-
 def get_slide_dimensions(metadata: dict, slide_id: str) -> Tuple[float, float]:
     """Return (width, height) for a slide from metadata."""
     m = metadata["metas"][slide_id]
@@ -87,9 +78,7 @@ def get_dims(conn, slide_id: str, metadata: dict = None) -> Tuple[float, float]:
 
 def get_all_slides(conn) -> List[str]:
     """Get all distinct slide_ids from the SO table."""
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        return [r[0] for r in cur.fetchall()]
+    return schema.list_slide_ids(conn, TABLE)
 
 
 # ---------------------------------------------------------------------------
@@ -145,19 +134,17 @@ def get_index_sizes(conn) -> Dict[str, str]:
     """Get sizes of partial GiST indexes, HCCI covering index, and standard GiST."""
     sizes = {}
     with conn.cursor() as cur:
-        # Partial GiST indexes
-        for cls in ALL_CLASSES:
-            idx_name = f"idx_gist_partial_{cls.lower()}"
-            try:
-                cur.execute(
-                    "SELECT pg_size_pretty(pg_relation_size(%s))",
-                    (idx_name,)
-                )
-                row = cur.fetchone()
-                if row:
-                    sizes[idx_name] = row[0]
-            except Exception:
-                conn.rollback()
+        # Partial GiST indexes: one catalogue lookup for all classes;
+        # indexes that don't exist simply have no pg_class row
+        partial_names = [f"idx_gist_partial_{cls.lower()}" for cls in ALL_CLASSES]
+        cur.execute("""
+            SELECT n.name, pg_size_pretty(pg_relation_size(c.oid))
+            FROM unnest(%s::text[]) WITH ORDINALITY AS n(name, ord)
+            JOIN pg_class c ON c.relname = n.name AND c.relkind = 'i'
+            ORDER BY n.ord
+        """, (partial_names,))
+        for idx_name, size in cur.fetchall():
+            sizes[idx_name] = size
 
         # HCCI covering index
         cur.execute("""
@@ -306,12 +293,13 @@ def run_benchmark(
     row_counts_partial: List[int] = []
     range_counts: List[int] = []
 
+    side = float(np.sqrt(viewport_frac))
     for trial in range(n_trials):
         sid = rng.choice(slides)
         w, h = get_dims(conn, sid, metadata)
 
-        vw = w * float(np.sqrt(viewport_frac))
-        vh = h * float(np.sqrt(viewport_frac))
+        vw = w * side
+        vh = h * side
         x0 = float(rng.uniform(0, max(1, w - vw)))
         y0 = float(rng.uniform(0, max(1, h - vh)))
         x1 = float(x0 + vw)
@@ -401,12 +389,13 @@ def run_benchmark(
     gist_heap_fetches: List[int] = []
     partial_heap_fetches: List[int] = []
 
+    side = float(np.sqrt(viewport_frac))
     for trial in range(io_trials):
         sid = io_rng.choice(slides)
         w, h = get_dims(conn, sid, metadata)
 
-        vw = w * float(np.sqrt(viewport_frac))
-        vh = h * float(np.sqrt(viewport_frac))
+        vw = w * side
+        vh = h * side
         x0 = float(io_rng.uniform(0, max(1, w - vw)))
         y0 = float(io_rng.uniform(0, max(1, h - vh)))
         x1 = float(x0 + vw)
@@ -624,8 +613,7 @@ def main():
 
     # Pre-cache dimensions
     print("  Pre-caching slide dimensions...")
-    for sid in slides:
-        get_dims(conn, sid, metadata)
+    prefetch_dims(conn, TABLE, slides, _slide_dims_cache, metadata)
 
     # Verify partial GiST indexes exist
     existing = check_partial_gist_indexes(conn)
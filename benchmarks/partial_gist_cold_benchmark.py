@@ -17,8 +17,6 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import json
-import os
 import re
 import subprocess
 import sys
@@ -28,9 +26,9 @@ from typing import Any, Dict, List, Tuple
 import numpy as np
 import psycopg2
 
-from spdb import config, hcci
+from spdb import config, hcci, schema
 from benchmarks.framework import (
-    compute_stats, save_results, wilcoxon_ranksum,
+    compute_stats, load_metadata, prefetch_dims, save_results, wilcoxon_ranksum,
 )
 
 TABLE = config.TABLE_SLIDE_ONLY
@@ -47,13 +45,6 @@ CONNECT_RETRY_DELAY = 2
 # Metadata helpers
 # ---------------------------------------------------------------------------
 
-def load_metadata() -> dict:
-    """Load ingestion metadata (slide_ids, object_counts, metas)."""
-    path = os.path.join(config.RESULTS_DIR, "ingest_metadata.json")
-    with open(path) as f:
-        return json.load(f)
-
-
 def get_slide_dimensions(metadata: dict, slide_id: str) -> Tuple[float, float]:
     """Return (width, height) for a slide from metadata."""
     m = metadata["metas"][slide_id]
@@ -92,9 +83,7 @@ def get_dims(conn, slide_id: str, metadata: dict = None) -> Tuple[float, float]:
 
 def get_all_slides(conn) -> List[str]:
     """Get all distinct slide_ids from the SO table."""
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        return [r[0] for r in cur.fetchall()]
+    return schema.list_slide_ids(conn, TABLE)
 
 
 # ---------------------------------------------------------------------------
@@ -315,8 +304,7 @@ def run_benchmark(
 
     # Pre-cache slide dimensions (need a connection for this)
     conn = connect_with_retry()
-    for sid in slides:
-        get_dims(conn, sid, metadata)
+    prefetch_dims(conn, TABLE, slides, _slide_dims_cache, metadata)
     conn.close()
 
     # Trial storage
@@ -546,8 +534,7 @@ def main():
         metadata = {}
 
     # Pre-cache dimensions
-    for sid in slides:
-        get_dims(conn, sid, metadata)
+    prefetch_dims(conn, TABLE, slides, _slide_dims_cache, metadata)
     conn.close()
 
     # Verify partial GiST index exists
@@ -26,19 +26,28 @@ from benchmarks.framework import (
 )
 
 
+_db_dims_cache = {}
+
+
+def _padded_dims(max_x, max_y):
+    if max_x and max_y:
+        return float(max_x) * 1.05, float(max_y) * 1.05  # 5% padding
+    return 100000.0, 100000.0
+
+
 def _get_slide_dims_from_db(conn, slide_id):
     """Fallback: compute slide dimensions from actual coordinate range."""
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT MAX(centroid_x), MAX(centroid_y)
-        FROM objects_slide_only
-        WHERE slide_id = %s
-    """, (slide_id,))
-    row = cur.fetchone()
-    cur.close()
-    if row and row[0] and row[1]:
-        return float(row[0]) * 1.05, float(row[1]) * 1.05  # 5% padding
-    return 100000.0, 100000.0
+    if slide_id not in _db_dims_cache:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT MAX(centroid_x), MAX(centroid_y)
+            FROM objects_slide_only
+            WHERE slide_id = %s
+        """, (slide_id,))
+        row = cur.fetchone()
+        cur.close()
+        _db_dims_cache[slide_id] = _padded_dims(*(row or (None, None)))
+    return _db_dims_cache[slide_id]
 
 
 def safe_get_slide_dimensions(conn, metadata, slide_id):
@@ -57,10 +66,14 @@ HILBERT_ORDER = config.HILBERT_ORDER
 
 
 def pick_representative_slides(conn):
-    """Select 3-4 representative slides by size: large, medium, small."""
+    """Select 3-4 representative slides by size: large, medium, small.
+
+    The same per-slide pass also yields the coordinate maxima, which seed
+    the dimension fallback used for every sweep run.
+    """
     cur = conn.cursor()
     cur.execute("""
-        SELECT slide_id, COUNT(*) as n
+        SELECT slide_id, COUNT(*) as n, MAX(centroid_x), MAX(centroid_y)
         FROM objects_slide_only
         GROUP BY slide_id
         ORDER BY n DESC
@@ -68,6 +81,9 @@ def pick_representative_slides(conn):
     rows = cur.fetchall()
     cur.close()
 
+    for sid, _, max_x, max_y in rows:
+        _db_dims_cache[sid] = _padded_dims(max_x, max_y)
+
     if not rows:
         raise RuntimeError("No slides found")
 
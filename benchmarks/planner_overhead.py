@@ -17,7 +17,6 @@ import time
 
 import numpy as np
 import psycopg2
-from scipy.optimize import curve_fit
 
 from spdb import config
 from spdb.config import RAW_DIR
@@ -135,6 +134,18 @@ def _quadratic(B, alpha, beta, gamma):
     return alpha * B + beta * B**2 + gamma
 
 
+def _fit_poly_model(Bs, y, powers):
+    """Least-squares coefficients for a model sum(c_i * B**powers[i]).
+
+    Both models are linear in their parameters, so the exact fit is one
+    lstsq solve; no iterative curve_fit is needed.  Coefficients come back
+    in the order of *powers*, matching the model function's arguments.
+    """
+    design = Bs[:, None] ** np.asarray(powers, dtype=np.float64)
+    coef, *_ = np.linalg.lstsq(design, y, rcond=None)
+    return coef
+
+
 def _r_squared(y_true, y_pred):
     ss_res = np.sum((y_true - y_pred) ** 2)
     ss_tot = np.sum((y_true - np.mean(y_true)) ** 2)
@@ -216,26 +227,26 @@ def run_planner_overhead(n_trials: int = 200) -> dict:
 
     # Linear: plan_ms = alpha * B + beta
     try:
-        popt_lin, _ = curve_fit(_linear, Bs, means)
+        popt_lin = _fit_poly_model(Bs, means, (1, 0))
         alpha_l, beta_l = popt_lin
         y_pred_lin = _linear(Bs, *popt_lin)
         r2_lin = _r_squared(means, y_pred_lin)
         print(f"  Linear:    plan_ms = {alpha_l:.6f} * B + {beta_l:.4f}  "
               f"(R² = {r2_lin:.4f})")
-    except RuntimeError as e:
+    except np.linalg.LinAlgError as e:
         print(f"  Linear fit failed: {e}")
         alpha_l, beta_l, r2_lin = None, None, None
 
     # Quadratic: plan_ms = alpha * B + beta * B^2 + gamma
     try:
-        popt_quad, _ = curve_fit(_quadratic, Bs, means)
+        popt_quad = _fit_poly_model(Bs, means, (1, 2, 0))
         alpha_q, beta_q, gamma_q = popt_quad
         y_pred_quad = _quadratic(Bs, *popt_quad)
         r2_quad = _r_squared(means, y_pred_quad)
         print(f"  Quadratic: plan_ms = {alpha_q:.6f} * B + "
               f"{beta_q:.10f} * B² + {gamma_q:.4f}  "
               f"(R² = {r2_quad:.4f})")
-    except RuntimeError as e:
+    except np.linalg.LinAlgError as e:
         print(f"  Quadratic fit failed: {e}")
         alpha_q, beta_q, gamma_q, r2_quad = None, None, None, None
 
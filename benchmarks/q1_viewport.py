@@ -62,13 +62,15 @@ def viewport_query_sql(table_name):
 
 
 def run_q1(conn, table_name, slide_ids, metadata, n_trials=500,
-           viewport_frac=0.05, seed=42, hilbert_order=None):
+           viewport_frac=0.05, seed=42, hilbert_order=None,
+           measure_mode="fetch"):
     """Run Q1 viewport benchmark on a single table config.
 
     For SPDB tables, automatically adds Hilbert key range predicates.
+    measure_mode is passed through to time_query().
     """
     rng = np.random.RandomState(seed)
-    latencies = []
+    latencies = np.empty(n_trials, dtype=np.float64)
     is_spdb = table_name in SPDB_TABLES or table_name.startswith("objects_spdb_h")
 
     if hilbert_order is None:
@@ -92,14 +94,21 @@ def run_q1(conn, table_name, slide_ids, metadata, n_trials=500,
         else:
             sql = viewport_query_sql(table_name)
 
-        _, elapsed = time_query(conn, sql, (sid, x0, y0, x1, y1))
-        latencies.append(elapsed)
+        _, elapsed = time_query(conn, sql, (sid, x0, y0, x1, y1),
+                                measure_mode=measure_mode)
+        latencies[trial] = elapsed
 
     return latencies
 
 
-def run_q1_all_configs(n_trials=500, viewport_frac=0.05, seed=42):
-    """Run Q1 across all configurations and compute statistics."""
+def run_q1_all_configs(n_trials=500, viewport_frac=0.05, seed=42,
+                      measure_mode="fetch"):
+    """Run Q1 across all configurations and compute statistics.
+
+    Use measure_mode="engine" to separate PostGIS execution time from
+    psycopg2 row decoding (compare against the default "fetch" run).
+    """
+    suffix = "" if measure_mode == "fetch" else f"_{measure_mode}"
     metadata = load_metadata()
     slide_ids = metadata["slide_ids"]
     conn = psycopg2.connect(config.dsn())
@@ -110,11 +119,12 @@ def run_q1_all_configs(n_trials=500, viewport_frac=0.05, seed=42):
     for name, table in CONFIGS.items():
         print(f"  Running Q1 on {name} ({table})...")
         lats = run_q1(conn, table, slide_ids, metadata,
-                      n_trials=n_trials, viewport_frac=viewport_frac, seed=seed)
+                      n_trials=n_trials, viewport_frac=viewport_frac, seed=seed,
+                      measure_mode=measure_mode)
         stats = compute_stats(lats)
         all_results[name] = stats
         all_latencies[name] = lats
-        save_raw_latencies(lats, "q1_viewport", name)
+        save_raw_latencies(lats, f"q1_viewport{suffix}", name)
         print(f"    p50={stats['p50']:.1f}ms  p95={stats['p95']:.1f}ms  "
               f"mean={stats['mean']:.1f}ms  std={stats['std']:.1f}ms")
 
@@ -131,10 +141,11 @@ def run_q1_all_configs(n_trials=500, viewport_frac=0.05, seed=42):
         "query": "Q1_viewport",
         "n_trials": n_trials,
         "viewport_frac": viewport_frac,
+        "measure_mode": measure_mode,
         "configs": all_results,
         "statistical_tests": stat_tests,
     }
-    save_results(results, "q1_viewport")
+    save_results(results, f"q1_viewport{suffix}")
     print_comparison(all_results)
     conn.close()
     return results, all_latencies
@@ -7,7 +7,7 @@ from spdb import config
 from benchmarks.framework import (
     compute_stats, save_raw_latencies, save_results, load_metadata,
     get_slide_dimensions, random_point, time_query, warmup_cache,
-    print_comparison,
+    print_comparison, prepare_query,
 )
 
 CONFIGS = config.BENCH_CONFIGS
@@ -24,28 +24,36 @@ def knn_query_sql(table_name, k):
     """
 
 
-def run_q2(conn, table_name, slide_ids, metadata, k=50, n_trials=500, seed=42):
-    """Run Q2 kNN benchmark."""
+def run_q2(conn, table_name, slide_ids, metadata, k=50, n_trials=500, seed=42,
+           prepared=False):
+    """Run Q2 kNN benchmark.
+
+    With prepared=True the query is PREPAREd once and each trial times only
+    EXECUTE, removing per-call parse/plan cost from the measurement.
+    """
     rng = np.random.RandomState(seed)
-    latencies = []
+    latencies = np.empty(n_trials, dtype=np.float64)
     rings_needed = []
 
     warmup_cache(conn, table_name)
 
+    sql = knn_query_sql(table_name, k)
+    if prepared:
+        sql = prepare_query(conn, f"q2_{table_name}_k{k}", sql)
+
     for trial in range(n_trials):
         sid = rng.choice(slide_ids)
         w, h = get_slide_dimensions(metadata, sid)
         qx, qy = random_point(w, h, rng)
 
-        sql = knn_query_sql(table_name, k)
         rows, elapsed = time_query(conn, sql, (qx, qy, sid, qx, qy))
-        latencies.append(elapsed)
+        latencies[trial] = elapsed
         rings_needed.append(1)
 
     return latencies, rings_needed
 
 
-def run_q2_all_configs(k=50, n_trials=500, seed=42):
+def run_q2_all_configs(k=50, n_trials=500, seed=42, prepared=False):
     """Run Q2 across all configurations."""
     metadata = load_metadata()
     slide_ids = metadata["slide_ids"]
@@ -57,7 +65,8 @@ def run_q2_all_configs(k=50, n_trials=500, seed=42):
     for name, table in CONFIGS.items():
         print(f"  Running Q2 (k={k}) on {name}...")
         lats, rings = run_q2(conn, table, slide_ids, metadata,
-                             k=k, n_trials=n_trials, seed=seed)
+                             k=k, n_trials=n_trials, seed=seed,
+                             prepared=prepared)
         stats = compute_stats(lats)
         stats["rings_mean"] = float(np.mean(rings))
         all_results[name] = stats
@@ -69,6 +78,7 @@ def run_q2_all_configs(k=50, n_trials=500, seed=42):
         "query": "Q2_knn",
         "k": k,
         "n_trials": n_trials,
+        "prepared": prepared,
         "configs": all_results,
     }
     save_results(results, f"q2_knn_k{k}")
@@ -3,10 +3,10 @@
 import numpy as np
 import psycopg2
 
-from spdb import config
+from spdb import config, schema
 from benchmarks.framework import (
     compute_stats, save_raw_latencies, save_results, load_metadata,
-    time_query, warmup_cache, print_comparison,
+    time_query, warmup_cache, print_comparison, prepare_query,
 )
 
 CONFIGS = config.BENCH_CONFIGS
@@ -22,22 +22,41 @@ def aggregation_query_sql(table_name):
     """
 
 
-def run_q3(conn, table_name, slide_ids, n_trials=500, seed=42):
+def rollup_query_sql(mv_name):
+    return f"""
+        SELECT tile_id, class_label, cnt
+        FROM {mv_name}
+        WHERE slide_id = %s
+        ORDER BY cnt DESC
+    """
+
+
+def run_q3(conn, table_name, slide_ids, n_trials=500, seed=42, prepared=False,
+           rollup=False):
+    """Time Q3 on table_name; rollup=True reads its materialized tile counts."""
     rng = np.random.RandomState(seed)
-    latencies = []
+    latencies = np.empty(n_trials, dtype=np.float64)
+
+    if rollup:
+        table_name = schema.tile_rollup_name(table_name)
+        sql = rollup_query_sql(table_name)
+    else:
+        sql = aggregation_query_sql(table_name)
 
     warmup_cache(conn, table_name)
 
+    if prepared:
+        sql = prepare_query(conn, f"q3_{table_name}", sql)
+
     for trial in range(n_trials):
         sid = rng.choice(slide_ids)
-        sql = aggregation_query_sql(table_name)
         _, elapsed = time_query(conn, sql, (sid,))
-        latencies.append(elapsed)
+        latencies[trial] = elapsed
 
     return latencies
 
 
-def run_q3_all_configs(n_trials=500, seed=42):
+def run_q3_all_configs(n_trials=500, seed=42, prepared=False, rollup=False):
     metadata = load_metadata()
     slide_ids = metadata["slide_ids"]
     conn = psycopg2.connect(config.dsn())
@@ -46,13 +65,25 @@ def run_q3_all_configs(n_trials=500, seed=42):
 
     for name, table in CONFIGS.items():
         print(f"  Running Q3 on {name}...")
-        lats = run_q3(conn, table, slide_ids, n_trials=n_trials, seed=seed)
+        lats = run_q3(conn, table, slide_ids, n_trials=n_trials, seed=seed,
+                      prepared=prepared)
         stats = compute_stats(lats)
         all_results[name] = stats
         save_raw_latencies(lats, "q3_aggregation", name)
         print(f"    p50={stats['p50']:.1f}ms  p95={stats['p95']:.1f}ms")
 
-    results = {"query": "Q3_aggregation", "n_trials": n_trials, "configs": all_results}
+    if rollup:
+        # Layout-independent: one rollup (built by ingest from SO) serves all
+        print("  Running Q3 on Rollup...")
+        lats = run_q3(conn, config.TABLE_SLIDE_ONLY, slide_ids,
+                      n_trials=n_trials, seed=seed, prepared=prepared, rollup=True)
+        stats = compute_stats(lats)
+        all_results["Rollup"] = stats
+        save_raw_latencies(lats, "q3_aggregation", "Rollup")
+        print(f"    p50={stats['p50']:.1f}ms  p95={stats['p95']:.1f}ms")
+
+    results = {"query": "Q3_aggregation", "n_trials": n_trials,
+               "prepared": prepared, "configs": all_results}
     save_results(results, "q3_aggregation")
     print_comparison(all_results)
     conn.close()
@@ -7,7 +7,7 @@ from spdb import config
 from benchmarks.framework import (
     compute_stats, save_raw_latencies, save_results, load_metadata,
     get_slide_dimensions, random_viewport, time_query, warmup_cache,
-    print_comparison,
+    print_comparison, prepare_query,
 )
 
 CONFIGS = config.BENCH_CONFIGS
@@ -25,25 +25,28 @@ def spatial_join_query_sql(table_name):
 
 
 def run_q4(conn, table_name, slide_ids, metadata, n_trials=100,
-           viewport_frac=0.02, seed=42):
+           viewport_frac=0.02, seed=42, prepared=False):
     rng = np.random.RandomState(seed)
-    latencies = []
+    latencies = np.empty(n_trials, dtype=np.float64)
 
     warmup_cache(conn, table_name)
 
+    sql = spatial_join_query_sql(table_name)
+    if prepared:
+        sql = prepare_query(conn, f"q4_{table_name}", sql)
+
     for trial in range(n_trials):
         sid = rng.choice(slide_ids)
         w, h = get_slide_dimensions(metadata, sid)
         x0, y0, x1, y1 = random_viewport(w, h, viewport_frac, rng)
 
-        sql = spatial_join_query_sql(table_name)
         rows, elapsed = time_query(conn, sql, (sid, x0, y0, x1, y1))
-        latencies.append(elapsed)
+        latencies[trial] = elapsed
 
     return latencies
 
 
-def run_q4_all_configs(n_trials=100, seed=42):
+def run_q4_all_configs(n_trials=100, seed=42, prepared=False):
     metadata = load_metadata()
     slide_ids = metadata["slide_ids"]
     conn = psycopg2.connect(config.dsn())
@@ -52,13 +55,15 @@ def run_q4_all_configs(n_trials=100, seed=42):
 
     for name, table in CONFIGS.items():
         print(f"  Running Q4 on {name}...")
-        lats = run_q4(conn, table, slide_ids, metadata, n_trials=n_trials, seed=seed)
+        lats = run_q4(conn, table, slide_ids, metadata, n_trials=n_trials, seed=seed,
+                      prepared=prepared)
         stats = compute_stats(lats)
         all_results[name] = stats
         save_raw_latencies(lats, "q4_spatial_join", name)
         print(f"    p50={stats['p50']:.1f}ms  p95={stats['p95']:.1f}ms")
 
-    results = {"query": "Q4_spatial_join", "n_trials": n_trials, "configs": all_results}
+    results = {"query": "Q4_spatial_join", "n_trials": n_trials,
+               "prepared": prepared, "configs": all_results}
     save_results(results, "q4_spatial_join")
     print_comparison(all_results)
     conn.close()
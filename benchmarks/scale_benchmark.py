@@ -17,7 +17,6 @@ import json
 import math
 import os
 import random
-import statistics
 import subprocess
 import sys
 import textwrap
@@ -81,30 +80,36 @@ KNN_K = 50
 RESULTS_DIR = Path(__file__).resolve().parent.parent / "results" / "raw"
 
 # ---------------------------------------------------------------------------
-# Hilbert & Z-order helpers (pure Python, no external deps)
+# Hilbert & Z-order helpers (numpy only, no spdb import)
 # ---------------------------------------------------------------------------
 
-def xy2d(n: int, x: int, y: int) -> int:
-    """Convert (x, y) on an n x n Hilbert grid to distance d."""
-    d = 0
+def xy2d(n: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Convert (x, y) arrays on an n x n Hilbert grid to distances d.
+
+    The usual bit walk, applied to every point at once per level.
+    """
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
     s = n // 2
     while s > 0:
-        rx = 1 if (x & s) > 0 else 0
-        ry = 1 if (y & s) > 0 else 0
+        rx = (x & s) > 0
+        ry = (y & s) > 0
         d += s * s * ((3 * rx) ^ ry)
         # rotate quadrant
-        if ry == 0:
-            if rx == 1:
-                x = s - 1 - x
-                y = s - 1 - y
-            x, y = y, x
+        flip = rx & ~ry
+        x = np.where(flip, s - 1 - x, x)
+        y = np.where(flip, s - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
         s //= 2
     return d
 
 
-def z_order(gx: int, gy: int) -> int:
-    """Bit-interleave two 8-bit grid coordinates into a 16-bit Z-value."""
-    z = 0
+def z_order(gx: np.ndarray, gy: np.ndarray) -> np.ndarray:
+    """Bit-interleave 8-bit grid coordinate arrays into 16-bit Z-values."""
+    gx = np.asarray(gx, dtype=np.int64)
+    gy = np.asarray(gy, dtype=np.int64)
+    z = np.zeros(len(gx), dtype=np.int64)
     for i in range(8):
         z |= ((gx >> i) & 1) << (2 * i)
         z |= ((gy >> i) & 1) << (2 * i + 1)
@@ -127,8 +132,8 @@ def compute_keys(
     gx = ((cx - xmin) / span_x * (HILBERT_N - 1)).astype(int).clip(0, HILBERT_N - 1)
     gy = ((cy - ymin) / span_y * (HILBERT_N - 1)).astype(int).clip(0, HILBERT_N - 1)
 
-    h_keys = [xy2d(HILBERT_N, int(x), int(y)) for x, y in zip(gx, gy)]
-    z_keys = [z_order(int(x), int(y)) for x, y in zip(gx, gy)]
+    h_keys = xy2d(HILBERT_N, np.asarray(gx), np.asarray(gy))
+    z_keys = z_order(np.asarray(gx), np.asarray(gy))
 
     return pd.Series(h_keys, dtype="int64"), pd.Series(z_keys, dtype="int64")
 
@@ -156,23 +161,42 @@ def get_conn():
     )
 
 
+def distinct_slide_ids(conn) -> list[str]:
+    """Distinct slide_ids in objects_mono.
+
+    Loose index scan over the slide_id btree: one index probe per distinct
+    slide instead of a DISTINCT over every row.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            WITH RECURSIVE s AS (
+                (SELECT slide_id FROM objects_mono ORDER BY slide_id LIMIT 1)
+                UNION ALL
+                SELECT (SELECT m.slide_id FROM objects_mono m
+                         WHERE m.slide_id > s.slide_id
+                         ORDER BY m.slide_id LIMIT 1)
+                FROM s WHERE s.slide_id IS NOT NULL
+            )
+            SELECT slide_id FROM s WHERE slide_id IS NOT NULL;
+        """)
+        return [r[0] for r in cur.fetchall()]
+
+
 def get_loaded_slides(conn) -> set[str]:
     """Return set of patient barcodes already present in objects_mono.
 
     Slide IDs in DB are like 'TCGA-2F-A9KO-01Z-00-DX1'.
     We extract patient barcode 'TCGA-2F-A9KO' (first 3 segments) for matching.
     """
-    with conn.cursor() as cur:
-        cur.execute("SELECT DISTINCT slide_id FROM objects_mono;")
-        loaded = set()
-        for (sid,) in cur.fetchall():
-            # Extract patient barcode: first 3 hyphen-separated segments
-            parts = sid.split("-")
-            if len(parts) >= 3:
-                loaded.add("-".join(parts[:3]))
-            else:
-                loaded.add(sid)
-        return loaded
+    loaded = set()
+    for sid in distinct_slide_ids(conn):
+        # Extract patient barcode: first 3 hyphen-separated segments
+        parts = sid.split("-")
+        if len(parts) >= 3:
+            loaded.add("-".join(parts[:3]))
+        else:
+            loaded.add(sid)
+    return loaded
 
 
 def count_rows(conn, table: str) -> int:
@@ -192,30 +216,59 @@ def estimate_rows(conn, table: str) -> int:
         return int(row[0]) if row else 0
 
 
-def create_so_partition(conn, slide_id: str, safe_name: str = None):
-    """Create a LIST partition in objects_slide_only for the given slide_id."""
+def refresh_tile_rollup(conn):
+    """Refresh the Q3 tile/class count rollup, if one has been built.
+
+    The rollup is a materialized view over objects_slide_only, so slides
+    added after it was created are missing from it until refreshed.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('objects_slide_only_tile_counts');")
+        if cur.fetchone()[0] is None:
+            return
+        cur.execute("SET LOCAL enable_partitionwise_aggregate = on;")
+        cur.execute("REFRESH MATERIALIZED VIEW objects_slide_only_tile_counts;")
+    conn.commit()
+
+
+def create_so_partition(conn, slide_id: str, safe_name: str = None,
+                        detached: bool = False) -> str:
+    """Create a LIST partition in objects_slide_only for the given slide_id.
+
+    With *detached*, the table is created standalone (no indexes) so it can
+    be bulk-loaded and then attached via attach_slide_partitions().
+    """
     safe_val = slide_id.replace("'", "''")
     part_name = f"objects_slide_only_{safe_name or slide_id.replace('-', '_').lower()}"
+    bound = (
+        "(LIKE objects_slide_only INCLUDING DEFAULTS)" if detached
+        else f"PARTITION OF objects_slide_only FOR VALUES IN ('{safe_val}')"
+    )
     with conn.cursor() as cur:
-        cur.execute(f"""
-            CREATE TABLE IF NOT EXISTS {part_name}
-            PARTITION OF objects_slide_only
-            FOR VALUES IN ('{safe_val}');
-        """)
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {part_name} {bound};")
     conn.commit()
+    return part_name
 
 
-def create_spdb_partition(conn, slide_id: str, safe_name: str = None, n_sub: int = 30):
-    """Create LIST partition in objects_spdb, then RANGE sub-partitions on hilbert_key."""
+def create_spdb_partition(conn, slide_id: str, safe_name: str = None, n_sub: int = 30,
+                          detached: bool = False) -> str:
+    """Create LIST partition in objects_spdb, then RANGE sub-partitions on hilbert_key.
+
+    *detached* works as in create_so_partition: the slide-level table and its
+    sub-partitions carry no indexes until attached.
+    """
     safe_val = slide_id.replace("'", "''")
     parent = f"objects_spdb_{safe_name or slide_id.replace('-', '_').lower()}"
+    bound = (
+        "(LIKE objects_spdb INCLUDING DEFAULTS)" if detached
+        else f"PARTITION OF objects_spdb FOR VALUES IN ('{safe_val}')"
+    )
 
     with conn.cursor() as cur:
         # Top-level LIST partition (partitioned further by RANGE on hilbert_key)
         cur.execute(f"""
             CREATE TABLE IF NOT EXISTS {parent}
-            PARTITION OF objects_spdb
-            FOR VALUES IN ('{safe_val}')
+            {bound}
             PARTITION BY RANGE (hilbert_key);
         """)
 
@@ -232,6 +285,37 @@ def create_spdb_partition(conn, slide_id: str, safe_name: str = None, n_sub: int
             """)
 
     conn.commit()
+    return parent
+
+
+def attach_slide_partitions(conn, slide_id: str, so_part: str, spdb_part: str) -> bool:
+    """Attach loaded detached partitions to objects_slide_only / objects_spdb.
+
+    ATTACH builds each parent's partitioned indexes (GiST included) on the
+    new tables in one bulk pass, instead of per-row index inserts during COPY.
+    Each partition is attached in its own transaction, and ones already
+    attached by an earlier run are skipped, so one failure cannot leave the
+    other table detached.  Returns True when both end up attached.
+    """
+    safe_val = slide_id.replace("'", "''")
+    ok = True
+    for parent, part in (("objects_slide_only", so_part), ("objects_spdb", spdb_part)):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT relispartition FROM pg_class WHERE relname = %s;",
+                            (part,))
+                row = cur.fetchone()
+                if row and row[0]:
+                    continue
+                cur.execute(f"ALTER TABLE {parent} ATTACH PARTITION {part} "
+                            f"FOR VALUES IN ('{safe_val}');")
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"\n  [ERROR] Attach {part} failed: "
+                  f"{e.pgerror.strip() if e.pgerror else e}", end=" ")
+            ok = False
+    return ok
 
 
 def bulk_insert(conn, table: str, df: pd.DataFrame):
@@ -458,11 +542,14 @@ def ingest_slides(
             # Get actual slide_id from normalised data (set by case_id)
             slide_id = df["slide_id"].iloc[0]
 
-            # Create partitions first (use SQL-safe name for partition tables)
+            # Create partitions first (use SQL-safe name for partition tables).
+            # They start detached so COPY doesn't maintain indexes row by row.
             safe_slide = slide_id.replace("-", "_").lower()
+            so_part = f"objects_slide_only_{safe_slide}"
+            spdb_part = f"objects_spdb_{safe_slide}"
             try:
-                create_so_partition(conn, slide_id, safe_slide)
-                create_spdb_partition(conn, slide_id, safe_slide)
+                create_so_partition(conn, slide_id, safe_slide, detached=True)
+                create_spdb_partition(conn, slide_id, safe_slide, detached=True)
             except psycopg2.Error as e:
                 # Partition may already exist — or connection dropped
                 try:
@@ -471,15 +558,15 @@ def ingest_slides(
                     conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, host=DB_HOST, port=DB_PORT)
                     print("\n  [reconnected]", end=" ")
                     try:
-                        create_so_partition(conn, slide_id, safe_slide)
-                        create_spdb_partition(conn, slide_id, safe_slide)
+                        create_so_partition(conn, slide_id, safe_slide, detached=True)
+                        create_spdb_partition(conn, slide_id, safe_slide, detached=True)
                     except psycopg2.Error:
                         conn.rollback()
                 print(f"(partition note: {e.pgerror.strip() if e.pgerror else e})", end=" ")
 
             # Bulk insert into all three tables
             insert_ok = True
-            for tbl in ("objects_mono", "objects_slide_only", "objects_spdb"):
+            for tbl in ("objects_mono", so_part, spdb_part):
                 try:
                     bulk_insert(conn, tbl, df)
                 except (psycopg2.OperationalError, psycopg2.InterfaceError):
@@ -499,6 +586,16 @@ def ingest_slides(
                     insert_ok = False
                     continue
 
+            if not insert_ok:
+                print("INSERT FAILED, not attaching or counting this slide.")
+                del raw, df
+                continue
+
+            if not attach_slide_partitions(conn, slide_id, so_part, spdb_part):
+                print("ATTACH FAILED, not counting this slide.")
+                del raw, df
+                continue
+
             total += len(df)
             slides_added += 1
             loaded.add(slide_id)
@@ -522,6 +619,9 @@ def ingest_slides(
             cur.execute(f"ANALYZE {tbl};")
     conn.commit()
 
+    if slides_added:
+        refresh_tile_rollup(conn)
+
     total_final = estimate_rows(conn, "objects_mono")
     print(f"[ingest] Ingestion complete. Estimated rows in objects_mono: {total_final:,}")
     print(f"[ingest] Slides added this run: {slides_added}")
@@ -532,19 +632,30 @@ def ingest_slides(
 # Benchmark helpers
 # ---------------------------------------------------------------------------
 
+_extent_cache: dict[str, tuple | None] = {}
+
+
+def _slide_extent(conn, slide_id: str):
+    """(xmin, xmax, ymin, ymax) of a slide's centroids; one scan per slide."""
+    if slide_id not in _extent_cache:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT min(centroid_x), max(centroid_x), "
+                "min(centroid_y), max(centroid_y) "
+                "FROM objects_mono WHERE slide_id = %s;",
+                (slide_id,),
+            )
+            row = cur.fetchone()
+        _extent_cache[slide_id] = None if row is None or row[0] is None else row
+    return _extent_cache[slide_id]
+
+
 def _random_viewport(conn, slide_id: str, frac: float):
     """Generate a random viewport covering *frac* of the slide's extent."""
-    with conn.cursor() as cur:
-        cur.execute(
-            "SELECT min(centroid_x), max(centroid_x), "
-            "min(centroid_y), max(centroid_y) "
-            "FROM objects_mono WHERE slide_id = %s;",
-            (slide_id,),
-        )
-        row = cur.fetchone()
-    if row is None or row[0] is None:
+    extent = _slide_extent(conn, slide_id)
+    if extent is None:
         return None
-    xmin, xmax, ymin, ymax = row
+    xmin, xmax, ymin, ymax = extent
     w = (xmax - xmin) * math.sqrt(frac)
     h = (ymax - ymin) * math.sqrt(frac)
     x0 = random.uniform(xmin, xmax - w) if xmax - w > xmin else xmin
@@ -554,9 +665,7 @@ def _random_viewport(conn, slide_id: str, frac: float):
 
 def _get_sample_slides(conn, n: int = 10) -> list[str]:
     """Pick up to n random loaded slide_ids."""
-    with conn.cursor() as cur:
-        cur.execute("SELECT DISTINCT slide_id FROM objects_mono;")
-        all_slides = [r[0] for r in cur.fetchall()]
+    all_slides = distinct_slide_ids(conn)
     if len(all_slides) <= n:
         return all_slides
     return random.sample(all_slides, n)
@@ -573,26 +682,30 @@ def _precompute_viewports(conn, slides: list[str], frac: float, n: int):
     return viewports
 
 
-def _random_point(conn, slide_id: str):
-    """Pick a random nuclei centroid from the slide as kNN center."""
+def _random_points(conn, slide_id: str, k: int) -> list[tuple]:
+    """Pick k random nuclei centroids from the slide as kNN centers."""
     with conn.cursor() as cur:
         cur.execute(
             "SELECT centroid_x, centroid_y FROM objects_mono "
-            "WHERE slide_id = %s ORDER BY random() LIMIT 1;",
-            (slide_id,),
+            "WHERE slide_id = %s ORDER BY random() LIMIT %s;",
+            (slide_id, k),
         )
-        row = cur.fetchone()
-    return row if row else None
+        return cur.fetchall()
 
 
 def _precompute_knn_centers(conn, slides: list[str], n: int):
-    """Pre-generate n (slide_id, cx, cy) tuples for kNN queries."""
+    """Pre-generate n (slide_id, cx, cy) tuples for kNN queries.
+
+    Points are drawn with one ORDER BY random() per slide rather than one
+    per center, since each draw sorts the whole slide.
+    """
+    picks = [random.choice(slides) for _ in range(n)]
+    pools = {sid: _random_points(conn, sid, picks.count(sid)) for sid in set(picks)}
     centers = []
-    for _ in range(n):
-        sid = random.choice(slides)
-        pt = _random_point(conn, sid)
-        if pt:
-            centers.append((sid, pt[0], pt[1]))
+    for sid in picks:
+        if pools[sid]:
+            cx, cy = pools[sid].pop()
+            centers.append((sid, cx, cy))
     return centers
 
 
@@ -655,13 +768,14 @@ def q_agg(conn, table: str, slide_id: str) -> float:
 def summarise(latencies: list[float]) -> dict:
     if not latencies:
         return {"p50": 0, "p95": 0, "mean": 0, "std": 0, "n": 0}
-    s = sorted(latencies)
-    n = len(s)
+    arr = np.asarray(latencies, dtype=np.float64)
+    n = len(arr)
+    p50, p95 = np.percentile(arr, [50, 95])
     return {
-        "p50": s[int(n * 0.5)],
-        "p95": s[int(n * 0.95)],
-        "mean": statistics.mean(s),
-        "std": statistics.stdev(s) if n > 1 else 0.0,
+        "p50": float(p50),
+        "p95": float(p95),
+        "mean": float(arr.mean()),
+        "std": float(arr.std(ddof=1)) if n > 1 else 0.0,
         "n": n,
     }
 
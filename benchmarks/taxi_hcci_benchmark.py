@@ -104,12 +104,23 @@ def build_exact_query(class_label: str, viewport: tuple) -> str:
 # Benchmark
 # ---------------------------------------------------------------------------
 
+def class_counts_by_frequency(conn) -> dict:
+    """Row count per class_label, most frequent first."""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT class_label, COUNT(*) FROM {TABLE}
+            GROUP BY class_label ORDER BY COUNT(*) DESC
+        """)
+        return dict(cur.fetchall())
+
+
 def run_benchmark(
     conn,
     meta: dict,
     n_trials: int = 200,
     viewport_frac: float = 0.05,
     seed: int = config.RANDOM_SEED + 9000,
+    class_counts: dict = None,
 ) -> dict:
     """Run HCCI vs GiST viewport benchmark on taxi data."""
     bounds = meta["bounds"]
@@ -121,13 +132,8 @@ def run_benchmark(
     vw = x_span * np.sqrt(viewport_frac)
     vh = y_span * np.sqrt(viewport_frac)
 
-    # Get class labels sorted by frequency
-    with conn.cursor() as cur:
-        cur.execute(f"""
-            SELECT class_label, COUNT(*) FROM {TABLE}
-            GROUP BY class_label ORDER BY COUNT(*) DESC
-        """)
-        class_counts = dict(cur.fetchall())
+    if class_counts is None:
+        class_counts = class_counts_by_frequency(conn)
 
     class_labels = list(class_counts.keys())
     print(f"\n  Classes: {class_labels}")
@@ -326,9 +332,9 @@ def main():
     meta = load_taxi_metadata()
 
     # Verify table exists
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT COUNT(*) FROM {TABLE}")
-        count = cur.fetchone()[0]
+    # Class counts double as the row count and are reused by run_benchmark
+    class_counts = class_counts_by_frequency(conn)
+    count = sum(class_counts.values())
     print(f"\n  Table {TABLE}: {count:,} rows")
 
     # Warmup
@@ -349,6 +355,7 @@ def main():
         conn, meta,
         n_trials=args.trials,
         viewport_frac=args.viewport_frac,
+        class_counts=class_counts,
     )
 
     # I/O decomposition
@@ -17,7 +17,6 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import io
 import json
 import math
 import os
@@ -37,6 +36,7 @@ except ImportError:
 import psycopg2
 
 from spdb import config, hilbert, hcci
+from benchmarks.framework import COPY_READ_SIZE, CopyLineStream
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -199,11 +199,28 @@ BOROUGH_CENTROIDS = {
 DEFAULT_CENTROID = (-73.9712, 40.7580)  # Midtown Manhattan
 
 
-def _zone_centroid(zone_id: int) -> tuple[float, float]:
-    """Get (lon, lat) centroid for a taxi zone, with fallback."""
-    if zone_id in ZONE_CENTROIDS:
-        return ZONE_CENTROIDS[zone_id]
-    return DEFAULT_CENTROID
+def _zone_centroid_table(n_zones: int = 300) -> tuple[np.ndarray, np.ndarray]:
+    """(lon, lat) lookup arrays indexed by taxi zone id, DEFAULT_CENTROID fallback."""
+    lons = np.full(n_zones, DEFAULT_CENTROID[0])
+    lats = np.full(n_zones, DEFAULT_CENTROID[1])
+    for zid, (lon, lat) in ZONE_CENTROIDS.items():
+        if 0 <= zid < n_zones:
+            lons[zid] = lon
+            lats[zid] = lat
+    return lons, lats
+
+
+def _code_labels(codes: np.ndarray, labels: dict, missing: int, default: str) -> list:
+    """Map numeric codes to labels through a table built per distinct code.
+
+    Non-finite codes count as `missing`; codes absent from `labels` map to
+    `default`.  The dict is consulted once per distinct code, not per row.
+    """
+    vals = np.asarray(codes, dtype=np.float64)
+    ints = np.where(np.isfinite(vals), vals, missing).astype(np.int64)
+    uniq, inverse = np.unique(ints, return_inverse=True)
+    table = np.array([labels.get(c, default) for c in uniq.tolist()], dtype=object)
+    return table[inverse].tolist()
 
 
 def load_parquet_month(path: str, max_rows: int | None = None,
@@ -260,24 +277,24 @@ def load_parquet_month(path: str, max_rows: int | None = None,
         zone_ids = table.column(pu_loc_col).to_numpy()
         mask = np.isfinite(zone_ids.astype(float)) & (zone_ids > 0) & (zone_ids < 300)
         valid_idx = np.where(mask)[0]
-
-        # Map zone IDs to centroids with small spatial jitter
-        # Jitter radius ~0.002 degrees (~200m) to avoid point overlap
-        lons = np.empty(n_total, dtype=np.float64)
-        lats = np.empty(n_total, dtype=np.float64)
-        for i in valid_idx:
-            zid = int(zone_ids[i])
-            clon, clat = _zone_centroid(zid)
-            lons[i] = clon + rng.normal(0, 0.002)
-            lats[i] = clat + rng.normal(0, 0.002)
         mode = "zone centroid + jitter"
 
     if max_rows and len(valid_idx) > max_rows:
         valid_idx = rng.choice(valid_idx, size=max_rows, replace=False)
         valid_idx.sort()
 
-    lons_v = lons[valid_idx]
-    lats_v = lats[valid_idx]
+    if has_latlon:
+        lons_v = lons[valid_idx]
+        lats_v = lats[valid_idx]
+    else:
+        # Map surviving zone IDs to centroids with small spatial jitter, drawn
+        # only after filtering and subsampling.  Jitter radius ~0.002 degrees
+        # (~200m) to avoid point overlap
+        zone_lons, zone_lats = _zone_centroid_table()
+        zids = zone_ids[valid_idx].astype(np.int64)
+        jitter = rng.normal(0, 0.002, (len(zids), 2))
+        lons_v = zone_lons[zids] + jitter[:, 0]
+        lats_v = zone_lats[zids] + jitter[:, 1]
     payments_v = payments[valid_idx]
     rates_v = rates[valid_idx]
 
@@ -285,21 +302,13 @@ def load_parquet_month(path: str, max_rows: int | None = None,
     print(f"    {len(valid_idx):,} valid trips (of {n_total:,} total, "
           f"{len(valid_idx)/n_total*100:.1f}%)")
 
-    records = []
-    for i in range(len(lons_v)):
-        pay_code = int(payments_v[i]) if np.isfinite(float(payments_v[i])) else 5
-        rate_code = int(rates_v[i]) if np.isfinite(float(rates_v[i])) else 99
-        pay_label = PAYMENT_LABELS.get(pay_code, "Unknown")
-        rate_label = RATE_LABELS.get(rate_code, "Other")
-
-        records.append({
-            "lon": float(lons_v[i]),
-            "lat": float(lats_v[i]),
-            "class_label": pay_label,
-            "rate_code": rate_label,
-        })
-
-    return records
+    pay_labels = _code_labels(payments_v, PAYMENT_LABELS, missing=5, default="Unknown")
+    rate_labels = _code_labels(rates_v, RATE_LABELS, missing=99, default="Other")
+    return [
+        {"lon": lon, "lat": lat, "class_label": pay, "rate_code": rate}
+        for lon, lat, pay, rate in zip(lons_v.tolist(), lats_v.tolist(),
+                                       pay_labels, rate_labels)
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -334,18 +343,16 @@ def load_data(conn, records: list[dict]):
     print(f"\n[Load] Inserting {len(records):,} records via COPY...")
     t0 = time.time()
 
-    buf = io.StringIO()
-    for r in records:
-        buf.write(
-            f"{DATASET_ID}\t{r['lon']}\t{r['lat']}\t{r['class_label']}\t{r['rate_code']}\n"
-        )
-
-    buf.seek(0)
+    buf = CopyLineStream(
+        f"{DATASET_ID}\t{r['lon']}\t{r['lat']}\t{r['class_label']}\t{r['rate_code']}\n"
+        for r in records
+    )
     with conn.cursor() as cur:
         cur.copy_from(
             buf, TABLE,
             columns=("dataset_id", "centroid_x", "centroid_y", "class_label", "rate_code"),
             sep="\t",
+            size=COPY_READ_SIZE,
         )
     conn.commit()
     elapsed = time.time() - t0
@@ -375,10 +382,10 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
         cur.execute(f"""
             SELECT MIN(centroid_x), MAX(centroid_x),
                    MIN(centroid_y), MAX(centroid_y),
-                   COUNT(*)
+                   COUNT(*), MIN(id), MAX(id)
             FROM {TABLE}
         """)
-        x_min, x_max, y_min, y_max, count = cur.fetchone()
+        x_min, x_max, y_min, y_max, count, id_min, id_max = cur.fetchone()
 
     print(f"  Bounds: lon=[{x_min:.4f}, {x_max:.4f}], lat=[{y_min:.4f}, {y_max:.4f}]")
     print(f"  Rows: {count:,}")
@@ -397,10 +404,6 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
     CHUNK_SIZE = 2_000_000
     n_grid = 1 << hilbert_order
 
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT MIN(id), MAX(id) FROM {TABLE}")
-        id_min, id_max = cur.fetchone()
-
     print(f"  Processing in chunks of {CHUNK_SIZE:,}...")
     total_updated = 0
 
@@ -429,13 +432,8 @@ def compute_hilbert_keys(conn, hilbert_order: int = config.HILBERT_ORDER):
         gy = np.clip(((ys - y_min) * n_grid / height).astype(np.int64), 0, n_grid - 1)
         h_keys = hilbert.encode_batch(gx, gy, hilbert_order)
 
-        buf = io.StringIO()
-        for i in range(len(ids)):
-            buf.write(f"{ids[i]}\t{int(h_keys[i])}\n")
-        buf.seek(0)
-
         with conn.cursor() as cur:
-            cur.copy_from(buf, "_hk", columns=("id", "hk"), sep="\t")
+            hcci.copy_key_pairs(cur, "_hk", h_keys, ids, columns=("hk", "id"))
 
         total_updated += len(ids)
         pct = total_updated / count * 100 if count else 0
@@ -570,12 +568,12 @@ def verify(conn, class_enum: dict[str, int]):
             ORDER BY cnt DESC
         """)
         print("\n  Payment type distribution:")
-        for cat, cnt, pct in cur.fetchall():
+        dist = cur.fetchall()
+        for cat, cnt, pct in dist:
             print(f"    {cat:<20} {cnt:>12,}  ({pct}%)")
 
-        # Total count
-        cur.execute(f"SELECT COUNT(*) FROM {TABLE}")
-        total = cur.fetchone()[0]
+        # Total count, from the distribution rather than another full scan
+        total = sum(cnt for _, cnt, _ in dist)
         print(f"\n  Total rows: {total:,}")
 
         # Index sizes
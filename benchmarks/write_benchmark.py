@@ -20,6 +20,7 @@ import argparse
 import json
 import os
 import time
+from itertools import repeat
 
 import numpy as np
 import psycopg2
@@ -86,15 +87,26 @@ def _drop_write_tables(conn):
 
 def _generate_batch(n: int, rng: np.random.RandomState,
                     slide_width: float = 100000.0,
-                    slide_height: float = 100000.0) -> dict:
-    """Generate n random spatial objects with class labels."""
-    xs = rng.uniform(0, slide_width, n).astype(np.float64)
-    ys = rng.uniform(0, slide_height, n).astype(np.float64)
-    classes = rng.choice(
-        list(config.CLASS_DISTRIBUTION.keys()),
-        size=n,
-        p=list(config.CLASS_DISTRIBUTION.values()),
-    )
+                    slide_height: float = 100000.0,
+                    n_clusters: int = 0) -> dict:
+    """Generate n random spatial objects with class labels.
+
+    With n_clusters > 0, centroids are drawn from axis-aligned Gaussian blobs
+    instead of uniformly, approximating the clumped nuclei layout of real
+    slides.  All clusters are sampled in one standard_normal draw offset by
+    each point's repeated centre, so there is no per-cluster Python loop.
+    """
+    if n_clusters > 0:
+        sizes = rng.multinomial(n, np.full(n_clusters, 1.0 / n_clusters))
+        centres = rng.uniform((0, 0), (slide_width, slide_height), (n_clusters, 2))
+        sigma = np.array([slide_width * 0.05, slide_height * 0.05])
+        pts = np.repeat(centres, sizes, axis=0) + rng.standard_normal((n, 2)) * sigma
+        xs = np.clip(pts[:, 0], 0, slide_width)
+        ys = np.clip(pts[:, 1], 0, slide_height)
+    else:
+        xs = rng.uniform(0, slide_width, n).astype(np.float64)
+        ys = rng.uniform(0, slide_height, n).astype(np.float64)
+    classes = hcci.sample_class_labels(rng, n)
     areas = rng.uniform(10, 500, n).astype(np.float64)
     return {"xs": xs, "ys": ys, "classes": classes, "areas": areas}
 
@@ -106,14 +118,41 @@ def _compute_keys(xs, ys, classes, slide_width, slide_height, p=HILBERT_ORDER):
     gys = np.clip((ys / slide_height * n_grid).astype(np.int64), 0, n_grid - 1)
     h_keys = hilbert.encode_batch(gxs, gys, p)
 
-    c_keys = np.empty(len(xs), dtype=np.int64)
-    for i, cls in enumerate(classes):
-        enum_val = hcci.class_to_enum(cls)
-        c_keys[i] = (enum_val << COMPOSITE_SHIFT) | int(h_keys[i])
+    labels, inverse = np.unique(np.asarray(classes), return_inverse=True)
+    enum_vals = np.array([hcci.class_to_enum(c) for c in labels], dtype=np.int64)
+    c_keys = (enum_vals[inverse] << COMPOSITE_SHIFT) | h_keys.astype(np.int64)
 
     return h_keys, c_keys
 
 
+# (slide_id, centroid_x, centroid_y, class_label, area, x, y); the point is
+# built from the trailing coordinates with no text geometry round-trip
+GIST_ROW_TEMPLATE = "(%s, %s, %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 0))"
+
+
+def _prepare_rows(data, h_keys, c_keys):
+    """Build execute_values row tuples for the HCCI and GiST tables.
+
+    Arrays are converted to Python scalars with one tolist() each rather
+    than float()/int() per element.  GiST rows carry the raw coordinates
+    for the point geometry (see GIST_ROW_TEMPLATE) instead of an EWKT
+    string formatted here and parsed back by the server.
+    """
+    xs = data["xs"].tolist()
+    ys = data["ys"].tolist()
+    areas = data["areas"].tolist()
+    classes = np.asarray(data["classes"]).tolist()
+    hcci_rows = list(zip(
+        repeat("slide_0"), xs, ys, classes, areas,
+        h_keys.tolist(), c_keys.tolist(),
+    ))
+    gist_rows = list(zip(
+        repeat("slide_0"), xs, ys, classes, areas,
+        xs, ys,
+    ))
+    return hcci_rows, gist_rows
+
+
 # ---------------------------------------------------------------------------
 # Insert throughput benchmark
 # ---------------------------------------------------------------------------
@@ -125,6 +164,7 @@ def bench_insert_throughput(
     slide_width: float = 100000.0,
     slide_height: float = 100000.0,
     seed: int = config.RANDOM_SEED + 5000,
+    n_clusters: int = 0,
 ) -> dict:
     """Measure insert throughput for HCCI vs GiST tables."""
     rng = np.random.RandomState(seed)
@@ -137,7 +177,8 @@ def bench_insert_throughput(
         key_compute_times = []
 
         for rep in range(n_repeats):
-            data = _generate_batch(batch_size, rng, slide_width, slide_height)
+            data = _generate_batch(batch_size, rng, slide_width, slide_height,
+                                   n_clusters=n_clusters)
 
             # Time composite key computation
             t0 = time.perf_counter()
@@ -148,23 +189,7 @@ def bench_insert_throughput(
             key_compute_ms = (time.perf_counter() - t0) * 1000
             key_compute_times.append(key_compute_ms)
 
-            # Prepare HCCI rows
-            hcci_rows = [
-                ("slide_0", float(x), float(y), cls, float(a), int(hk), int(ck))
-                for x, y, cls, a, hk, ck in zip(
-                    data["xs"], data["ys"], data["classes"],
-                    data["areas"], h_keys, c_keys,
-                )
-            ]
-
-            # Prepare GiST rows
-            gist_rows = [
-                ("slide_0", float(x), float(y), cls, float(a),
-                 f"SRID=0;POINT({float(x)} {float(y)})")
-                for x, y, cls, a in zip(
-                    data["xs"], data["ys"], data["classes"], data["areas"],
-                )
-            ]
+            hcci_rows, gist_rows = _prepare_rows(data, h_keys, c_keys)
 
             # Reset tables
             _create_write_tables(conn)
@@ -194,7 +219,7 @@ def bench_insert_throughput(
                        (slide_id, centroid_x, centroid_y, class_label, area, geom)
                        VALUES %s""",
                     gist_rows,
-                    template="(%s, %s, %s, %s, %s, ST_GeomFromEWKT(%s))",
+                    template=GIST_ROW_TEMPLATE,
                     page_size=5000,
                 )
             conn.commit()
@@ -247,20 +272,7 @@ def bench_update_overhead(
         data["xs"], data["ys"], data["classes"], slide_width, slide_height,
     )
 
-    hcci_rows = [
-        ("slide_0", float(x), float(y), cls, float(a), int(hk), int(ck))
-        for x, y, cls, a, hk, ck in zip(
-            data["xs"], data["ys"], data["classes"],
-            data["areas"], h_keys, c_keys,
-        )
-    ]
-    gist_rows = [
-        ("slide_0", float(x), float(y), cls, float(a),
-         f"SRID=0;POINT({float(x)} {float(y)})")
-        for x, y, cls, a in zip(
-            data["xs"], data["ys"], data["classes"], data["areas"],
-        )
-    ]
+    hcci_rows, gist_rows = _prepare_rows(data, h_keys, c_keys)
 
     with conn.cursor() as cur:
         execute_values(
@@ -277,7 +289,7 @@ def bench_update_overhead(
                (slide_id, centroid_x, centroid_y, class_label, area, geom)
                VALUES %s""",
             gist_rows,
-            template="(%s, %s, %s, %s, %s, ST_GeomFromEWKT(%s))",
+            template=GIST_ROW_TEMPLATE,
             page_size=5000,
         )
     conn.commit()
@@ -403,20 +415,25 @@ def bench_vacuum_impact(
     # Do updates to dirty the visibility map
     update_ids = rng.randint(1, n_rows + 1, size=n_updates_before_vacuum)
     new_classes = rng.choice(config.CLASS_LABELS, size=n_updates_before_vacuum)
-    for uid, new_cls in zip(update_ids, new_classes):
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT hilbert_key FROM write_bench_hcci WHERE id = %s",
-                (int(uid),),
-            )
-            row = cur.fetchone()
-            if row:
-                hk = row[0]
-                new_ck = (hcci.class_to_enum(new_cls) << COMPOSITE_SHIFT) | hk
-                cur.execute(
-                    "UPDATE write_bench_hcci SET class_label = %s, composite_key = %s WHERE id = %s",
-                    (new_cls, new_ck, int(uid)),
-                )
+    # These updates are not timed, so they go out as one batched
+    # UPDATE ... FROM (VALUES ...) with the composite key rebuilt from
+    # hilbert_key server-side.  Repeated ids keep their last class, as the
+    # sequential updates would have left them.
+    final_class = dict(zip(update_ids.tolist(), new_classes.tolist()))
+    update_rows = [
+        (uid, cls, hcci.class_to_enum(cls)) for uid, cls in final_class.items()
+    ]
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            f"""UPDATE write_bench_hcci AS t
+                SET class_label = v.cls,
+                    composite_key = (v.enum::bigint << {COMPOSITE_SHIFT})
+                                    | t.hilbert_key
+                FROM (VALUES %s) AS v(id, cls, enum)
+                WHERE t.id = v.id""",
+            update_rows, template="(%s, %s, %s)", page_size=1000,
+        )
     conn.commit()
 
     # Check heap fetches after updates (may be > 0 due to dirty visibility map)
@@ -620,6 +637,8 @@ def main():
     parser.add_argument("--repeats", type=int, default=5)
     parser.add_argument("--update-rows", type=int, default=100000)
     parser.add_argument("--update-count", type=int, default=1000)
+    parser.add_argument("--clusters", type=int, default=0,
+                        help="Draw insert batches from N Gaussian clusters (0 = uniform)")
     args = parser.parse_args()
 
     batch_sizes = [int(x) for x in args.batch_sizes.split(",")]
@@ -644,7 +663,7 @@ def main():
     # 2. Insert throughput
     print("\n--- Insert Throughput ---")
     insert_results = bench_insert_throughput(
-        conn, batch_sizes, n_repeats=args.repeats,
+        conn, batch_sizes, n_repeats=args.repeats, n_clusters=args.clusters,
     )
 
     # 3. Update overhead
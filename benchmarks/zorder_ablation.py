@@ -21,11 +21,18 @@ from typing import List, Tuple
 import numpy as np
 import psycopg2
 
-from spdb import config, hcci, hilbert
-from benchmarks.framework import compute_stats, time_query, wilcoxon_ranksum
+from spdb import config, hcci, hilbert, schema
+from benchmarks.framework import (
+    compute_stats, fetch_structured, prefetch_dims, time_query, wilcoxon_ranksum,
+)
 
 TABLE = config.TABLE_SLIDE_ONLY
 
+# (id, centroid_x, centroid_y, class_label) rows as fetched for key rebuilds
+OBJECT_ROW_DTYPE = np.dtype([
+    ("id", np.int64), ("x", np.float64), ("y", np.float64), ("class_label", object),
+])
+
 # ---------------------------------------------------------------------------
 # Z-order (Morton) encoding
 # ---------------------------------------------------------------------------
@@ -83,16 +90,7 @@ def morton_ranges_direct(
         ends[:-1] = m_sorted[gap_idx] + 1
         starts[1:] = m_sorted[gap_idx + 1]
 
-    ranges = [(int(s), int(e)) for s, e in zip(starts, ends)]
-
-    while len(ranges) > max_ranges:
-        gaps = [(ranges[i + 1][0] - ranges[i][1], i) for i in range(len(ranges) - 1)]
-        gaps.sort()
-        _, merge_i = gaps[0]
-        merged = (ranges[merge_i][0], ranges[merge_i + 1][1])
-        ranges = ranges[:merge_i] + [merged] + ranges[merge_i + 2:]
-
-    return ranges
+    return hcci._merge_ranges(starts, ends, max_ranges)
 
 
 # ---------------------------------------------------------------------------
@@ -216,10 +214,7 @@ def _populate_zorder_keys(conn):
     """Batch-populate zorder_composite_key from centroid coords + class_label."""
     p = config.HILBERT_ORDER  # same grid order
 
-    with conn.cursor() as cur:
-        # Get all distinct slide_ids
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        slides = [r[0] for r in cur.fetchall()]
+    slides = schema.list_slide_ids(conn, TABLE)
 
     metadata_path = os.path.join(config.RESULTS_DIR, "ingest_metadata.json")
     metadata = None
@@ -235,21 +230,19 @@ def _populate_zorder_keys(conn):
         # Batch update using SQL expression
         # Morton key = interleave bits of grid_x, grid_y
         # We'll compute in Python for correctness, then batch update
-        with conn.cursor() as cur:
-            cur.execute(f"""
-                SELECT id, centroid_x, centroid_y, class_label
-                FROM {TABLE}
-                WHERE slide_id = %s
-            """, (sid,))
-            rows = cur.fetchall()
+        recs = fetch_structured(conn, f"""
+            SELECT id, centroid_x, centroid_y, class_label
+            FROM {TABLE}
+            WHERE slide_id = %s
+        """, (sid,), OBJECT_ROW_DTYPE)
 
-        if not rows:
+        if len(recs) == 0:
             continue
 
-        ids = np.array([r[0] for r in rows], dtype=np.int64)
-        xs = np.array([float(r[1]) for r in rows], dtype=np.float64)
-        ys = np.array([float(r[2]) for r in rows], dtype=np.float64)
-        classes = [r[3] for r in rows]
+        ids = recs["id"]
+        xs = recs["x"]
+        ys = recs["y"]
+        classes = recs["class_label"]
 
         # Grid coords
         gx = np.clip((xs * n / w).astype(np.int64), 0, n - 1)
@@ -259,18 +252,15 @@ def _populate_zorder_keys(conn):
         m_keys = morton_encode_batch(gx, gy, p)
 
         # Composite key: (class_enum << 48) | morton_key
-        class_enums = np.array([hcci.CLASS_ENUM.get(c, 0) for c in classes], dtype=np.int64)
+        class_enums = hcci.class_enums(classes)
         composite = (class_enums << hcci.COMPOSITE_SHIFT) | m_keys
 
         # Batch update
-        from psycopg2.extras import execute_values
-        values = [(int(ck), int(oid)) for ck, oid in zip(composite, ids)]
-
         with conn.cursor() as cur:
             # Use temp table for bulk update
             cur.execute("CREATE TEMP TABLE IF NOT EXISTS _zorder_tmp (ck BIGINT, oid BIGINT)")
             cur.execute("TRUNCATE _zorder_tmp")
-            execute_values(cur, "INSERT INTO _zorder_tmp (ck, oid) VALUES %s", values, page_size=10000)
+            hcci.copy_key_pairs(cur, "_zorder_tmp", composite, ids)
             cur.execute(f"""
                 UPDATE {TABLE} t
                 SET zorder_composite_key = z.ck
@@ -313,12 +303,13 @@ def run_ablation(
 
     print(f"\n  Running {n_trials} trials: Hilbert vs Z-order on class={class_label}, VP={viewport_frac}")
 
+    side = float(np.sqrt(viewport_frac))
     for trial in range(n_trials):
         sid = rng.choice(slides)
         w, h = get_dims(conn, sid, metadata)
 
-        vw = w * float(np.sqrt(viewport_frac))
-        vh = h * float(np.sqrt(viewport_frac))
+        vw = w * side
+        vh = h * side
         x0 = float(rng.uniform(0, max(1, w - vw)))
         y0 = float(rng.uniform(0, max(1, h - vh)))
         x1 = float(x0 + vw)
@@ -448,14 +439,11 @@ def main():
     conn.autocommit = False
 
     # Get slides
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT slide_id FROM {TABLE}")
-        slides = [r[0] for r in cur.fetchall()]
+    slides = schema.list_slide_ids(conn, TABLE)
     print(f"  Found {len(slides)} slides")
 
     # Pre-cache dims
-    for sid in slides:
-        get_dims(conn, sid, metadata)
+    prefetch_dims(conn, TABLE, slides, _dims_cache, metadata)
 
     # Warmup
     print("  Warming up...")
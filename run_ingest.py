@@ -10,11 +10,15 @@ import os
 import time
 import json
 import gc
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.dirname(__file__))
 
 from spdb import config, schema
-from spdb.ingest import download_patient, transform_patient, _copy_chunk_numpy
+from spdb.ingest import (
+    download_patient, read_patient_meta, iter_transformed,
+    open_writers, ingest_slide_parallel,
+)
 
 SELECTED_PATIENTS = [
     "bcr_patient_barcode=TCGA-2F-A9KO",
@@ -57,7 +61,7 @@ def main():
     print(f"=== SpatialPathDB Ingestion: {len(SELECTED_PATIENTS)} slides, "
           f"p={P}, T={T}, {len(TABLES)} configs ===")
 
-    # download + transform
+    # download + read metadata (transform runs once, at ingest)
     all_metas = {}
     object_counts = {}
     slide_ids = []
@@ -71,9 +75,7 @@ def main():
             path = download_patient(patient_dir)
             dl = time.time() - t0
 
-            t0 = time.time()
-            df, meta = transform_patient(path, p=P, bucket_target=T)
-            tx = time.time() - t0
+            meta = read_patient_meta(path, bucket_target=T)
 
             sid = meta["slide_id"]
             slide_ids.append(sid)
@@ -82,12 +84,9 @@ def main():
             total_objects += meta["num_objects"]
             parquet_paths[sid] = path
 
-            del df
-            gc.collect()
-
             print(f"  {sid}: {meta['num_objects']:,} objects "
                   f"({meta['image_width']:.0f}x{meta['image_height']:.0f}px) "
-                  f"[dl={dl:.1f}s tx={tx:.1f}s]")
+                  f"[dl={dl:.1f}s]")
         except Exception as e:
             print(f"  SKIP: {e}")
             import traceback
@@ -132,14 +131,16 @@ def main():
 
     # ingest slides
     print(f"\nIngesting into {len(TABLES)} tables...")
+    writers = open_writers()
     t_ingest_total = time.time()
 
-    for idx, sid in enumerate(slide_ids):
+    transformed = iter_transformed(
+        [parquet_paths[sid] for sid in slide_ids], p=P, bucket_target=T,
+    )
+    for idx, (df, meta) in enumerate(transformed):
+        sid = meta["slide_id"]
         t0 = time.time()
-        df, _ = transform_patient(parquet_paths[sid], p=P, bucket_target=T)
-
-        for tbl in TABLES:
-            _copy_chunk_numpy(conn, tbl, df)
+        ingest_slide_parallel(writers, df, TABLES)
 
         elapsed = time.time() - t0
         n = len(df)
@@ -149,6 +150,9 @@ def main():
         print(f"  [{idx+1}/{len(slide_ids)}] {sid}: {n:,} rows x {len(TABLES)} tables "
               f"in {elapsed:.1f}s ({rate:.0f} rows/sec)")
 
+    for w in writers:
+        w.close()
+
     total_elapsed = time.time() - t_ingest_total
     total_rows = total_objects * len(TABLES)
     print(f"\n  Ingestion: {total_rows:,} total rows in {total_elapsed:.1f}s "
@@ -157,6 +161,7 @@ def main():
     # build indexes
     print("\nBuilding indexes...")
     t0 = time.time()
+    schema.tune_maintenance(conn)
 
     schema.index_monolithic(conn)
     schema.index_monolithic(conn, config.TABLE_MONO_TUNED)
@@ -186,17 +191,29 @@ def main():
     print("\nANALYZE...")
     schema.analyze_all(conn)
 
-    # Verify
+    print("Building Q3 tile rollup...")
+    schema.create_tile_rollup(conn)
+
+    # Verify: the per-table counts are independent full scans, so run them
+    # concurrently on separate connections rather than one after another
     print("\nVerification:")
-    with conn.cursor() as cur:
-        for tbl in TABLES:
-            try:
+
+    def _count(tbl):
+        c = None
+        try:
+            c = schema.get_connection()
+            with c.cursor() as cur:
                 cur.execute(f"SELECT COUNT(*) FROM {tbl}")
-                cnt = cur.fetchone()[0]
-                print(f"  {tbl}: {cnt:,} rows")
-            except Exception as e:
-                print(f"  {tbl}: ERROR ({e})")
-                conn.rollback()
+                return f"{cur.fetchone()[0]:,} rows"
+        except Exception as e:
+            return f"ERROR ({e})"
+        finally:
+            if c is not None:
+                c.close()
+
+    with ThreadPoolExecutor(max_workers=len(TABLES)) as ex:
+        for tbl, status in zip(TABLES, ex.map(_count, TABLES)):
+            print(f"  {tbl}: {status}")
 
     # Save metadata
     os.makedirs(config.RESULTS_DIR, exist_ok=True)
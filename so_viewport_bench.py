@@ -47,17 +47,18 @@ def compute_stats(latencies_ms):
         ci_half = t_crit * se
     else:
         ci_half = 0.0
+    mn, p50, p95, p99, mx = np.percentile(arr, [0, 50, 95, 99, 100])
     return {
         "n": n,
         "mean": mean,
-        "median": float(np.median(arr)),
-        "p50": float(np.percentile(arr, 50)),
-        "p95": float(np.percentile(arr, 95)),
-        "p99": float(np.percentile(arr, 99)),
+        "median": float(p50),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
         "std": std,
         "cv": std / mean if mean > 0 else 0,
-        "min": float(np.min(arr)),
-        "max": float(np.max(arr)),
+        "min": float(mn),
+        "max": float(mx),
         "ci95_lower": round(mean - ci_half, 3),
         "ci95_upper": round(mean + ci_half, 3),
         "ci95_half": round(ci_half, 3),
@@ -5,6 +5,7 @@ This is a prototype demonstrating the concept.  In production, this
 would run as a background daemon.
 """
 
+import heapq
 import time
 import json
 import numpy as np
@@ -32,23 +33,26 @@ class QueryMonitor:
 
     def hot_buckets(self, top_n=10):
         """Return the most frequently accessed buckets."""
-        sorted_hits = sorted(self.bucket_hits.items(), key=lambda x: -x[1])
-        return sorted_hits[:top_n]
+        return heapq.nlargest(top_n, self.bucket_hits.items(), key=lambda x: x[1])
 
     def cold_buckets(self, min_queries=10):
         """Return buckets that are rarely accessed."""
         if self.total_queries < min_queries:
             return []
-        all_keys = set(self.bucket_hits.keys())
-        avg_hits = np.mean(list(self.bucket_hits.values()))
-        return [(k, v) for k, v in self.bucket_hits.items() if v < avg_hits * 0.1]
+        items = list(self.bucket_hits.items())
+        hits = np.fromiter((v for _, v in items), dtype=np.int64, count=len(items))
+        cold = np.flatnonzero(hits < hits.mean() * 0.1)
+        return [items[i] for i in cold]
 
     def latency_outliers(self, threshold_ms=500):
         """Buckets with consistently high latency."""
         outliers = []
         for key, lats in self.bucket_latencies.items():
-            if len(lats) >= 5 and np.median(lats) > threshold_ms:
-                outliers.append((key, np.median(lats), len(lats)))
+            if len(lats) < 5:
+                continue
+            med = np.median(lats)
+            if med > threshold_ms:
+                outliers.append((key, med, len(lats)))
         return sorted(outliers, key=lambda x: -x[1])
 
 
@@ -197,16 +197,20 @@ def optimal_allocation(
     remaining = B_star - K
     slide_map = {s["slide_id"]: s for s in slides}
 
-    # Build max-heap: (-marginal_benefit, slide_id)
-    heap: list[tuple[float, str]] = []
+    # Build max-heap: (-marginal_benefit, slide_id, cost at B_k + 1).
+    # Carrying C_k(B_k + 1) means each increment evaluates the cost model
+    # once (at B_k + 2) instead of recomputing both endpoints.
+    heap: list[tuple[float, str, float]] = []
     for s in slides:
         sid = s["slide_id"]
+        next_cost = slide_cost(s, 2, viewport_frac, alpha_exec, C_h, workload)
         delta = (slide_cost(s, 1, viewport_frac, alpha_exec, C_h, workload) -
-                 slide_cost(s, 2, viewport_frac, alpha_exec, C_h, workload))
-        heapq.heappush(heap, (-delta, sid))
+                 next_cost)
+        heap.append((-delta, sid, next_cost))
+    heapq.heapify(heap)
 
     while remaining > 0 and heap:
-        neg_delta, sid = heapq.heappop(heap)
+        neg_delta, sid, cost = heapq.heappop(heap)
         delta = -neg_delta
 
         if delta <= 0:
@@ -218,9 +222,9 @@ def optimal_allocation(
         # Push new marginal benefit for next increment
         s = slide_map[sid]
         new_B = alloc[sid]
-        new_delta = (slide_cost(s, new_B, viewport_frac, alpha_exec, C_h, workload) -
-                     slide_cost(s, new_B + 1, viewport_frac, alpha_exec, C_h, workload))
-        heapq.heappush(heap, (-new_delta, sid))
+        next_cost = slide_cost(s, new_B + 1, viewport_frac, alpha_exec, C_h,
+                               workload)
+        heapq.heappush(heap, (-(cost - next_cost), sid, next_cost))
 
     return alloc
 
@@ -85,6 +85,13 @@ PG_SEQ_PAGE_COST = 1.0
 PG_TUPLE_COST = 0.01
 PG_INDEX_TUPLE_COST = 0.005
 
+# Session settings for post-load index builds (CREATE INDEX / CLUSTER)
+PG_MAINTENANCE_WORK_MEM = os.getenv("SPDB_MAINTENANCE_WORK_MEM", "2GB")
+PG_MAX_PARALLEL_MAINTENANCE_WORKERS = int(os.getenv("SPDB_PARALLEL_MAINTENANCE_WORKERS", "4"))
+
+# Concurrent COPY connections used to load a slide into the benchmark tables
+INGEST_WRITERS = int(os.getenv("SPDB_INGEST_WRITERS", "4"))
+
 
 def dsn():
     parts = [f"host={DB_HOST}", f"port={DB_PORT}", f"dbname={DB_NAME}", f"user={DB_USER}"]
@@ -210,13 +210,13 @@ class ViewportCostModel:
         selectivity_within = viewport_frac * num_buckets / b_hit
         selectivity_within = min(selectivity_within, 1.0)
 
-        total_idx_io = 0
-        total_heap_io = 0
-        for _ in range(int(math.ceil(b_hit))):
-            idx_io, heap_io = gist_scan_cost(
-                int(tuples_per_bucket), selectivity_within, self.ps, self.tw)
-            total_idx_io += idx_io
-            total_heap_io += heap_io
+        # Every touched bucket has the same size and selectivity, so the
+        # per-bucket scan cost is computed once and scaled by the count.
+        n_scans = int(math.ceil(b_hit))
+        idx_io, heap_io = gist_scan_cost(
+            int(tuples_per_bucket), selectivity_within, self.ps, self.tw)
+        total_idx_io = idx_io * n_scans
+        total_heap_io = heap_io * n_scans
 
         tuples_ret = int(self.n * viewport_frac)
         plan_ms = self.plan_ms * num_buckets
@@ -186,26 +186,25 @@ def generate_cost_surface_data(n_objects=1_260_000, viewport_frac=0.05,
         t_range = np.logspace(3, 6, 40).astype(int).tolist()  # 1K to 1M
         t_range = sorted(set(t_range))
 
-    cost_grid = np.zeros((len(p_range), len(t_range)))
-    pruning_grid = np.zeros((len(p_range), len(t_range)))
-
-    global_min_cost = float("inf")
-    global_min_p = p_range[0]
-    global_min_T = t_range[0]
-
-    for i, p in enumerate(p_range):
-        for j, T in enumerate(t_range):
-            B = max(1, n_objects // T)
-            cost = cost_function_T(T, n_objects, viewport_frac)
-            cost_grid[i, j] = cost
+    # Neither the cost nor E[B_hit] depends on p in this model (the
+    # Hilbert boundary term is order-independent), so each T column is
+    # evaluated once and broadcast across the p rows.
+    costs = np.array([cost_function_T(T, n_objects, viewport_frac)
+                      for T in t_range], dtype=np.float64)
+    pruning = np.empty(len(t_range))
+    for j, T in enumerate(t_range):
+        B = max(1, n_objects // T)
+        E_Bhit = hilbert_buckets_touched(viewport_frac, p_range[0], B)
+        pruning[j] = 1.0 - E_Bhit / B if B > 0 else 0
 
-            E_Bhit = hilbert_buckets_touched(viewport_frac, p, B)
-            pruning_grid[i, j] = 1.0 - E_Bhit / B if B > 0 else 0
+    cost_grid = np.tile(costs, (len(p_range), 1))
+    pruning_grid = np.tile(pruning, (len(p_range), 1))
 
-            if cost < global_min_cost:
-                global_min_cost = cost
-                global_min_p = p
-                global_min_T = T
+    # First minimum in (p, T) scan order, as the nested loop reported it
+    j_min = int(np.argmin(costs))
+    global_min_cost = float(costs[j_min])
+    global_min_p = p_range[0]
+    global_min_T = t_range[j_min]
 
     return {
         "p_values": p_range,
@@ -316,6 +315,15 @@ def query_complexity(viewport_frac, n_objects, bucket_target=50_000,
 # C_h calibration and confidence intervals
 # ---------------------------------------------------------------------------
 
+def _ch_terms(empirical_data):
+    """Per-sample (boundary_term, actual_boundary) arrays for the C_h fit."""
+    f = np.array([d["viewport_frac"] for d in empirical_data], dtype=np.float64)
+    B = np.array([d["total_buckets"] for d in empirical_data], dtype=np.float64)
+    actual = np.array([d["buckets_touched"] for d in empirical_data],
+                      dtype=np.float64)
+    return np.sqrt(f) * np.sqrt(B), actual - f * B
+
+
 def calibrate_ch(empirical_data):
     """Fit C_h from observed (viewport_frac, buckets_touched, total_buckets) data.
 
@@ -331,23 +339,7 @@ def calibrate_ch(empirical_data):
     -------
     dict with fitted C_h, R^2, residual stats.
     """
-    residuals = []
-    boundary_terms = []
-    actual_boundaries = []
-
-    for d in empirical_data:
-        f = d["viewport_frac"]
-        B = d["total_buckets"]
-        actual = d["buckets_touched"]
-
-        bulk = f * B
-        boundary_term = math.sqrt(f) * math.sqrt(B)
-
-        actual_boundaries.append(actual - bulk)
-        boundary_terms.append(boundary_term)
-
-    boundary_terms = np.array(boundary_terms)
-    actual_boundaries = np.array(actual_boundaries)
+    boundary_terms, actual_boundaries = _ch_terms(empirical_data)
 
     # Least squares: actual_boundary = C_h * boundary_term
     # C_h = sum(actual * term) / sum(term^2)
@@ -389,18 +381,23 @@ def ch_confidence_interval(empirical_data, confidence=0.95, n_bootstrap=10000,
     """
     rng = np.random.RandomState(seed)
     n = len(empirical_data)
-    bootstrap_chs = []
-
-    for _ in range(n_bootstrap):
-        indices = rng.randint(0, n, size=n)
-        sample = [empirical_data[i] for i in indices]
-        result = calibrate_ch(sample)
-        bootstrap_chs.append(result["C_h"])
-
-    bootstrap_chs = np.array(bootstrap_chs)
+    terms, actual = _ch_terms(empirical_data)
+
+    # All resamples at once: row i of indices is bootstrap sample i, drawn
+    # from the same RNG stream as one randint(0, n, size=n) call per sample.
+    # The closed-form fit from calibrate_ch is then evaluated per row.
+    indices = rng.randint(0, n, size=(n_bootstrap, n))
+    t = terms[indices]
+    numerator = np.sum(actual[indices] * t, axis=1)
+    denominator = np.sum(t ** 2, axis=1)
+    safe = np.where(denominator > 0, denominator, 1.0)
+    bootstrap_chs = np.round(
+        np.where(denominator > 0, numerator / safe, 2.0), 4)
     alpha = 1 - confidence
-    ci_lower = float(np.percentile(bootstrap_chs, 100 * alpha / 2))
-    ci_upper = float(np.percentile(bootstrap_chs, 100 * (1 - alpha / 2)))
+    ci_lower, ci_upper = (
+        float(q) for q in
+        np.percentile(bootstrap_chs, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+    )
 
     return {
         "C_h": round(float(np.mean(bootstrap_chs)), 4),
@@ -23,10 +23,13 @@ reduction vs GiST is proportional to class selectivity.
 
 from __future__ import annotations
 
+import io
 import math
+import struct
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
+import pandas as pd
 
 from spdb import config, hilbert
 
@@ -51,6 +54,37 @@ def class_to_enum(label: str, class_enum: Optional[Dict[str, int]] = None) -> in
     return enum.get(label, len(enum))
 
 
+def class_enums(labels, default: int = 0) -> np.ndarray:
+    """CLASS_ENUM values for a sequence of labels, as an int64 array.
+
+    Labels are hashed to integer codes with pd.factorize (no string sort
+    or fixed-width unicode copy), each distinct label is looked up once,
+    and rows are filled through the codes.  Labels missing from CLASS_ENUM,
+    and null labels (code -1, which indexes the trailing slot), map to
+    ``default``.
+    """
+    codes, uniq = pd.factorize(np.asarray(labels, dtype=object).reshape(-1))
+    table = np.array([CLASS_ENUM.get(c, default) for c in uniq.tolist()]
+                     + [default], dtype=np.int64)
+    return table[codes]
+
+
+# Class labels and their cumulative distribution, precomputed for sampling
+_CLASS_ARRAY = np.array(config.CLASS_LABELS)
+_CLASS_CDF = np.cumsum([config.CLASS_DISTRIBUTION[c] for c in config.CLASS_LABELS])
+_CLASS_CDF /= _CLASS_CDF[-1]
+
+
+def sample_class_labels(rng: np.random.RandomState, n: int) -> np.ndarray:
+    """Draw n class labels from config.CLASS_DISTRIBUTION.
+
+    One searchsorted over a precomputed CDF; produces the same draws as
+    rng.choice(config.CLASS_LABELS, size=n, p=...) without rebuilding and
+    validating the probability vector on every call.
+    """
+    return _CLASS_ARRAY[_CLASS_CDF.searchsorted(rng.random_sample(n), side="right")]
+
+
 # ---------------------------------------------------------------------------
 # Composite key encoding
 # ---------------------------------------------------------------------------
@@ -75,6 +109,25 @@ def decode_composite_key(ck: int) -> Tuple[int, int]:
 # Hilbert key ranges for a viewport
 # ---------------------------------------------------------------------------
 
+def _merge_ranges(starts: np.ndarray, ends: np.ndarray,
+                  max_ranges: int) -> List[Tuple[int, int]]:
+    """Collapse [starts, ends) runs to at most max_ranges by closing the smallest gaps.
+
+    Merging two neighbours leaves every other gap unchanged, so repeatedly
+    merging the smallest gap is the same as keeping only the max_ranges - 1
+    largest gaps as split points.  One stable argsort picks them (ties go
+    to the lower index, as the pairwise loop did).
+    """
+    k = len(starts)
+    if k > max_ranges:
+        gaps = starts[1:] - ends[:-1]
+        order = np.argsort(gaps, kind="stable")
+        keep = np.sort(order[k - max_ranges:])
+        starts = np.concatenate((starts[:1], starts[keep + 1]))
+        ends = np.concatenate((ends[keep], ends[-1:]))
+    return [(int(s), int(e)) for s, e in zip(starts, ends)]
+
+
 def _hilbert_key_ranges(
     x0: float, y0: float, x1: float, y1: float,
     slide_width: float, slide_height: float,
@@ -168,19 +221,8 @@ def hilbert_ranges_direct(
         ends[:-1] = h_sorted[gap_idx] + 1
         starts[1:] = h_sorted[gap_idx + 1]
 
-    ranges = [(int(s), int(e)) for s, e in zip(starts, ends)]
-
     # If too many ranges, merge smallest gaps to stay under max_ranges
-    while len(ranges) > max_ranges:
-        # Find the smallest gap between consecutive ranges
-        gaps = [(ranges[i + 1][0] - ranges[i][1], i) for i in range(len(ranges) - 1)]
-        gaps.sort()
-        _, merge_i = gaps[0]
-        # Merge ranges[merge_i] and ranges[merge_i + 1]
-        merged = (ranges[merge_i][0], ranges[merge_i + 1][1])
-        ranges = ranges[:merge_i] + [merged] + ranges[merge_i + 2:]
-
-    return ranges
+    return _merge_ranges(starts, ends, max_ranges)
 
 
 def hilbert_ranges_at_order(
@@ -239,49 +281,24 @@ def hilbert_ranges_at_order(
     n_query_cells = (gx1 - gx0 + 1) * (gy1 - gy0 + 1)
 
     if query_order < index_order:
-        # Expand each query-order cell to all its child cells at index_order
+        # The scale x scale children of every query cell tile one contiguous
+        # rectangle of index_order cells, clipped to the grid
         scale = 1 << (index_order - query_order)
-        all_index_cells = []
-        for qx in range(gx0, gx1 + 1):
-            for qy in range(gy0, gy1 + 1):
-                # This query cell maps to scale x scale child cells
-                ix_base = qx * scale
-                iy_base = qy * scale
-                for dx in range(scale):
-                    ix = ix_base + dx
-                    if ix >= n_i:
-                        continue
-                    for dy in range(scale):
-                        iy = iy_base + dy
-                        if iy >= n_i:
-                            continue
-                        all_index_cells.append((ix, iy))
-
-        if not all_index_cells:
-            return [(0, 1 << (2 * index_order))], n_query_cells
-
-        # Vectorized Hilbert encoding at index_order
-        ixs = np.array([c[0] for c in all_index_cells], dtype=np.int64)
-        iys = np.array([c[1] for c in all_index_cells], dtype=np.int64)
-        h_indices = hilbert.encode_batch(ixs, iys, index_order)
-
+        ix_axis = np.arange(gx0 * scale, min((gx1 + 1) * scale, n_i), dtype=np.int64)
+        iy_axis = np.arange(gy0 * scale, min((gy1 + 1) * scale, n_i), dtype=np.int64)
     else:
-        # query_order > index_order: map to parent cells at index_order
+        # query_order > index_order: map to parent cells at index_order; the
+        # distinct parents per axis combine as a full cross product
         scale = 1 << (query_order - index_order)
-        parent_cells = set()
-        for qx in range(gx0, gx1 + 1):
-            for qy in range(gy0, gy1 + 1):
-                ix = min(qx // scale, n_i - 1)
-                iy = min(qy // scale, n_i - 1)
-                parent_cells.add((ix, iy))
+        ix_axis = np.unique(np.minimum(np.arange(gx0, gx1 + 1) // scale, n_i - 1))
+        iy_axis = np.unique(np.minimum(np.arange(gy0, gy1 + 1) // scale, n_i - 1))
 
-        if not parent_cells:
-            return [(0, 1 << (2 * index_order))], n_query_cells
+    if len(ix_axis) == 0 or len(iy_axis) == 0:
+        return [(0, 1 << (2 * index_order))], n_query_cells
 
-        cells_list = list(parent_cells)
-        ixs = np.array([c[0] for c in cells_list], dtype=np.int64)
-        iys = np.array([c[1] for c in cells_list], dtype=np.int64)
-        h_indices = hilbert.encode_batch(ixs, iys, index_order)
+    # Vectorized Hilbert encoding at index_order
+    ixs, iys = np.meshgrid(ix_axis, iy_axis)
+    h_indices = hilbert.encode_batch(ixs.ravel(), iys.ravel(), index_order)
 
     # Sort and merge into ranges
     h_sorted = np.sort(h_indices)
@@ -301,17 +318,8 @@ def hilbert_ranges_at_order(
         ends[:-1] = h_sorted[gap_idx] + 1
         starts[1:] = h_sorted[gap_idx + 1]
 
-    ranges = [(int(s), int(e)) for s, e in zip(starts, ends)]
-
     # Merge smallest gaps if too many ranges
-    while len(ranges) > max_ranges:
-        gaps = [(ranges[i + 1][0] - ranges[i][1], i) for i in range(len(ranges) - 1)]
-        gaps.sort()
-        _, merge_i = gaps[0]
-        merged = (ranges[merge_i][0], ranges[merge_i + 1][1])
-        ranges = ranges[:merge_i] + [merged] + ranges[merge_i + 2:]
-
-    return ranges, n_query_cells
+    return _merge_ranges(starts, ends, max_ranges), n_query_cells
 
 
 # ---------------------------------------------------------------------------
@@ -544,6 +552,71 @@ def false_positive_rate(viewport_frac: float, hilbert_order: int) -> float:
     return 4.0 / (math.sqrt(viewport_frac) * n)
 
 
+def count_query_rows(conn, sql: str, params) -> int:
+    """Number of rows a query returns, counted server-side.
+
+    Avoids fetching and materialising every row when only the
+    cardinality is needed.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM ({sql}) AS q", params)
+        return int(cur.fetchone()[0])
+
+
+def count_query_rows_many(conn, queries, batch_size: int = 50) -> List[int]:
+    """count_query_rows() for a list of (sql, params) queries.
+
+    Each batch of queries is sent as one SELECT of scalar COUNT(*)
+    subqueries, so a sweep over many viewports costs one round-trip per
+    ``batch_size`` queries instead of one per query.
+    """
+    counts: List[int] = []
+    with conn.cursor() as cur:
+        for start in range(0, len(queries), batch_size):
+            batch = queries[start:start + batch_size]
+            cur.execute(
+                "SELECT " + ", ".join(
+                    f"(SELECT COUNT(*) FROM ({sql}) AS q{i})"
+                    for i, (sql, _) in enumerate(batch)
+                ),
+                tuple(p for _, params in batch for p in params),
+            )
+            counts.extend(int(c) for c in cur.fetchone())
+    return counts
+
+
+# PostgreSQL binary COPY framing: signature + flags + extension length, and
+# the -1 field-count trailer.  Shared with spdb.ingest.
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+_KEY_PAIR_ROW = np.dtype([
+    ("nfields", ">i2"),
+    ("ck_len", ">i4"), ("ck", ">i8"),
+    ("oid_len", ">i4"), ("oid", ">i8"),
+])
+
+
+def copy_key_pairs(cur, table_name: str, keys, ids,
+                   columns: Tuple[str, str] = ("ck", "oid")) -> None:
+    """Bulk-load (key, id) BIGINT pairs into *table_name* via binary COPY.
+
+    Every row has the same width, so the whole payload is one packed numpy
+    buffer; nothing is converted or formatted per row on the Python side.
+    ``columns`` names the target columns for the keys and the ids.
+    """
+    rows = np.empty(len(ids), dtype=_KEY_PAIR_ROW)
+    rows["nfields"] = 2
+    rows["ck_len"] = 8
+    rows["ck"] = keys
+    rows["oid_len"] = 8
+    rows["oid"] = ids
+    buf = io.BytesIO(PGCOPY_HEADER + rows.tobytes() + PGCOPY_TRAILER)
+    cur.copy_expert(
+        f"COPY {table_name} ({columns[0]}, {columns[1]}) FROM STDIN "
+        f"WITH (FORMAT BINARY)", buf
+    )
+
+
 def measure_false_positive_rate(
     conn,
     table_name: str,
@@ -566,8 +639,6 @@ def measure_false_positive_rate(
     (with ST_Intersects) on the same viewport, and counts how many
     HCCI results fall outside the exact viewport.
     """
-    from benchmarks.framework import time_query
-
     hcci_sql, hcci_params = build_hcci_query(
         table_name, slide_id, class_labels,
         x0, y0, x1, y1, slide_width, slide_height,
@@ -585,11 +656,8 @@ def measure_false_positive_rate(
         srid=srid,
     )
 
-    hcci_rows, _ = time_query(conn, hcci_sql, hcci_params)
-    exact_rows, _ = time_query(conn, exact_sql, exact_params)
-
-    n_hcci = len(hcci_rows)
-    n_exact = len(exact_rows)
+    n_hcci = count_query_rows(conn, hcci_sql, hcci_params)
+    n_exact = count_query_rows(conn, exact_sql, exact_params)
     n_fp = max(0, n_hcci - n_exact)
     fp_rate = n_fp / n_hcci if n_hcci > 0 else 0.0
 
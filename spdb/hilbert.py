@@ -48,29 +48,29 @@ def d2xy(p: int, d: int):
 
 
 def encode_batch(xs: np.ndarray, ys: np.ndarray, p: int) -> np.ndarray:
-    """Vectorized Hilbert encoding -- processes full arrays without Python loops."""
-    xs = np.asarray(xs, dtype=np.int64)
-    ys = np.asarray(ys, dtype=np.int64)
-    n = np.int64(1 << p)
+    """Vectorized Hilbert encoding -- processes full arrays without Python loops.
+
+    Grid coordinates are held as int32 (they are < 2^p) and rotated in
+    place, so each level streams half the bytes of an int64 pass and
+    allocates no fancy-indexed copies.  Only the key itself is int64.
+    """
+    ctype = np.int32 if p <= 30 else np.int64
+    xs = np.array(xs, dtype=ctype)
+    ys = np.array(ys, dtype=ctype)
     d = np.zeros(len(xs), dtype=np.int64)
-    s = n >> 1
+    s = (1 << p) >> 1
     while s > 0:
-        rx = ((xs & s) > 0).astype(np.int64)
-        ry = ((ys & s) > 0).astype(np.int64)
-        d += s * s * ((3 * rx) ^ ry)
-        # Rotation: when ry == 0
-        mask_ry0 = ry == 0
-        mask_flip = mask_ry0 & (rx == 1)
-        xs_new = xs.copy()
-        ys_new = ys.copy()
-        xs_new[mask_flip] = (s - 1) - xs[mask_flip]
-        ys_new[mask_flip] = (s - 1) - ys[mask_flip]
-        swap = mask_ry0
-        tmp_x = xs_new.copy()
-        xs_new[swap] = ys_new[swap]
-        ys_new[swap] = tmp_x[swap]
-        xs = xs_new
-        ys = ys_new
+        rx = (xs & s) != 0
+        ry = (ys & s) != 0
+        quad = (rx.astype(np.int64) * 3) ^ ry
+        quad *= s * s
+        d += quad
+        # Rotation: when ry == 0, flip if rx == 1, then swap x and y
+        flip = rx & ~ry
+        np.subtract(s - 1, xs, out=xs, where=flip)
+        np.subtract(s - 1, ys, out=ys, where=flip)
+        swap = ~ry
+        xs, ys = np.where(swap, ys, xs), np.where(swap, xs, ys)
         s >>= 1
     return d
 
@@ -110,7 +110,8 @@ def candidate_buckets_for_bbox(x_min, y_min, x_max, y_max,
     """Return set of bucket IDs that a bounding box may touch.
 
     Scans all grid cells covered by the bbox to find exact bucket set.
-    For small viewports (5% of slide) this is fast.
+    The cells are encoded in one batch and marked in a boolean array of
+    num_buckets, whose nonzero positions are already sorted.
     """
     n = 1 << p
     gx_lo = max(0, int(x_min * n / w))
@@ -119,10 +120,8 @@ def candidate_buckets_for_bbox(x_min, y_min, x_max, y_max,
     gy_hi = min(n - 1, int(y_max * n / h))
 
     total_cells = 1 << (2 * p)
-    buckets = set()
-    for gx in range(gx_lo, gx_hi + 1):
-        for gy in range(gy_lo, gy_hi + 1):
-            h = xy2d(p, gx, gy)
-            b = min(num_buckets - 1, h * num_buckets // total_cells)
-            buckets.add(b)
-    return sorted(buckets)
+    gx, gy = np.meshgrid(np.arange(gx_lo, gx_hi + 1), np.arange(gy_lo, gy_hi + 1))
+    d = encode_batch(gx.ravel(), gy.ravel(), p)
+    hit = np.zeros(num_buckets, dtype=bool)
+    hit[np.minimum(num_buckets - 1, d * num_buckets // total_cells)] = True
+    return np.flatnonzero(hit).tolist()
@@ -5,18 +5,36 @@ and batch-inserts into all database configurations.
 """
 
 import io
+import json
 import os
 import time
+import struct
 import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import psycopg2
 from psycopg2 import sql
 from huggingface_hub import HfApi, hf_hub_download
 from tqdm import tqdm
 
-from spdb import config, hilbert, zorder, schema
+from spdb import config, hcci, hilbert, zorder, schema
+
+# Low-cardinality text columns of a transformed slide, stored as categoricals
+_CATEGORICAL_COLS = ["slide_id", "class_label", "tile_id", "pipeline_id"]
+
+
+def _key_dtype(p):
+    """Smallest dtype that holds a 2p-bit Hilbert/Z-order key exactly."""
+    bits = 2 * p
+    if bits <= 16:
+        return np.uint16
+    if bits <= 32:
+        return np.uint32
+    return np.int64
 
 
 def list_patients():
@@ -77,13 +95,82 @@ def _assign_class_labels(df, seed=42):
     of spatial coordinates for deterministic, spatially-coherent labeling.
     """
     rng = np.random.RandomState(seed)
-    n = len(df)
-    labels = rng.choice(
-        config.CLASS_LABELS,
-        size=n,
-        p=[config.CLASS_DISTRIBUTION[c] for c in config.CLASS_LABELS],
-    )
-    return labels
+    return hcci.sample_class_labels(rng, len(df))
+
+
+def _grid_axis(v):
+    """Integer tile coordinates as (grid index, origin, stride) along one axis."""
+    lo = v.min()
+    step = max(1, int(np.gcd.reduce(v - lo)))
+    return (v - lo) // step, lo, step
+
+
+def _tile_ids(tx, ty):
+    """'{tx}_{ty}' tile ids as a Categorical, formatted once per occupied tile.
+
+    Objects share a few thousand tiles per slide, so only the occupied
+    (tx, ty) cells become strings; rows refer to them by code instead of
+    each carrying a formatted string.  Integer tile coordinates lie on a
+    regular grid, so occupied cells are found by binning onto that grid
+    with np.bincount; coordinates too sparse for a dense grid (or not
+    integers) are enumerated with np.unique instead.
+    """
+    tx = np.asarray(tx).reshape(-1)
+    ty = np.asarray(ty).reshape(-1)
+    if len(tx) and tx.dtype.kind in "iu" and ty.dtype.kind in "iu":
+        gx, x0, sx = _grid_axis(tx.astype(np.int64))
+        gy, y0, sy = _grid_axis(ty.astype(np.int64))
+        ny = int(gy.max()) + 1
+        nbins = (int(gx.max()) + 1) * ny
+        if nbins <= 4 * len(tx):
+            cell = gx * ny + gy
+            cells = np.flatnonzero(np.bincount(cell, minlength=nbins))
+            codes = np.empty(nbins, dtype=np.int64)
+            codes[cells] = np.arange(len(cells))
+            labels = [f"{x}_{y}" for x, y in zip((cells // ny * sx + x0).tolist(),
+                                                 (cells % ny * sy + y0).tolist())]
+            return pd.Categorical.from_codes(codes[cell], categories=labels)
+
+    ux, ix = np.unique(tx, return_inverse=True)
+    uy, iy = np.unique(ty, return_inverse=True)
+    ny = max(1, len(uy))
+    cells, codes = np.unique(ix.reshape(-1) * ny + iy.reshape(-1),
+                             return_inverse=True)
+    labels = [f"{x}_{y}" for x, y in zip(ux[cells // ny].tolist(),
+                                         uy[cells % ny].tolist())]
+    return pd.Categorical.from_codes(codes.reshape(-1), categories=labels)
+
+
+def _polygon_centroids(polygons):
+    """Vertex-mean centroids of a list<struct<x, y>> Arrow polygon column.
+
+    Averages the flat vertex buffers with np.add.reduceat over the list
+    offsets, so no per-vertex dict is built (pandas materialises one for
+    every point when converting the column).  Vertex fields are "" / "_1"
+    in the source data, with "x" / "y" as fallback.
+    """
+    arr = polygons.combine_chunks()
+    offsets = np.asarray(arr.offsets, dtype=np.int64)
+    verts = arr.values
+    names = {f.name for f in verts.type}
+    n_verts = offsets[-1]
+
+    def _coord(primary, fallback):
+        for name in (primary, fallback):
+            if name in names:
+                vals = verts.field(name).to_numpy(zero_copy_only=False)
+                return np.asarray(vals[:n_verts], dtype=np.float64)
+        return np.zeros(n_verts, dtype=np.float64)
+
+    counts = np.diff(offsets)
+    nonempty = counts > 0
+    starts = offsets[:-1][nonempty]
+    cx = np.full(len(counts), np.nan)
+    cy = np.full(len(counts), np.nan)
+    if len(starts):
+        cx[nonempty] = np.add.reduceat(_coord("", "x"), starts) / counts[nonempty]
+        cy[nonempty] = np.add.reduceat(_coord("_1", "y"), starts) / counts[nonempty]
+    return cx, cy
 
 
 def transform_patient(parquet_path, p=None, bucket_target=None):
@@ -96,28 +183,20 @@ def transform_patient(parquet_path, p=None, bucket_target=None):
     if bucket_target is None:
         bucket_target = config.BUCKET_TARGET
 
-    df = pd.read_parquet(parquet_path, columns=[
+    columns = [
         "case_id", "image_width", "image_height",
         "tile_minx", "tile_miny", "tile_width", "tile_height",
-        "AreaInPixels", "PhysicalSize", "Polygon",
+        "AreaInPixels", "PhysicalSize",
         "subject_id", "analysis_id", "mpp", "type",
-    ])
+    ]
+    table = pq.read_table(parquet_path, columns=columns + ["Polygon"])
+    cx, cy = _polygon_centroids(table.column("Polygon"))
+    df = table.select(columns).to_pandas()
 
     slide_id = df["case_id"].iloc[0]
     img_w = float(df["image_width"].iloc[0])
     img_h = float(df["image_height"].iloc[0])
 
-    centroids_x = []
-    centroids_y = []
-    for poly_list in df["Polygon"]:
-        xs = [pt.get("", pt.get("x", 0.0)) for pt in poly_list]
-        ys = [pt.get("_1", pt.get("y", 0.0)) for pt in poly_list]
-        centroids_x.append(np.mean(xs))
-        centroids_y.append(np.mean(ys))
-
-    cx = np.array(centroids_x, dtype=np.float64)
-    cy = np.array(centroids_y, dtype=np.float64)
-
     gx, gy = hilbert.normalize_coords(cx, cy, img_w, img_h, p)
     h_keys = hilbert.encode_batch(gx, gy, p)
 
@@ -125,28 +204,32 @@ def transform_patient(parquet_path, p=None, bucket_target=None):
     z_keys = zorder.encode_batch(zgx, zgy, p)
 
     num_buckets = max(1, len(df) // bucket_target)
-    tile_ids = df.apply(
-        lambda r: f"{r['tile_minx']}_{r['tile_miny']}", axis=1
-    )
+    tile_ids = _tile_ids(df["tile_minx"], df["tile_miny"])
 
     class_labels = _assign_class_labels(df)
 
     mpp = df["mpp"].iloc[0]
     area_physical = df["AreaInPixels"].astype(float) * mpp * mpp
 
+    # Keys and the constant confidence are held in the narrowest exact dtype
+    # (uint16 keys at p=8); COPY widens them back to BIGINT/DOUBLE PRECISION
+    key_dtype = _key_dtype(p)
     result = pd.DataFrame({
         "slide_id": slide_id,
         "centroid_x": cx,
         "centroid_y": cy,
         "class_label": class_labels,
         "tile_id": tile_ids,
-        "hilbert_key": h_keys,
-        "zorder_key": z_keys,
+        "hilbert_key": h_keys.astype(key_dtype),
+        "zorder_key": z_keys.astype(key_dtype),
         "area": area_physical,
         "perimeter": np.sqrt(area_physical) * 4,
-        "confidence": 1.0,
+        "confidence": np.ones(len(cx), dtype=np.float32),
         "pipeline_id": df["analysis_id"].iloc[0],
     })
+    # Repeated strings held once per distinct value; slides stay resident
+    # in the prefetch queue and transform cache between read and COPY
+    result = result.astype({col: "category" for col in _CATEGORICAL_COLS})
 
     meta = {
         "slide_id": slide_id,
@@ -158,6 +241,99 @@ def transform_patient(parquet_path, p=None, bucket_target=None):
     return result, meta
 
 
+# Bump whenever transform_patient's output (columns, dtypes, key or label
+# logic) changes, so stale transform_patient_cached entries are not reused.
+TRANSFORM_VERSION = 1
+
+
+def _transform_cache_key(parquet_path, p, bucket_target):
+    """Content key for a transform: source file identity plus parameters.
+
+    Also covers TRANSFORM_VERSION and the class distribution the labels are
+    sampled from.
+    """
+    st = os.stat(parquet_path)
+    classes = json.dumps(config.CLASS_DISTRIBUTION, sort_keys=True)
+    ident = (f"{TRANSFORM_VERSION}|{os.path.abspath(parquet_path)}|{st.st_size}|"
+             f"{st.st_mtime_ns}|{p}|{bucket_target}|{classes}")
+    return hashlib.sha256(ident.encode()).hexdigest()[:24]
+
+
+def transform_patient_cached(parquet_path, p=None, bucket_target=None, cache_dir=None):
+    """transform_patient() memoised on disk.
+
+    The transform is deterministic in (source file, p, bucket_target, class
+    distribution, TRANSFORM_VERSION), so re-runs of the ingest reuse the stored result instead of re-extracting
+    centroids and re-encoding keys.
+    """
+    if p is None:
+        p = config.HILBERT_ORDER
+    if bucket_target is None:
+        bucket_target = config.BUCKET_TARGET
+    if cache_dir is None:
+        cache_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), "data_cache", "transformed"
+        )
+    os.makedirs(cache_dir, exist_ok=True)
+
+    key = _transform_cache_key(parquet_path, p, bucket_target)
+    df_path = os.path.join(cache_dir, f"{key}.parquet")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+    if os.path.exists(df_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            return pd.read_parquet(df_path), json.load(f)
+
+    df, meta = transform_patient(parquet_path, p=p, bucket_target=bucket_target)
+    df.to_parquet(df_path + ".tmp", index=False)
+    os.replace(df_path + ".tmp", df_path)
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, default=str)
+    return df, meta
+
+
+def iter_transformed(paths, p=None, bucket_target=None, max_workers=None):
+    """Run transform_patient_cached over `paths` in worker processes.
+
+    Yields (df, meta) in the order of `paths`, so slides are COPYed in the
+    same physical order on every run.  At most `max_workers` slides are in
+    flight, which bounds memory while the caller COPYs the previous one.
+    """
+    if max_workers is None:
+        max_workers = min(4, os.cpu_count() or 1)
+    it = iter(paths)
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        running = deque(ex.submit(transform_patient_cached, path, p, bucket_target)
+                        for _, path in zip(range(max_workers), it))
+        while running:
+            result = running.popleft().result()
+            for path in it:
+                running.append(ex.submit(transform_patient_cached, path, p, bucket_target))
+                break
+            yield result
+
+
+def read_patient_meta(parquet_path, bucket_target=None):
+    """Slide metadata from a parquet file without transforming it.
+
+    Reads the footer row count and the first row of the slide-level columns,
+    so the schema pass does not need to hold a transformed DataFrame.
+    """
+    if bucket_target is None:
+        bucket_target = config.BUCKET_TARGET
+
+    pf = pq.ParquetFile(parquet_path)
+    n = pf.metadata.num_rows
+    head = pf.read_row_group(0, columns=["case_id", "image_width", "image_height"])
+    row = head.slice(0, 1).to_pylist()[0]
+    return {
+        "slide_id": row["case_id"],
+        "image_width": float(row["image_width"]),
+        "image_height": float(row["image_height"]),
+        "num_objects": n,
+        "num_buckets": max(1, n // bucket_target),
+    }
+
+
 def _copy_dataframe(conn, table_name, df):
     """Fast bulk insert via PostgreSQL COPY protocol."""
     buf = io.StringIO()
@@ -217,15 +393,15 @@ def _copy_chunk_numpy(conn, table_name, df, chunk_size=200_000):
     n = len(df)
     cx_all = df["centroid_x"].values
     cy_all = df["centroid_y"].values
-    sid_all = df["slide_id"].values
-    cl_all = df["class_label"].values
-    tid_all = df["tile_id"].values
+    sid_all = df["slide_id"].to_numpy()
+    cl_all = df["class_label"].to_numpy()
+    tid_all = df["tile_id"].to_numpy()
     hk_all = df["hilbert_key"].values
     zk_all = df["zorder_key"].values
     ar_all = df["area"].values
     pr_all = df["perimeter"].values
     co_all = df["confidence"].values
-    pid_all = df["pipeline_id"].values
+    pid_all = df["pipeline_id"].to_numpy()
 
     cols = [
         "object_id", "slide_id", "geom", "centroid_x", "centroid_y",
@@ -252,13 +428,138 @@ def _copy_chunk_numpy(conn, table_name, df, chunk_size=200_000):
         conn.commit()
 
 
+# Binary COPY: fixed-width columns first so they can be packed as one
+# structured array; geom is sent as little-endian WKB (21 bytes per point).
+_BINARY_FIXED = [
+    ("nfields", ">i2"),
+    ("geom_len", ">i4"), ("wkb_order", "u1"), ("wkb_type", "<u4"),
+    ("wkb_x", "<f8"), ("wkb_y", "<f8"),
+] + [
+    field
+    for col, typ in [
+        ("centroid_x", ">f8"), ("centroid_y", ">f8"),
+        ("hilbert_key", ">i8"), ("zorder_key", ">i8"),
+        ("area", ">f8"), ("perimeter", ">f8"), ("confidence", ">f8"),
+    ]
+    for field in ((f"{col}_len", ">i4"), (col, typ))
+]
+_BINARY_TEXT = ["slide_id", "class_label", "tile_id", "pipeline_id"]
+_BINARY_COLS = [
+    "geom", "centroid_x", "centroid_y", "hilbert_key", "zorder_key",
+    "area", "perimeter", "confidence",
+] + _BINARY_TEXT
+_PGCOPY_NULL = struct.pack(">i", -1)
+
+
+def _binary_text_fields(values):
+    """Length-prefixed UTF-8 field per value, encoding each distinct value once."""
+    codes, uniques = pd.factorize(values)
+    encoded = [str(u).encode() for u in uniques]
+    fields = np.array(
+        [struct.pack(">i", len(b)) + b for b in encoded] + [_PGCOPY_NULL],
+        dtype=object,
+    )
+    return fields[codes]  # code -1 (None/NaN) picks the trailing NULL
+
+
+def _copy_chunk_binary(conn, table_name, df, chunk_size=200_000, commit=True):
+    """Chunked COPY ... (FORMAT BINARY) with vectorised row packing.
+
+    Skips server-side text parsing of floats and WKT; geometry goes over the
+    wire as WKB and coordinates keep full double precision.  All chunks share
+    one transaction; pass ``commit=False`` to leave committing to the caller.
+
+    The fixed-width row buffer is allocated once and reused by every chunk;
+    its constant header/length fields are written only at allocation.
+    """
+    dtype = np.dtype(_BINARY_FIXED)
+    width = dtype.itemsize
+    copy_sql = (
+        f"COPY {table_name} ({', '.join(_BINARY_COLS)}) "
+        f"FROM STDIN WITH (FORMAT BINARY)"
+    )
+
+    n = len(df)
+    buf_rows = np.empty(min(chunk_size, n), dtype=dtype)
+    buf_rows["nfields"] = len(_BINARY_COLS)
+    buf_rows["geom_len"] = 21
+    buf_rows["wkb_order"] = 1
+    buf_rows["wkb_type"] = 1
+    value_cols = [name[:-len("_len")] for name, _ in _BINARY_FIXED[6::2]]
+    for col in value_cols:
+        buf_rows[f"{col}_len"] = 8
+
+    with conn.cursor() as cur:
+        for start in range(0, n, chunk_size):
+            part = df.iloc[start:start + chunk_size]
+            m = len(part)
+
+            fixed = buf_rows[:m]
+            fixed["wkb_x"] = part["centroid_x"].values
+            fixed["wkb_y"] = part["centroid_y"].values
+            for col in value_cols:
+                fixed[col] = part[col].values
+
+            tails = _binary_text_fields(part[_BINARY_TEXT[0]].values)
+            for col in _BINARY_TEXT[1:]:
+                tails = tails + _binary_text_fields(part[col].values)
+
+            raw = fixed.tobytes()
+            body = b"".join([
+                raw[i * width:(i + 1) * width] + tails[i] for i in range(m)
+            ])
+            buf = io.BytesIO(hcci.PGCOPY_HEADER + body + hcci.PGCOPY_TRAILER)
+            cur.copy_expert(copy_sql, buf)
+    if commit:
+        conn.commit()
+
+
 def ingest_slide(conn, df, meta, tables=None):
     """Insert a slide's data into all configured tables."""
     if tables is None:
         tables = config.ALL_TABLES
 
     for tbl in tables:
-        _copy_chunk_numpy(conn, tbl, df)
+        _copy_chunk_binary(conn, tbl, df, commit=False)
+    conn.commit()
+
+
+def _open_writer(_):
+    conn = schema.get_connection()
+    schema.tune_bulk_load(conn)
+    return conn
+
+
+def open_writers(n=None):
+    """Open *n* connections tuned for bulk COPY (see ingest_slide_parallel).
+
+    The connects run concurrently so the startup handshakes and the SET
+    round trip overlap instead of adding up per writer.
+    """
+    n = n or config.INGEST_WRITERS
+    with ThreadPoolExecutor(max_workers=n) as ex:
+        return list(ex.map(_open_writer, range(n)))
+
+
+def ingest_slide_parallel(writers, df, tables=None):
+    """Insert a slide's data into all configured tables over several connections.
+
+    Tables are dealt round-robin to the writer connections and copied
+    concurrently, so server-side COPY work runs in one backend per writer.
+    Each writer commits its own tables.
+    """
+    if tables is None:
+        tables = config.ALL_TABLES
+    n = min(len(writers), len(tables))
+
+    def _write(i):
+        conn = writers[i]
+        for tbl in tables[i::n]:
+            _copy_chunk_binary(conn, tbl, df, commit=False)
+        conn.commit()
+
+    with ThreadPoolExecutor(max_workers=n) as ex:
+        list(ex.map(_write, range(n)))
 
 
 def setup_schemas(conn, slide_ids, object_counts):
@@ -291,6 +592,7 @@ def build_indexes(conn, slide_ids, object_counts):
     """Build all indexes after bulk load."""
     print("Building indexes...")
     t0 = time.time()
+    schema.tune_maintenance(conn)
 
     schema.index_monolithic(conn)
     schema.index_monolithic(conn, config.TABLE_MONO_TUNED)
@@ -315,6 +617,7 @@ def build_indexes(conn, slide_ids, object_counts):
     print("  SPDB/SPDB-Z hybrid indexes done")
 
     schema.analyze_all(conn)
+    schema.create_tile_rollup(conn)
     print(f"  All indexes built in {time.time() - t0:.1f}s")
 
 
@@ -333,17 +636,17 @@ def run_full_ingest(n_slides=29, p=None, bucket_target=None):
     selected = patients[::step][:n_slides]
     print(f"Selected {len(selected)} patients from {len(patients)} total.")
 
-    # download and transform
-    all_dfs = []
+    # download and read slide metadata; transform happens per slide at ingest
+    paths = {}
     all_metas = {}
     object_counts = {}
     total_objects = 0
 
-    for patient_dir in tqdm(selected, desc="Downloading & transforming"):
+    for patient_dir in tqdm(selected, desc="Downloading"):
         try:
             path = download_patient(patient_dir)
-            df, meta = transform_patient(path, p=p, bucket_target=bucket_target)
-            all_dfs.append(df)
+            meta = read_patient_meta(path, bucket_target=bucket_target)
+            paths[meta["slide_id"]] = path
             all_metas[meta["slide_id"]] = meta
             object_counts[meta["slide_id"]] = meta["num_objects"]
             total_objects += meta["num_objects"]
@@ -362,12 +665,19 @@ def run_full_ingest(n_slides=29, p=None, bucket_target=None):
     conn.autocommit = False
 
     setup_schemas(conn, slide_ids, object_counts)
+    writers = open_writers()
 
-    # ingest data
+    # ingest data; transforms run ahead in worker processes
     print("\nIngesting data into all configurations...")
     t_ingest = time.time()
-    for df in tqdm(all_dfs, desc="Ingesting slides"):
-        ingest_slide(conn, df, None)
+    transformed = iter_transformed(
+        [paths[sid] for sid in slide_ids], p=p, bucket_target=bucket_target,
+    )
+    for df, meta in tqdm(transformed, total=len(slide_ids), desc="Ingesting slides"):
+        ingest_slide_parallel(writers, df)
+        del df
+    for w in writers:
+        w.close()
     elapsed = time.time() - t_ingest
     print(f"  Ingestion complete in {elapsed:.1f}s ({total_objects/elapsed:.0f} rows/sec)")
 
@@ -376,7 +686,6 @@ def run_full_ingest(n_slides=29, p=None, bucket_target=None):
 
     # Save metadata
     meta_path = os.path.join(config.RESULTS_DIR, "ingest_metadata.json")
-    import json
     with open(meta_path, "w") as f:
         json.dump({
             "slide_ids": slide_ids,
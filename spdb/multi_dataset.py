@@ -7,13 +7,14 @@ and adds OpenStreetMap building data as a non-pathology baseline.
 import os
 import json
 import time
+import hashlib
 
 import numpy as np
 import pandas as pd
 
 from spdb import config, hilbert, zorder, schema
 from spdb.ingest import (
-    download_patient, transform_patient, _copy_chunk_numpy,
+    download_patient, transform_patient, _copy_chunk_numpy, _tile_ids,
     setup_schemas, build_indexes,
 )
 
@@ -164,6 +165,12 @@ def ingest_multi_dataset(cancer_types=None, n_per_type=50, p=None,
     }
 
 
+def _grid_tile_ids(cx, cy, tile_size=256.0):
+    """'{gx}_{gy}' tile ids from integer grid cells, one string per tile."""
+    return _tile_ids(np.floor_divide(cx, tile_size).astype(np.int64),
+                     np.floor_divide(cy, tile_size).astype(np.int64))
+
+
 # ---------------------------------------------------------------------------
 # OpenStreetMap building data adapter
 # ---------------------------------------------------------------------------
@@ -206,20 +213,19 @@ class OSMDatasetAdapter:
         resp = urllib.request.urlopen(req, timeout=timeout)
         result = json_mod.loads(resp.read())
 
-        buildings = []
+        # Column lists rather than a dict per building
+        cols = {k: [] for k in ("lat", "lon", "building_type", "osm_id", "name")}
         for element in result.get("elements", []):
             center = element.get("center", {})
             if "lat" in center and "lon" in center:
                 tags = element.get("tags", {})
-                buildings.append({
-                    "lat": center["lat"],
-                    "lon": center["lon"],
-                    "building_type": tags.get("building", "yes"),
-                    "osm_id": element.get("id", 0),
-                    "name": tags.get("name", ""),
-                })
-
-        self.buildings = pd.DataFrame(buildings)
+                cols["lat"].append(center["lat"])
+                cols["lon"].append(center["lon"])
+                cols["building_type"].append(tags.get("building", "yes"))
+                cols["osm_id"].append(element.get("id", 0))
+                cols["name"].append(tags.get("name", ""))
+
+        self.buildings = pd.DataFrame(cols)
         print(f"  Downloaded {len(self.buildings)} buildings for {self.region_name}")
         return self.buildings
 
@@ -258,9 +264,7 @@ class OSMDatasetAdapter:
         z_keys = zorder.encode_batch(zgx, zgy, p)
 
         # Tile grid (256m tiles)
-        tile_size = 256.0
-        tile_ids = [f"{int(x // tile_size)}_{int(y // tile_size)}"
-                    for x, y in zip(cx, cy)]
+        tile_ids = _grid_tile_ids(cx, cy)
 
         # Map building types to class labels
         type_map = {
@@ -269,8 +273,7 @@ class OSMDatasetAdapter:
             "industrial": "Industrial",
             "yes": "Unknown",
         }
-        class_labels = [type_map.get(t, "Other")
-                        for t in df["building_type"]]
+        class_labels = df["building_type"].map(type_map).fillna("Other").to_numpy()
 
         result = pd.DataFrame({
             "slide_id": self.region_name,
@@ -360,8 +363,12 @@ class TCIADatasetAdapter:
         Polygon is colon-separated: x0:y0:x1:y1:...
 
         Returns DataFrame with centroid_x, centroid_y, area columns.
+
+        Vertex tokens of every polygon are gathered into one list and
+        converted and averaged in bulk (np.add.reduceat over per-polygon
+        offsets) rather than float()-ing and np.mean-ing polygon by polygon.
         """
-        rows = []
+        areas, tokens, counts = [], [], []
         with open(csv_path) as f:
             for line in f:
                 line = line.strip()
@@ -375,20 +382,76 @@ class TCIADatasetAdapter:
                 coords = polygon_str.split(":")
                 if len(coords) < 4:
                     continue
-                xs, ys = [], []
-                for i in range(0, len(coords) - 1, 2):
-                    try:
-                        xs.append(float(coords[i]))
-                        ys.append(float(coords[i + 1]))
-                    except (ValueError, IndexError):
-                        continue
-                if xs and ys:
-                    rows.append({
-                        "centroid_x": np.mean(xs),
-                        "centroid_y": np.mean(ys),
-                        "area": area,
-                    })
-        return pd.DataFrame(rows)
+                n = len(coords) // 2
+                areas.append(area)
+                tokens.extend(coords[:2 * n])
+                counts.append(n)
+
+        if not counts:
+            return pd.DataFrame()
+        try:
+            xy = np.array(tokens, dtype=np.float64).reshape(-1, 2)
+        except ValueError:
+            # Malformed vertices: bulk parse that skips bad pairs
+            return self._parse_polygons_slow(areas, tokens, counts)
+        counts = np.asarray(counts)
+        offsets = np.concatenate(([0], np.cumsum(counts[:-1])))
+        centroids = np.add.reduceat(xy, offsets, axis=0) / counts[:, None]
+        return pd.DataFrame({
+            "centroid_x": centroids[:, 0],
+            "centroid_y": centroids[:, 1],
+            "area": np.asarray(areas, dtype=np.float64),
+        })
+
+    def parse_tcia_csv_cached(self, csv_path):
+        """parse_tcia_csv() memoised on disk under ``cache_dir/parsed``.
+
+        Keyed by the CSV's path, size and mtime, so repeat loads of the same
+        slide skip the polygon parse and read the centroid table back from
+        parquet.
+        """
+        st = os.stat(csv_path)
+        ident = f"{os.path.abspath(csv_path)}|{st.st_size}|{st.st_mtime_ns}"
+        key = hashlib.sha256(ident.encode()).hexdigest()[:24]
+        parsed_dir = os.path.join(self.cache_dir, "parsed")
+        df_path = os.path.join(parsed_dir, f"{key}.parquet")
+        if os.path.exists(df_path):
+            return pd.read_parquet(df_path)
+
+        df = self.parse_tcia_csv(csv_path)
+        os.makedirs(parsed_dir, exist_ok=True)
+        df.to_parquet(df_path + ".tmp", index=False)
+        os.replace(df_path + ".tmp", df_path)
+        return df
+
+    @staticmethod
+    def _parse_polygons_slow(areas, tokens, counts):
+        """Centroids when some vertex tokens are not numbers.
+
+        All tokens are coerced in one pd.to_numeric pass (bad ones become
+        NaN) and averaged per polygon with np.bincount.  As in the old
+        per-pair loop, an x counts once it parses and a y only when both
+        parse; polygons left with no usable vertex are dropped.
+        """
+        xy = pd.to_numeric(pd.Series(tokens, dtype=object), errors="coerce")
+        xy = xy.to_numpy(dtype=np.float64).reshape(-1, 2)
+        poly = np.repeat(np.arange(len(counts)), counts)
+        x_ok = ~np.isnan(xy[:, 0])
+        y_ok = x_ok & ~np.isnan(xy[:, 1])
+
+        def _sum_by_poly(ok, vals):
+            n = np.bincount(poly[ok], minlength=len(counts))
+            s = np.bincount(poly[ok], weights=vals[ok], minlength=len(counts))
+            return n, s
+
+        nx, sx = _sum_by_poly(x_ok, xy[:, 0])
+        ny, sy = _sum_by_poly(y_ok, xy[:, 1])
+        keep = (nx > 0) & (ny > 0)
+        return pd.DataFrame({
+            "centroid_x": sx[keep] / nx[keep],
+            "centroid_y": sy[keep] / ny[keep],
+            "area": np.asarray(areas, dtype=np.float64)[keep],
+        })
 
     def load_cancer_type(self, cancer_type, n_slides=None, seed=42,
                          data_dir=None):
@@ -424,7 +487,7 @@ class TCIADatasetAdapter:
             slide_name = os.path.splitext(os.path.basename(csv_path))[0]
             slide_id = f"{cancer_type}_{slide_name}"
 
-            df = self.parse_tcia_csv(csv_path)
+            df = self.parse_tcia_csv_cached(csv_path)
             if len(df) < 100:
                 continue
 
@@ -474,11 +537,7 @@ class TCIADatasetAdapter:
         zgx, zgy = zorder.normalize_coords(cx, cy, w, h, p)
         z_keys = zorder.encode_batch(zgx, zgy, p)
 
-        tile_size = 256.0
-        tile_ids = [
-            f"{int(x // tile_size)}_{int(y // tile_size)}"
-            for x, y in zip(cx, cy)
-        ]
+        tile_ids = _grid_tile_ids(cx, cy)
 
         result = pd.DataFrame({
             "slide_id": slide_id,
@@ -315,8 +315,11 @@ class PartitionRouter:
         """Build a routed k-nearest-neighbour query.
 
         Strategy (prototype): query *all* partitions for this slide via
-        UNION ALL, each with ``ORDER BY geom <-> query_point``, then wrap
-        in an outer ``ORDER BY ... LIMIT k``.
+        UNION ALL, each with ``ORDER BY geom <-> query_point LIMIT k``, then
+        wrap in an outer ``ORDER BY ... LIMIT k``.  The per-branch LIMIT
+        lets every partition stop after its own k nearest (a GiST KNN
+        index scan) instead of computing the distance to every row, so the
+        outer sort sees at most k x B_slide candidates.
 
         This still eliminates the global planner scan: the planner only sees
         B_slide partitions (typically 5--40) instead of B_total (~4,000).
@@ -361,11 +364,12 @@ class PartitionRouter:
         params: list = []
         for tbl in child_tables:
             parts.append(
-                f"SELECT object_id, centroid_x, centroid_y, class_label, "
-                f"       geom <-> ST_SetSRID(ST_MakePoint(%s, %s), 0) AS dist "
-                f"FROM {tbl}"
+                f"(SELECT object_id, centroid_x, centroid_y, class_label, "
+                f"        geom <-> ST_SetSRID(ST_MakePoint(%s, %s), 0) AS dist "
+                f" FROM {tbl} "
+                f" ORDER BY dist LIMIT %s)"
             )
-            params.extend([qx, qy])
+            params.extend([qx, qy, k])
 
         inner = "\nUNION ALL\n".join(parts)
         sql = f"SELECT * FROM (\n{inner}\n) AS knn_union ORDER BY dist LIMIT %s"
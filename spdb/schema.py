@@ -10,6 +10,8 @@ Seven configurations spanning the full storage layout design space:
   7. SPDB-Zorder             -- same as SPDB but Z-order keys
 """
 
+import re
+
 import psycopg2
 from spdb import config
 
@@ -52,6 +54,31 @@ def drop_all(conn):
             conn.rollback()
 
 
+def tune_maintenance(conn):
+    """Session settings for the index-build phase.
+
+    Raises the 64MB / 2-worker defaults so B-tree builds (and CLUSTER's
+    sort) use more parallel workers and sort in memory rather than spilling.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SET maintenance_work_mem = %s", (config.PG_MAINTENANCE_WORK_MEM,))
+        cur.execute("SET max_parallel_maintenance_workers = %s",
+                    (config.PG_MAX_PARALLEL_MAINTENANCE_WORKERS,))
+    conn.commit()
+
+
+def tune_bulk_load(conn):
+    """Session settings for the COPY phase.
+
+    Turns off synchronous_commit so per-slide commits don't wait on a WAL
+    flush.  A crash can lose the last few commits, which is acceptable for a
+    load that is simply re-run from the source files.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SET synchronous_commit = off")
+    conn.commit()
+
+
 # ---------- Monolithic ----------
 
 def create_monolithic(conn, table_name=None):
@@ -249,8 +276,85 @@ def index_spdb_zorder(conn, slide_ids, num_buckets):
                key_col="zorder_key")
 
 
+# ---------- Tile rollup ----------
+
+# Off by default in PostgreSQL; lets GROUP BY slide_id ... on a table
+# LIST-partitioned by slide_id run as independent per-partition aggregates.
+PARTITIONWISE_AGGREGATE = "SET LOCAL enable_partitionwise_aggregate = on;"
+
+
+def tile_rollup_name(table_name=None):
+    return f"{table_name or config.TABLE_SLIDE_ONLY}_tile_counts"
+
+
+def create_tile_rollup(conn, table_name=None):
+    """(Re)build the per-slide (tile_id, class_label) count rollup.
+
+    Q3 is a pure GROUP BY over immutable objects, so it is materialized once
+    after bulk load and served by an index scan on slide_id thereafter.
+    Dropping the base table (drop_all uses CASCADE) drops the view with it.
+    The grouping leads with the partition key, so it is aggregated partition
+    by partition instead of hashing every slide's rows together.
+    """
+    tbl = table_name or config.TABLE_SLIDE_ONLY
+    mv = tile_rollup_name(tbl)
+    _exec_many(conn, [
+        PARTITIONWISE_AGGREGATE,
+        f"DROP MATERIALIZED VIEW IF EXISTS {mv};",
+        f"""CREATE MATERIALIZED VIEW {mv} AS
+            SELECT slide_id, tile_id, class_label, COUNT(*) AS cnt
+            FROM {tbl}
+            GROUP BY slide_id, tile_id, class_label;""",
+        f"CREATE INDEX {mv}_slide_idx ON {mv} (slide_id);",
+        f"ANALYZE {mv};",
+    ])
+
+
+def refresh_tile_rollup(conn, table_name=None):
+    _exec_many(conn, [
+        PARTITIONWISE_AGGREGATE,
+        f"REFRESH MATERIALIZED VIEW {tile_rollup_name(table_name)};",
+    ])
+
+
 # ---------- Utility ----------
 
+def list_slide_ids(conn, table_name=config.TABLE_SLIDE_ONLY):
+    """Slide ids of a LIST-partitioned table, read from its partition bounds.
+
+    Candidate ids come from one catalogue query instead of a SELECT DISTINCT
+    over every row; a slide whose partition is empty (e.g. left behind by a
+    failed ingest) is dropped by an EXISTS probe that stops at the first row
+    of each partition, so the result matches SELECT DISTINCT.  Falls back to
+    the full scan when no partition bound parses (unpartitioned tables,
+    inheritance children).
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT pg_get_expr(c.relpartbound, c.oid)
+              FROM pg_inherits i
+              JOIN pg_class    c ON c.oid = i.inhrelid
+             WHERE i.inhparent = %s::regclass
+        """, (table_name,))
+        candidates = []
+        for (expr,) in cur.fetchall():
+            # FOR VALUES IN ('TCGA-2F-A9KO-01Z-00-DX1'[, ...])
+            m = re.search(r"IN\s*\((.*)\)", expr or "", re.IGNORECASE | re.DOTALL)
+            if m:
+                candidates.extend(
+                    v.replace("''", "'") for v in re.findall(r"'((?:[^']|'')*)'", m.group(1))
+                )
+        if not candidates:
+            cur.execute(f"SELECT DISTINCT slide_id FROM {table_name}")
+            return sorted(r[0] for r in cur.fetchall())
+
+        cur.execute(f"""
+            SELECT s FROM unnest(%s::text[]) AS s
+             WHERE EXISTS (SELECT 1 FROM {table_name} t WHERE t.slide_id = s)
+        """, (candidates,))
+        return sorted(r[0] for r in cur.fetchall())
+
+
 def analyze_all(conn):
     for t in config.ALL_TABLES:
         try: